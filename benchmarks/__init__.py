@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the contacts API.
+
+Every benchmark is a runnable module (``python -m benchmarks.<name>``) that
+prints a JSON report to stdout or writes it to ``--output``, so results can
+be stored next to a commit and diffed against later runs.
+"""
@@ -0,0 +1,368 @@
+"""
+Load test for the HTTP API.
+
+Seeds ``--users`` x ``--contacts`` rows, then drives every hot endpoint in
+turn at a fixed concurrency and reports RPS and p50/p95/p99 latency per
+endpoint as JSON::
+
+    python -m benchmarks.api_load --users 50 --contacts 200 \\
+        --requests 500 --concurrency 32 --output bench.json
+
+By default the app runs in-process against a temporary SQLite database and a
+fakeredis instance. Pass ``--db-url``/``--redis-url`` to use real PostgreSQL
+and Redis, or ``--base-url`` to load a server that is already running (it
+must use the same database as ``--db-url``; ``/users/me`` is rate limited
+there).
+
+In-process runs also report the database sessions built and the pool
+connections checked out per request.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+from sqlalchemy import event
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from benchmarks.common import (
+    LatencyRecorder,
+    create_engine,
+    report_meta,
+    reset_schema,
+    seed,
+    write_report,
+)
+from src.services.auth import Hash, create_access_token
+
+PASSWORD = "bench-password"
+ENDPOINTS = (
+    "login",
+    "me",
+    "list",
+    "list_fields",
+    "search",
+    "birthdays",
+    "lookup",
+    "create",
+    "update",
+    "delete",
+)
+
+
+@dataclass
+class LoadState:
+    usernames: list[str]
+    tokens: list[str]
+    created: dict[int, tuple[int, str]] = field(default_factory=dict)
+
+    def auth(self, i: int) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[i % len(self.tokens)]}"}
+
+
+async def run_phase(
+    requests: int,
+    concurrency: int,
+    send: Callable[[int], Awaitable[httpx.Response]],
+) -> dict:
+    """
+    Issue ``requests`` calls of ``send`` from ``concurrency`` workers.
+
+    Args:
+        requests: Total number of requests for the phase.
+        concurrency: Number of requests kept in flight.
+        send: Coroutine factory receiving the request index.
+
+    Returns:
+        The latency summary of the phase.
+    """
+    recorder = LatencyRecorder()
+    counter = itertools.count()
+
+    async def worker():
+        while (i := next(counter)) < requests:
+            start = time.perf_counter()
+            try:
+                response = await send(i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            recorder.record(time.perf_counter() - start, ok)
+
+    recorder.started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    recorder.finished = time.perf_counter()
+    return recorder.summary()
+
+
+def build_requests(client: httpx.AsyncClient, state: LoadState) -> dict:
+    def contact_body(i: int, prefix: str) -> dict:
+        return {
+            "first_name": f"{prefix}First{i}",
+            "last_name": f"{prefix}Last{i}",
+            "email": f"{prefix.lower()}{i}@bench.example.com",
+            "phone": f"+1{len(prefix)}{i:09d}",
+            "birthday": date(1990, 1 + i % 12, 1 + i % 28).isoformat(),
+        }
+
+    async def login(i):
+        return await client.post(
+            "/api/auth/login",
+            data={
+                "username": state.usernames[i % len(state.usernames)],
+                "password": PASSWORD,
+            },
+        )
+
+    async def me(i):
+        return await client.get("/api/users/me", headers=state.auth(i))
+
+    async def list_contacts(i):
+        return await client.get(
+            "/api/contacts/", params={"limit": 50}, headers=state.auth(i)
+        )
+
+    async def list_fields(i):
+        return await client.get(
+            "/api/contacts/",
+            params={"limit": 50, "fields": "first_name,last_name,phone"},
+            headers=state.auth(i),
+        )
+
+    async def search(i):
+        return await client.get(
+            "/api/contacts/",
+            params={"name": f"First{i % 10}", "email": "example"},
+            headers=state.auth(i),
+        )
+
+    async def birthdays(i):
+        return await client.get("/api/contacts/birthdays", headers=state.auth(i))
+
+    async def lookup(i):
+        # The first contact of the user, formatted differently from how it
+        # was seeded.
+        owner = i % len(state.tokens)
+        return await client.get(
+            "/api/contacts/lookup",
+            params={"phone": f"+380 {owner:05d} 00000"},
+            headers=state.auth(i),
+        )
+
+    async def create(i):
+        response = await client.post(
+            "/api/contacts/", json=contact_body(i, "New"), headers=state.auth(i)
+        )
+        if response.status_code == 201:
+            state.created[i] = (response.json()["id"], state.auth(i)["Authorization"])
+        return response
+
+    async def update(i):
+        contact_id, auth = state.created.get(i, (0, state.auth(i)["Authorization"]))
+        return await client.put(
+            f"/api/contacts/{contact_id}",
+            json=contact_body(i, "Upd"),
+            headers={"Authorization": auth},
+        )
+
+    async def delete(i):
+        contact_id, auth = state.created.get(i, (0, state.auth(i)["Authorization"]))
+        return await client.delete(
+            f"/api/contacts/{contact_id}", headers={"Authorization": auth}
+        )
+
+    return {
+        "login": login,
+        "me": me,
+        "list": list_contacts,
+        "list_fields": list_fields,
+        "search": search,
+        "birthdays": birthdays,
+        "lookup": lookup,
+        "create": create,
+        "update": update,
+        "delete": delete,
+    }
+
+
+@contextlib.contextmanager
+def in_process_app(session_factory: Callable[[], AsyncSession], redis_client):
+    """
+    Point the application at the benchmark database and Redis.
+
+    Sessions are handed out the way ``get_db`` and ``get_read_db`` do
+    without replicas: built on first use and shared within a request.
+    Every Redis client of the app, from the user cache to the contact
+    counts, the event broker and the registration filter, goes to
+    ``redis_client``. Dependency overrides and patched globals are restored
+    on exit so the harness can be used from the test suite.
+    """
+    from main import app
+    from src.api import users
+    from src.database.db import get_db, get_read_db, lazy_session
+    from src.services import cache
+
+    async def override_get_db():
+        async with lazy_session(session_factory) as session:
+            yield session
+
+    async def override_get_read_db(db: AsyncSession = Depends(get_db)):
+        yield db
+
+    saved_overrides = dict(app.dependency_overrides)
+    limiter = users.get_limiter()
+    saved_limiter = limiter.enabled
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    limiter.enabled = False
+    try:
+        with (
+            cache.redis_client.override(redis_client),
+            cache.pubsub_client.override(redis_client),
+        ):
+            yield app
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(saved_overrides)
+        limiter.enabled = saved_limiter
+
+
+def make_redis(redis_url: str | None):
+    if redis_url:
+        import redis.asyncio as redis
+
+        return redis.Redis.from_url(redis_url)
+    from fakeredis import FakeAsyncRedis
+
+    return FakeAsyncRedis()
+
+
+async def run(
+    db_url: str,
+    users: int,
+    contacts: int,
+    requests: int,
+    concurrency: int,
+    redis_url: str | None = None,
+    base_url: str | None = None,
+    endpoints: tuple[str, ...] = ENDPOINTS,
+) -> dict:
+    """
+    Seed the database, run every endpoint phase and return the report.
+    """
+    engine = create_engine(db_url)
+    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
+    await reset_schema(engine)
+    hashed = Hash().get_password_hash(PASSWORD)
+    seed_start = time.perf_counter()
+    usernames = await seed(session_maker, users, contacts, hashed)
+    seed_seconds = time.perf_counter() - seed_start
+    tokens = [await create_access_token(data={"sub": name}) for name in usernames]
+    state = LoadState(usernames=usernames, tokens=tokens)
+
+    usage = {"sessions": 0, "checkouts": 0}
+
+    def counted_session():
+        usage["sessions"] += 1
+        return session_maker()
+
+    def count_checkout(*args):
+        usage["checkouts"] += 1
+
+    event.listen(engine.sync_engine, "checkout", count_checkout)
+
+    results = {}
+    redis_client = make_redis(redis_url)
+    limits = httpx.Limits(max_connections=concurrency)
+    try:
+        with contextlib.ExitStack() as stack:
+            if base_url:
+                transport = httpx.AsyncHTTPTransport(limits=limits)
+                target = base_url
+            else:
+                app = stack.enter_context(in_process_app(counted_session, redis_client))
+                transport = httpx.ASGITransport(app=app)
+                target = "http://bench"
+            async with httpx.AsyncClient(
+                transport=transport, base_url=target, timeout=60
+            ) as client:
+                senders = build_requests(client, state)
+                for name in endpoints:
+                    before = dict(usage)
+                    results[name] = await run_phase(
+                        requests, concurrency, senders[name]
+                    )
+                    if not base_url:
+                        for key in usage:
+                            results[name][f"{key}_per_request"] = round(
+                                (usage[key] - before[key]) / requests, 3
+                            )
+    finally:
+        await redis_client.aclose()
+        await engine.dispose()
+
+    return {
+        "meta": report_meta(
+            db_url=engine.url.render_as_string(hide_password=True),
+            redis="fakeredis" if redis_url is None else "redis",
+            target=base_url or "in-process",
+            users=users,
+            contacts_per_user=contacts,
+            requests_per_endpoint=requests,
+            concurrency=concurrency,
+            seed_seconds=round(seed_seconds, 3),
+        ),
+        "endpoints": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--contacts", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument(
+        "--endpoints",
+        default=",".join(ENDPOINTS),
+        help="Comma separated subset of: " + ", ".join(ENDPOINTS),
+    )
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    endpoints = tuple(name for name in args.endpoints.split(",") if name)
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = args.db_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        report = asyncio.run(
+            run(
+                db_url,
+                args.users,
+                args.contacts,
+                args.requests,
+                args.concurrency,
+                redis_url=args.redis_url,
+                base_url=args.base_url,
+                endpoints=endpoints,
+            )
+        )
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
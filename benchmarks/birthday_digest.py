@@ -0,0 +1,164 @@
+"""
+Throughput benchmark of the birthday digest job.
+
+Seeds ``--users`` confirmed users with ``--contacts`` contacts each, then
+runs the digest for one day against a local SMTP stand-in and reports
+users scanned and mails sent per second as JSON::
+
+    python -m benchmarks.birthday_digest --users 1000000 --contacts 5 \\
+        --smtp-delay 0.002 --output digest.json
+
+Birthdays are spread over the year, so about 2% of contacts fall in the
+7-day window. Pass ``--db-url`` to use PostgreSQL instead of a temporary
+SQLite database.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import event, insert
+
+from benchmarks.common import create_engine, report_meta, reset_schema, write_report
+from benchmarks.smtp import SMTPStandIn
+from src.database.db import DatabaseSessionManager
+from src.database.models import Contact, User
+from src.services.birthday_digest import BirthdayDigestJob
+from src.services.smtp import SMTPPool
+
+RUN_DATE = date(2025, 3, 10)
+
+
+async def seed_bulk(engine, users: int, contacts: int, batch: int = 20_000) -> None:
+    """Insert users and contacts with multi-row INSERTs, bypassing the ORM."""
+    now = RUN_DATE
+    async with engine.begin() as conn:
+        for start in range(1, users + 1, batch):
+            ids = range(start, min(start + batch, users + 1))
+            await conn.execute(
+                insert(User),
+                [
+                    {
+                        "id": i,
+                        "username": f"bench_user_{i}",
+                        "email": f"bench_user_{i}@example.com",
+                        "confirmed": True,
+                        "created_at": now,
+                    }
+                    for i in ids
+                ],
+            )
+            await conn.execute(
+                insert(Contact),
+                [
+                    {
+                        "first_name": f"First{j}",
+                        "last_name": f"Last{i}",
+                        "email": f"c{i}_{j}@example.com",
+                        "phone": f"+1{i:09d}{j:02d}",
+                        "birthday": date(1990, 1, 1)
+                        + timedelta(days=(i * 7919 + j * 104729) % 365),
+                        "created_at": now,
+                        "updated_at": now,
+                        "change_seq": 1,
+                        "user_id": i,
+                    }
+                    for i in ids
+                    for j in range(contacts)
+                ],
+            )
+
+
+async def run(
+    db_url: str,
+    users: int,
+    contacts: int,
+    batch_size: int,
+    pool_size: int,
+    smtp_delay: float,
+) -> dict:
+    engine = create_engine(db_url)
+    await reset_schema(engine)
+    seed_start = time.perf_counter()
+    await seed_bulk(engine, users, contacts)
+    seed_seconds = time.perf_counter() - seed_start
+    await engine.dispose()
+
+    manager = DatabaseSessionManager(db_url)
+    query_seconds = 0.0
+    queries = 0
+
+    @event.listens_for(manager.engine.sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(manager.engine.sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        nonlocal query_seconds, queries
+        query_seconds += time.perf_counter() - conn.info.pop("query_start")
+        queries += 1
+
+    async with SMTPStandIn(delay=smtp_delay, keep_messages=False) as server:
+        pool = SMTPPool("127.0.0.1", server.port, size=pool_size)
+        job = BirthdayDigestJob(manager, pool, batch_size=batch_size)
+        start = time.perf_counter()
+        checkpoint = await job.run(RUN_DATE)
+        elapsed = time.perf_counter() - start
+        await pool.aclose()
+        connections = server.connections
+    await manager.close()
+
+    return {
+        "meta": report_meta(
+            db_url=engine.url.render_as_string(hide_password=True),
+            users=users,
+            contacts_per_user=contacts,
+            batch_size=batch_size,
+            smtp_pool_size=pool_size,
+            smtp_delay_s=smtp_delay,
+            seed_seconds=round(seed_seconds, 3),
+        ),
+        "result": {
+            "elapsed_s": round(elapsed, 3),
+            "users_per_s": round(users / elapsed, 1),
+            "mails_sent": checkpoint.sent,
+            "mails_failed": checkpoint.failed,
+            "mails_per_s": round(checkpoint.sent / elapsed, 1),
+            "queries": queries,
+            "query_seconds": round(query_seconds, 3),
+            "smtp_connections": connections,
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--contacts", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--smtp-delay", type=float, default=0.0)
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = args.db_url or f"sqlite+aiosqlite:///{Path(tmp) / 'digest.db'}"
+        report = asyncio.run(
+            run(
+                db_url,
+                args.users,
+                args.contacts,
+                args.batch_size,
+                args.pool_size,
+                args.smtp_delay,
+            )
+        )
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
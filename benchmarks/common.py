@@ -0,0 +1,183 @@
+import json
+import math
+import subprocess
+from datetime import date, datetime, UTC
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.database.models import Base, Contact, ContactCounter, User
+from src.services.normalization import normalize_email, normalize_phone
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """
+    Return the ``pct`` percentile of ``samples`` using linear interpolation.
+
+    Args:
+        samples: Measured values, in any order.
+        pct: Percentile in the range 0-100.
+
+    Returns:
+        The interpolated percentile, or 0.0 for an empty sample.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class LatencyRecorder:
+    """
+    Collects per-request latencies and errors for a single benchmark phase.
+    """
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.started = 0.0
+        self.finished = 0.0
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        self.latencies.append(seconds)
+        if not ok:
+            self.errors += 1
+
+    def summary(self) -> dict:
+        elapsed = max(self.finished - self.started, 1e-9)
+        in_ms = [value * 1000 for value in self.latencies]
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 4),
+            "rps": round(len(self.latencies) / elapsed, 2),
+            "p50_ms": round(percentile(in_ms, 50), 3),
+            "p95_ms": round(percentile(in_ms, 95), 3),
+            "p99_ms": round(percentile(in_ms, 99), 3),
+            "max_ms": round(max(in_ms, default=0.0), 3),
+        }
+
+
+def git_revision() -> str | None:
+    """Return the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent.parent,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report_meta(**params) -> dict:
+    return {
+        "revision": git_revision(),
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "params": params,
+    }
+
+
+def write_report(report: dict, output: str | None) -> None:
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        Path(output).write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+
+def create_engine(db_url: str):
+    """
+    Create an async engine for a benchmark run.
+
+    SQLite databases get a busy timeout so concurrent writers wait instead of
+    failing.
+    """
+    if db_url.startswith("sqlite"):
+        return create_async_engine(db_url, connect_args={"timeout": 30})
+    return create_async_engine(db_url, pool_size=20, max_overflow=20)
+
+
+async def reset_schema(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed(
+    session_maker: async_sessionmaker,
+    users: int,
+    contacts_per_user: int,
+    hashed_password: str,
+    batch_size: int = 1000,
+) -> list[str]:
+    """
+    Insert ``users`` confirmed users with ``contacts_per_user`` contacts each,
+    with the counter rows and change feed positions ``ContactRepository``
+    keeps.
+
+    Args:
+        session_maker: Session factory bound to the benchmark database.
+        users: Number of users to create.
+        contacts_per_user: Number of contacts owned by each user.
+        hashed_password: Pre-computed password hash shared by all users.
+        batch_size: Number of rows flushed per commit.
+
+    Returns:
+        The usernames of the seeded users.
+    """
+    usernames = [f"bench_user_{i}" for i in range(users)]
+    today = date.today()
+    async with session_maker() as session:
+        pending = 0
+        for i, username in enumerate(usernames):
+            user = User(
+                username=username,
+                email=f"{username}@example.com",
+                hashed_password=hashed_password,
+                avatar="https://www.gravatar.com/avatar/bench",
+                confirmed=True,
+            )
+            session.add(user)
+            # For the id of the counter row.
+            await session.flush()
+            for j in range(contacts_per_user):
+                # Spread birthdays over the year so the 7-day window matches
+                # roughly 2% of contacts, like a real address book.
+                birthday = date(1990, (today.month + j) % 12 + 1, j % 28 + 1)
+                email = f"c{i}_{j}@example.com"
+                phone = f"+380{i:05d}{j:05d}"[:20]
+                session.add(
+                    Contact(
+                        first_name=f"First{j}",
+                        last_name=f"Last{i}",
+                        email=email,
+                        phone=phone,
+                        email_normalized=normalize_email(email),
+                        phone_normalized=normalize_phone(phone, "380"),
+                        birthday=birthday,
+                        user=user,
+                        change_seq=j + 1,
+                    )
+                )
+                pending += 1
+            # As ContactRepository keeps them, so that totals and the change
+            # feed look like those of a real address book.
+            session.add(
+                ContactCounter(
+                    user_id=user.id,
+                    last_change_seq=contacts_per_user,
+                    contact_count=contacts_per_user,
+                )
+            )
+            pending += 2
+            if pending >= batch_size:
+                await session.commit()
+                pending = 0
+        await session.commit()
+    return usernames
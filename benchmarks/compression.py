@@ -0,0 +1,159 @@
+"""
+Benchmark of response compression and conditional GETs.
+
+Sends a page of ``--page`` contacts and an NDJSON export of ``--export``
+contacts through ``CompressionMiddleware`` with each encoding available
+here, and a repeated page request through ``ConditionalGetMiddleware``::
+
+    python -m benchmarks.compression --page 100 --export 10000 --output gz.json
+
+For each response the report gives the bytes on the wire, the ratio to the
+identity body and the CPU time the middleware adds per response. Brotli and
+zstd are measured only when the ``brotli`` and ``zstandard`` packages are
+installed.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import UTC, date, datetime, timedelta
+
+from pydantic import TypeAdapter
+
+from benchmarks.common import report_meta, write_report
+from benchmarks.dedup import FIRST_NAMES, LAST_NAMES
+from src.middleware import (
+    CompressionMiddleware,
+    ConditionalGetMiddleware,
+    available_encodings,
+)
+from src.schemas import ContactResponse
+
+contacts_json = TypeAdapter(list[ContactResponse])
+contact_json = TypeAdapter(ContactResponse)
+
+
+def generate(count: int, seed: int = 42) -> list[ContactResponse]:
+    rng = random.Random(seed)
+    created = datetime(2024, 1, 1, tzinfo=UTC)
+    return [
+        ContactResponse(
+            id=i,
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            email=f"contact{i}@example.com",
+            phone=f"+38067{rng.randrange(10**7):07d}",
+            birthday=date(1950, 1, 1) + timedelta(days=rng.randrange(20000)),
+            created_at=created + timedelta(minutes=i),
+            updated_at=None,
+        )
+        for i in range(count)
+    ]
+
+
+def app_sending(chunks: list[bytes], content_type: str):
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", content_type.encode())],
+            }
+        )
+        for i, chunk in enumerate(chunks):
+            more_body = i < len(chunks) - 1
+            await send(
+                {"type": "http.response.body", "body": chunk, "more_body": more_body}
+            )
+
+    return app
+
+
+async def call(app, headers: list[tuple[bytes, bytes]]) -> tuple[int, int]:
+    """Status and body bytes of one GET through ``app``."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    await app(scope, receive, send)
+    return sent[0]["status"], sum(len(m.get("body", b"")) for m in sent[1:])
+
+
+async def measure(app, headers: list, repeat: int) -> dict:
+    status, size = await call(app, headers)
+    start = time.process_time()
+    for _ in range(repeat):
+        await call(app, headers)
+    cpu = (time.process_time() - start) / repeat
+    return {"status": status, "bytes": size, "cpu_us": round(cpu * 1e6, 1)}
+
+
+async def compression(chunks: list[bytes], repeat: int) -> dict:
+    body = app_sending(
+        chunks, "application/x-ndjson" if len(chunks) > 1 else "application/json"
+    )
+    identity = await measure(body, [], repeat)
+    results = {"identity": identity}
+    for encoding in available_encodings():
+        app = CompressionMiddleware(body, encodings=[encoding])
+        result = await measure(app, [(b"accept-encoding", encoding.encode())], repeat)
+        result["ratio"] = round(result["bytes"] / identity["bytes"], 3)
+        result["cpu_us"] = round(result["cpu_us"] - identity["cpu_us"], 1)
+        results[encoding] = result
+    return results
+
+
+async def conditional(page: bytes, repeat: int) -> dict:
+    app = ConditionalGetMiddleware(app_sending([page], "application/json"))
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    await app({"type": "http", "method": "GET", "headers": []}, receive, send)
+    etag = dict(sent[0]["headers"])[b"etag"]
+    return {
+        "first": await measure(app, [], repeat),
+        "not_modified": await measure(app, [(b"if-none-match", etag)], repeat),
+    }
+
+
+async def run(page: int, export: int, repeat: int) -> dict:
+    contacts = generate(max(page, export))
+    page_body = contacts_json.dump_json(contacts[:page])
+    # Streamed like the export endpoints: one record per chunk.
+    export_chunks = [contact_json.dump_json(c) + b"\n" for c in contacts[:export]]
+    return {
+        "meta": report_meta(
+            page=page,
+            export=export,
+            repeat=repeat,
+            encodings=available_encodings(),
+        ),
+        "page": await compression([page_body], repeat),
+        "export": await compression(export_chunks, max(repeat // 100, 1)),
+        "conditional_get": await conditional(page_body, repeat),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--export", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+    write_report(asyncio.run(run(args.page, args.export, args.repeat)), args.output)
+
+
+if __name__ == "__main__":
+    main()
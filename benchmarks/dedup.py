@@ -0,0 +1,119 @@
+"""
+Benchmark of duplicate detection on one large address book.
+
+Generates ``--contacts`` contacts from pools of common names, plus
+``--duplicates`` edited copies of random ones (a typo in the first name, the
+email in upper case, the phone number in national format), and reports how
+long ``DuplicateFinder`` takes and how many of the copies it found::
+
+    python -m benchmarks.dedup --contacts 100000 --duplicates 1000
+
+Only the in-memory work is timed; loading the rows is a single indexed
+query on ``user_id``.
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import report_meta, write_report
+from src.services.dedup import ContactRow, DuplicateFinder
+
+FIRST_NAMES = [
+    "Olena", "Oleksandr", "Iryna", "Andrii", "Natalia", "Serhii", "Maria",
+    "Dmytro", "Yulia", "Mykola", "Anna", "Ivan", "Tetiana", "Petro", "Oksana",
+    "John", "Mary", "James", "Linda", "Robert", "Susan", "David", "Karen",
+]  # fmt: skip
+LAST_NAMES = [
+    "Melnyk", "Shevchenko", "Boiko", "Kovalenko", "Bondarenko", "Tkachenko",
+    "Kravchenko", "Koval", "Oliinyk", "Shevchuk", "Polishchuk", "Lysenko",
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Miller", "Davis",
+]  # fmt: skip
+
+
+def generate(contacts: int, duplicates: int, seed: int = 42):
+    """
+    Returns:
+        The rows, and the (original, copy) id pairs that should be found.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(contacts):
+        # A numeric suffix keeps most full names distinct, like a real book
+        # where only a few names repeat exactly.
+        last = f"{rng.choice(LAST_NAMES)}{rng.choice(['', 'o', 'a', 'uk'])}"
+        rows.append(
+            ContactRow(
+                i,
+                rng.choice(FIRST_NAMES),
+                f"{last}-{rng.randrange(1000)}",
+                f"contact{i}@example.com",
+                f"+38067{i:07d}",
+                date(1950, 1, 1) + timedelta(days=rng.randrange(20000)),
+            )
+        )
+    expected = []
+    for copy_id in range(contacts, contacts + duplicates):
+        original = rows[rng.randrange(contacts)]
+        first = original.first_name
+        cut = rng.randrange(1, len(first))
+        rows.append(
+            original._replace(
+                id=copy_id,
+                first_name=first[:cut] + first[cut + 1 :],
+                email=original.email.upper(),
+                phone="0" + original.phone[4:],
+            )
+        )
+        expected.append((original.id, copy_id))
+    rng.shuffle(rows)
+    return rows, expected
+
+
+def run(contacts: int, duplicates: int, threshold: float, window: int) -> dict:
+    rows, expected = generate(contacts, duplicates)
+    finder = DuplicateFinder("380", threshold=threshold, window=window)
+
+    start = time.perf_counter()
+    groups = finder.find(rows)
+    elapsed = time.perf_counter() - start
+
+    group_of = {i: n for n, group in enumerate(groups) for i in group.ids}
+    found = sum(
+        1
+        for original, copy in expected
+        if original in group_of and group_of[original] == group_of.get(copy)
+    )
+    return {
+        "meta": report_meta(
+            contacts=contacts,
+            duplicates=duplicates,
+            threshold=threshold,
+            window=window,
+        ),
+        "result": {
+            "elapsed_s": round(elapsed, 3),
+            "contacts_per_s": round(len(rows) / elapsed, 1),
+            "groups": len(groups),
+            "recall": round(found / duplicates, 3) if duplicates else None,
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--contacts", type=int, default=100_000)
+    parser.add_argument("--duplicates", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--window", type=int, default=8)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+    write_report(
+        run(args.contacts, args.duplicates, args.threshold, args.window),
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
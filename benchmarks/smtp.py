@@ -0,0 +1,76 @@
+import asyncio
+
+
+class SMTPStandIn:
+    """
+    Minimal local SMTP server that accepts every message and keeps it in
+    memory, optionally taking ``delay`` seconds per message like a real
+    relay would.
+    """
+
+    def __init__(self, delay: float = 0.0, keep_messages: bool = True):
+        self.delay = delay
+        self.keep_messages = keep_messages
+        self.messages: list[tuple[str, list[str], bytes]] = []
+        self.received = 0
+        self.connections = 0
+        self._server: asyncio.Server | None = None
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> "SMTPStandIn":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self) -> "SMTPStandIn":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 localhost ESMTP stand-in\r\n")
+        sender, recipients = "", []
+        try:
+            while line := await reader.readline():
+                verb = line[:4].upper()
+                if verb in (b"EHLO", b"HELO"):
+                    writer.write(b"250-localhost\r\n250 8BITMIME\r\n")
+                elif verb == b"MAIL":
+                    sender, recipients = line[10:].strip().decode(), []
+                    writer.write(b"250 OK\r\n")
+                elif verb == b"RCPT":
+                    recipients.append(line[8:].strip().decode())
+                    writer.write(b"250 OK\r\n")
+                elif verb == b"DATA":
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    await writer.drain()
+                    data = []
+                    while (chunk := await reader.readline()) not in (b".\r\n", b""):
+                        data.append(chunk)
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    self.received += 1
+                    if self.keep_messages:
+                        self.messages.append((sender, recipients, b"".join(data)))
+                    writer.write(b"250 OK queued\r\n")
+                elif verb == b"QUIT":
+                    writer.write(b"221 Bye\r\n")
+                    await writer.drain()
+                    break
+                elif verb in (b"RSET", b"NOOP"):
+                    writer.write(b"250 OK\r\n")
+                else:
+                    writer.write(b"502 Command not implemented\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
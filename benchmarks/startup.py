@@ -0,0 +1,138 @@
+"""
+Cold-start benchmark for the production launcher.
+
+Starts ``python -m src.server`` ``--runs`` times and measures, from the
+outside, how long it takes until the first HTTP response arrives (cold
+start), how long that first request took, and the median latency of the
+following warm requests::
+
+    python -m benchmarks.startup --runs 5 --workers 1 --output startup.json
+
+The server reads its configuration from the environment, exactly as in
+production; the probed path defaults to ``/api/healthchecker``.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import percentile, report_meta, write_report
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_once(
+    path: str, workers: int, warm_requests: int, timeout: float = 60.0
+) -> dict:
+    """
+    Start one server process and time its first and subsequent requests.
+
+    Args:
+        path: URL path requested from the server.
+        workers: Number of worker processes to start.
+        warm_requests: Requests sent after the first one.
+        timeout: Seconds to wait for the server to answer at all.
+
+    Returns:
+        Cold-start, first-request and warm latencies in milliseconds.
+    """
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "src.server",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+        ],
+        cwd=ROOT,
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"server exited with code {process.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError("server did not answer in time")
+                request_start = time.perf_counter()
+                try:
+                    first = client.get(url)
+                except httpx.TransportError:
+                    time.sleep(0.01)
+                    continue
+                ready = time.perf_counter()
+                break
+
+            warm = []
+            for _ in range(warm_requests):
+                request_start_warm = time.perf_counter()
+                client.get(url)
+                warm.append((time.perf_counter() - request_start_warm) * 1000)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    return {
+        "cold_start_ms": round((ready - started) * 1000, 2),
+        "first_request_ms": round((ready - request_start) * 1000, 2),
+        "first_status": first.status_code,
+        "warm_p50_ms": round(percentile(warm, 50), 3),
+        "warm_p99_ms": round(percentile(warm, 99), 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--warm-requests", type=int, default=50)
+    parser.add_argument("--path", default="/api/healthchecker")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    runs = [
+        measure_once(args.path, args.workers, args.warm_requests)
+        for _ in range(args.runs)
+    ]
+    summary = {
+        key: round(percentile([run[key] for run in runs], 50), 3)
+        for key in ("cold_start_ms", "first_request_ms", "warm_p50_ms")
+    }
+    write_report(
+        {
+            "meta": report_meta(
+                runs=args.runs,
+                workers=args.workers,
+                warm_requests=args.warm_requests,
+                path=args.path,
+            ),
+            "median": summary,
+            "runs": runs,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Micro-benchmark of the prebuilt repository statements.
+
+Times each hot repository read built per call, as the repositories used to,
+against the statement built once at import with bound parameters::
+
+    python -m benchmarks.statements --calls 5000 --output statements.json
+
+For each query the report gives:
+
+- ``build_us``: building the statement and its compiled-cache key, per call;
+- ``compile_us``: compiling it for PostgreSQL, which the compiled cache
+  saves on every call after the first;
+- ``per_call_ms``/``p50_ms``: end-to-end latency of the repository call
+  against SQLite (``--db-url`` for another database).
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import Select, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.sql.expression import or_
+
+from benchmarks.common import (
+    LatencyRecorder,
+    create_engine,
+    report_meta,
+    reset_schema,
+    seed,
+    write_report,
+)
+from src.database.models import Contact, User
+from src.repository import contacts, users
+
+QUERIES = ("contacts_page", "contact_by_id", "user_by_username")
+PG_DIALECT = postgresql.asyncpg.dialect()
+
+
+def per_call(query: str, user_id: int, username: str) -> Select:
+    """The statement as the repositories built it on every call."""
+    if query == "contacts_page":
+        return (
+            select(Contact)
+            .where(Contact.user_id == user_id)
+            .where(or_(Contact.first_name.contains(""), Contact.last_name.contains("")))
+            .where(Contact.email.contains(""))
+            .offset(0)
+            .limit(50)
+        )
+    if query == "contact_by_id":
+        return select(Contact).where(Contact.id == 1, Contact.user_id == user_id)
+    return select(User).filter_by(username=username)
+
+
+PREBUILT = {
+    "contacts_page": contacts._CONTACTS_PAGE,
+    "contact_by_id": contacts._CONTACT_BY_ID,
+    "user_by_username": users._USER_BY_USERNAME,
+}
+
+
+def time_us(calls: int, fn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return round((time.perf_counter() - start) / calls * 1e6, 2)
+
+
+def build_and_compile(query: str, calls: int) -> dict:
+    prebuilt = PREBUILT[query]
+    return {
+        "build_us": {
+            "per_call": time_us(
+                calls,
+                lambda: per_call(query, 1, "bench_user_0")._generate_cache_key(),
+            ),
+            "prebuilt": time_us(calls, prebuilt._generate_cache_key),
+        },
+        "compile_us": time_us(
+            max(calls // 10, 1), lambda: prebuilt.compile(dialect=PG_DIALECT)
+        ),
+    }
+
+
+async def latency(session_maker, query: str, calls: int, prebuilt: bool) -> dict:
+    user = User(id=1, username="bench_user_0")
+    recorder = LatencyRecorder()
+    async with session_maker() as session:
+        contact_repo = contacts.ContactRepository(session)
+        user_repo = users.UserRepository(session)
+        if prebuilt:
+            call = {
+                "contacts_page": lambda: contact_repo.get_contacts("", "", 0, 50, user),
+                "contact_by_id": lambda: contact_repo.get_contact_by_id(1, user),
+                "user_by_username": lambda: user_repo.get_user_by_username(
+                    user.username
+                ),
+            }[query]
+        else:
+
+            async def call():
+                result = await session.execute(per_call(query, user.id, user.username))
+                return result.scalars().all()
+
+        await call()  # Fill the compiled cache.
+        recorder.started = time.perf_counter()
+        for _ in range(calls):
+            start = time.perf_counter()
+            await call()
+            recorder.record(time.perf_counter() - start)
+        recorder.finished = time.perf_counter()
+    summary = recorder.summary()
+    return {
+        "per_call_ms": round(summary["elapsed_s"] / calls * 1000, 4),
+        "p50_ms": summary["p50_ms"],
+    }
+
+
+async def run(db_url: str, calls: int, contacts_per_user: int) -> dict:
+    engine = create_engine(db_url)
+    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
+    await reset_schema(engine)
+    await seed(session_maker, 1, contacts_per_user, "bench")
+
+    results = {}
+    try:
+        for query in QUERIES:
+            results[query] = build_and_compile(query, calls)
+            results[query]["latency"] = {
+                "per_call": await latency(session_maker, query, calls, False),
+                "prebuilt": await latency(session_maker, query, calls, True),
+            }
+    finally:
+        await engine.dispose()
+    return {
+        "meta": report_meta(
+            db_url=engine.url.render_as_string(hide_password=True),
+            calls=calls,
+            contacts=contacts_per_user,
+        ),
+        "queries": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--contacts", type=int, default=100)
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = args.db_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        report = asyncio.run(run(db_url, args.calls, args.contacts))
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,31 @@ from starlette.responses import JSONResponse
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.api import contacts, utils, auth, users
+from src.api import contacts, utils, auth, users, admin
+from src.middleware import (
+    CompressionMiddleware,
+    ConditionalGetMiddleware,
+    FirstRequestTimer,
+)
+from src.services.lifecycle import lifespan
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = ["<http://localhost:3000>"]
 
+# Tags the uncompressed body, so each resource has one ETag whatever the
+# encoding the client asked for.
+app.add_middleware(ConditionalGetMiddleware)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "ETag"],
 )
+app.add_middleware(FirstRequestTimer)
 
 
 @app.exception_handler(RateLimitExceeded)
@@ -31,6 +43,7 @@ app.include_router(utils.router, prefix="/api")
 app.include_router(contacts.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 if __name__ == "__main__":
     import uvicorn
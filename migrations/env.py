@@ -7,6 +7,7 @@ from sqlalchemy import pool
 
 from alembic import context
 
+from src.database.migrate import check_runner, migration_lock
 from src.database.models import Base
 from src.conf.config import settings
 
@@ -57,9 +58,16 @@ def run_migrations_offline() -> None:
 
 
 def run_migrations(connection: Connection):
-    context.configure(connection=connection, target_metadata=target_metadata)
-    with context.begin_transaction():
-        context.run_migrations()
+    # A transaction per migration, since those using online_ddl commit
+    # part-way through anyway.
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+    )
+    with migration_lock(connection):
+        with context.begin_transaction():
+            context.run_migrations()
 
 
 async def run_async_migrations():
@@ -82,6 +90,7 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    check_runner(config, context.get_x_argument(as_dictionary=True))
     asyncio.run(run_async_migrations())
 
 
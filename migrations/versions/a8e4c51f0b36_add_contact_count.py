@@ -0,0 +1,36 @@
+"""add contact count
+
+Revision ID: a8e4c51f0b36
+Revises: f2b86d1c4a73
+Create Date: 2026-10-19 16:24:11.530872
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a8e4c51f0b36"
+down_revision: Union[str, None] = "f2b86d1c4a73"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "contact_counters",
+        sa.Column("contact_count", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.alter_column("contact_counters", "contact_count", server_default=None)
+    # Every owner has a counter row since the change feed migration.
+    op.execute(
+        "UPDATE contact_counters SET contact_count = "
+        "(SELECT count(*) FROM contacts "
+        "WHERE contacts.user_id = contact_counters.user_id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("contact_counters", "contact_count")
@@ -0,0 +1,28 @@
+"""add user contacts shard
+
+Revision ID: b3d1e0a4c5f2
+Revises: a742f6936d7d
+Create Date: 2026-10-19 10:12:40.318205
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b3d1e0a4c5f2"
+down_revision: Union[str, None] = "a742f6936d7d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users", sa.Column("contacts_shard", sa.String(length=50), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "contacts_shard")
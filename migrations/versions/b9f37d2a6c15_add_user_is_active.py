@@ -0,0 +1,38 @@
+"""add user is_active
+
+Revision ID: b9f37d2a6c15
+Revises: a8e4c51f0b36
+Create Date: 2026-10-19 17:02:48.193655
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.database.online_ddl import create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = "b9f37d2a6c15"
+down_revision: Union[str, None] = "a8e4c51f0b36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("is_active", sa.Boolean(), nullable=False, server_default=sa.true()),
+    )
+    op.alter_column("users", "is_active", server_default=None)
+    create_index_online("ix_users_created_at", "users", ["created_at"])
+    create_index_online("ix_users_confirmed", "users", ["confirmed"])
+    create_index_online("ix_users_role", "users", ["role"])
+
+
+def downgrade() -> None:
+    drop_index_online("ix_users_role", "users")
+    drop_index_online("ix_users_confirmed", "users")
+    drop_index_online("ix_users_created_at", "users")
+    op.drop_column("users", "is_active")
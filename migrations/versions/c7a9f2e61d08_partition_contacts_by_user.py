@@ -0,0 +1,73 @@
+"""partition contacts by user
+
+Revision ID: c7a9f2e61d08
+Revises: b3d1e0a4c5f2
+Create Date: 2026-10-19 11:02:17.540913
+
+Turns ``contacts`` into a table hash-partitioned on ``user_id`` (PostgreSQL
+only). The number of partitions is taken from ``-x contacts_partitions=N``
+and defaults to 16; ``0`` keeps the table unpartitioned. Either way
+``user_id`` becomes NOT NULL.
+
+A partitioned table can only enforce unique emails and phone numbers per
+owner, because PostgreSQL requires the partition key in every unique
+constraint. The unpartitioned table keeps them unique across all users.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from src.database.partitioning import (
+    DEFAULT_PARTITIONS,
+    partition_contacts_statements,
+    unpartition_contacts_statements,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "c7a9f2e61d08"
+down_revision: Union[str, None] = "b3d1e0a4c5f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_partitioned() -> bool:
+    return bool(
+        op.get_bind().scalar(
+            sa.text("SELECT relkind = 'p' FROM pg_class WHERE relname = 'contacts'")
+        )
+    )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    partitions = int(
+        context.get_x_argument(as_dictionary=True).get(
+            "contacts_partitions", DEFAULT_PARTITIONS
+        )
+    )
+    if partitions:
+        for statement in partition_contacts_statements(partitions):
+            op.execute(statement)
+        return
+
+    op.alter_column("contacts", "user_id", nullable=False)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    if _is_partitioned():
+        for statement in unpartition_contacts_statements():
+            op.execute(statement)
+        op.drop_constraint("contacts_pkey", "contacts", type_="primary")
+        op.create_primary_key("contacts_pkey", "contacts", ["id"])
+        op.drop_constraint("contacts_user_id_email_key", "contacts", type_="unique")
+        op.drop_constraint("contacts_user_id_phone_key", "contacts", type_="unique")
+        op.create_unique_constraint("contacts_email_key", "contacts", ["email"])
+        op.create_unique_constraint("contacts_phone_key", "contacts", ["phone"])
+
+    op.alter_column("contacts", "user_id", nullable=True)
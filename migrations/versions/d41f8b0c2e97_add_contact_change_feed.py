@@ -0,0 +1,71 @@
+"""add contact change feed
+
+Revision ID: d41f8b0c2e97
+Revises: c7a9f2e61d08
+Create Date: 2026-10-19 12:20:05.713442
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.database.online_ddl import create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = "d41f8b0c2e97"
+down_revision: Union[str, None] = "c7a9f2e61d08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing contacts become the first change of their owner's feed. A
+    # constant default does not rewrite the table (PostgreSQL 11+).
+    op.add_column(
+        "contacts",
+        sa.Column("change_seq", sa.BigInteger(), nullable=False, server_default="1"),
+    )
+    op.alter_column("contacts", "change_seq", server_default=None)
+    # The new tables are indexed as they are created, before anything
+    # writes to them.
+    op.create_table(
+        "contact_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("contact_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("change_seq", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_contact_tombstones_user_id_change_seq",
+        "contact_tombstones",
+        ["user_id", "change_seq"],
+    )
+    op.create_table(
+        "contact_counters",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("last_change_seq", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.execute(
+        "INSERT INTO contact_counters (user_id, last_change_seq) "
+        "SELECT DISTINCT user_id, 1 FROM contacts"
+    )
+    create_index_online(
+        "ix_contacts_user_id_change_seq", "contacts", ["user_id", "change_seq"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("contact_counters")
+    op.drop_index(
+        "ix_contact_tombstones_user_id_change_seq", table_name="contact_tombstones"
+    )
+    op.drop_table("contact_tombstones")
+    drop_index_online("ix_contacts_user_id_change_seq", "contacts")
+    op.drop_column("contacts", "change_seq")
@@ -0,0 +1,49 @@
+"""add birthday digest
+
+Revision ID: e5c3a7d9b214
+Revises: d41f8b0c2e97
+Create Date: 2026-10-19 13:41:52.208117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.database.online_ddl import create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = "e5c3a7d9b214"
+down_revision: Union[str, None] = "d41f8b0c2e97"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "birthday_digest_runs",
+        sa.Column("run_date", sa.Date(), nullable=False),
+        sa.Column("last_user_id", sa.Integer(), nullable=False),
+        sa.Column("sent", sa.Integer(), nullable=False),
+        sa.Column("failed", sa.Integer(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("run_date"),
+    )
+    # Must match src.database.models.birthday_key for the planner to use it.
+    create_index_online(
+        "ix_contacts_user_id_birthday_key",
+        "contacts",
+        [
+            "user_id",
+            sa.text(
+                "(EXTRACT(month FROM birthday) * 100 + EXTRACT(day FROM birthday))"
+            ),
+        ],
+    )
+
+
+def downgrade() -> None:
+    drop_index_online("ix_contacts_user_id_birthday_key", "contacts")
+    op.drop_table("birthday_digest_runs")
@@ -0,0 +1,125 @@
+"""add contact normalized columns
+
+Revision ID: f2b86d1c4a73
+Revises: e5c3a7d9b214
+Create Date: 2026-10-19 15:02:37.164093
+
+"""
+
+import re
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from src.database.online_ddl import backfill, create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b86d1c4a73"
+down_revision: Union[str, None] = "e5c3a7d9b214"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+# For national numbers; override with -x contacts_phone_country_code=<code>.
+PHONE_COUNTRY_CODE = "380"
+
+# The normalization rules as of this revision, copied from
+# src.services.normalization so that later changes there do not change
+# what this migration writes.
+_NON_DIGITS = re.compile(r"\D")
+_DOTLESS_DOMAINS = {"gmail.com", "googlemail.com"}
+_PLUS_TAG_DOMAINS = {
+    "gmail.com",
+    "googlemail.com",
+    "outlook.com",
+    "hotmail.com",
+    "live.com",
+    "icloud.com",
+    "me.com",
+    "mac.com",
+    "proton.me",
+    "protonmail.com",
+    "fastmail.com",
+}
+
+
+def normalize_phone(phone: str, country_code: str) -> str | None:
+    phone = phone.strip()
+    digits = _NON_DIGITS.sub("", phone)
+    if phone.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith(country_code) and len(digits) > 10:
+        pass
+    else:
+        digits = country_code + digits.removeprefix("0")
+    if not 8 <= len(digits) <= 15:
+        return None
+    return "+" + digits
+
+
+def normalize_email(email: str) -> str:
+    local, _, domain = email.strip().lower().rpartition("@")
+    if not local:
+        return domain
+    if domain in _PLUS_TAG_DOMAINS:
+        local = local.split("+", 1)[0]
+    if domain in _DOTLESS_DOMAINS:
+        local = local.replace(".", "")
+        domain = "gmail.com"
+    return f"{local}@{domain}"
+
+
+def upgrade() -> None:
+    op.add_column(
+        "contacts", sa.Column("email_normalized", sa.String(length=100), nullable=True)
+    )
+    op.add_column(
+        "contacts", sa.Column("phone_normalized", sa.String(length=16), nullable=True)
+    )
+
+    # The normalization rules live in Python, so existing rows are filled in
+    # from here, in batches that commit one by one. normalize_email never
+    # returns None, so a re-run skips the rows already filled in.
+    contacts = sa.table(
+        "contacts",
+        sa.column("id", sa.Integer),
+        sa.column("user_id", sa.Integer),
+        sa.column("email", sa.String),
+        sa.column("phone", sa.String),
+        sa.column("email_normalized", sa.String),
+        sa.column("phone_normalized", sa.String),
+    )
+    country_code = context.get_x_argument(as_dictionary=True).get(
+        "contacts_phone_country_code", PHONE_COUNTRY_CODE
+    )
+    backfill(
+        contacts,
+        lambda row: {
+            "email_normalized": normalize_email(row.email),
+            "phone_normalized": normalize_phone(row.phone, country_code),
+        },
+        where=contacts.c.email_normalized.is_(None),
+        key=("id", "user_id"),
+        batch_size=BATCH_SIZE,
+    )
+
+    create_index_online(
+        "ix_contacts_user_id_email_normalized",
+        "contacts",
+        ["user_id", "email_normalized"],
+    )
+    create_index_online(
+        "ix_contacts_user_id_phone_normalized",
+        "contacts",
+        ["user_id", "phone_normalized"],
+    )
+
+
+def downgrade() -> None:
+    drop_index_online("ix_contacts_user_id_phone_normalized", "contacts")
+    drop_index_online("ix_contacts_user_id_email_normalized", "contacts")
+    op.drop_column("contacts", "phone_normalized")
+    op.drop_column("contacts", "email_normalized")
@@ -0,0 +1,117 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import get_db, get_read_db
+from src.database.models import User, UserRole
+from src.schemas import AdminUser, ContactPage, UserPage
+from src.services.admin import AdminService, export_contacts, export_users
+from src.services.auth import get_current_admin_user
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+NDJSON = "application/x-ndjson"
+
+
+def user_filters(
+    role: UserRole | None = None,
+    confirmed: bool | None = None,
+    active: bool | None = None,
+    search: str = Query("", max_length=100),
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+) -> dict:
+    return {
+        "role": role,
+        "confirmed": confirmed,
+        "active": active,
+        "search": search,
+        "created_after": created_after,
+        "created_before": created_before,
+    }
+
+
+async def get_target_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    admin: User = Depends(get_current_admin_user),
+) -> User:
+    user = await AdminService(db).get_user(user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Користувача не знайдено"
+        )
+    return user
+
+
+@router.get("/users", response_model=UserPage)
+async def list_users(
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    contacts: int = Query(0, ge=0, le=100),
+    filters: dict = Depends(user_filters),
+    db: AsyncSession = Depends(get_read_db),
+    admin: User = Depends(get_current_admin_user),
+):
+    """
+    Page through users in id order, optionally filtered; pass the returned
+    ``next_after_id`` as ``after_id`` for the next page. With ``contacts``,
+    each user comes with up to that many of their first contacts.
+    """
+    return await AdminService(db).list_users(after_id, limit, contacts, **filters)
+
+
+@router.get("/users/export", response_class=StreamingResponse)
+async def export_users_ndjson(
+    filters: dict = Depends(user_filters),
+    admin: User = Depends(get_current_admin_user),
+):
+    """Stream every matching user as newline-delimited JSON."""
+    return StreamingResponse(export_users(**filters), media_type=NDJSON)
+
+
+@router.post("/users/{user_id}/deactivate", response_model=AdminUser)
+async def deactivate_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_current_admin_user),
+):
+    if user_id == admin.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Не можна деактивувати власний обліковий запис",
+        )
+    from redis.exceptions import RedisError
+
+    try:
+        user = await AdminService(db).deactivate_user(user_id)
+    except RedisError:
+        # Until its cached copy expires the user could still sign in with
+        # existing tokens, so the admin has to retry.
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Користувача деактивовано, але кеш недоступний. Повторіть запит",
+        )
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Користувача не знайдено"
+        )
+    return user
+
+
+@router.get("/users/{user_id}/contacts", response_model=ContactPage)
+async def list_user_contacts(
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    user: User = Depends(get_target_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await AdminService(db).list_contacts(user, after_id, limit)
+
+
+@router.get("/users/{user_id}/contacts/export", response_class=StreamingResponse)
+async def export_user_contacts(user: User = Depends(get_target_user)):
+    """Stream every contact of the user as newline-delimited JSON."""
+    return StreamingResponse(export_contacts(user), media_type=NDJSON)
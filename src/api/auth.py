@@ -6,6 +6,7 @@ from fastapi import (
     BackgroundTasks,
     Request,
 )
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 from src.schemas import (
@@ -42,21 +43,27 @@ async def register_user(
 ):
     user_service = UserService(db)
 
-    email_user = await user_service.get_user_by_email(user_data.email)
-    if email_user:
+    conflict = await user_service.find_conflict(user_data.email, user_data.username)
+    if conflict == "email":
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Користувач з таким email вже існує",
         )
-
-    username_user = await user_service.get_user_by_username(user_data.username)
-    if username_user:
+    if conflict == "username":
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Користувач з таким іменем вже існує",
         )
     user_data.password = Hash().get_password_hash(user_data.password)
-    new_user = await user_service.create_user(user_data)
+    try:
+        new_user = await user_service.create_user(user_data)
+    except IntegrityError:
+        # Registered concurrently, after the check above.
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Користувач з таким email або іменем вже існує",
+        )
     background_tasks.add_task(
         send_email, new_user.email, new_user.username, request.base_url
     )
@@ -80,6 +87,11 @@ async def login_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Електронна адреса не підтверджена",
         )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Обліковий запис деактивовано",
+        )
     access_token = await create_access_token(data={"sub": user.username})
     refresh_token = await create_refresh_token(data={"sub": user.username})
     user.refresh_token = refresh_token
@@ -1,20 +1,61 @@
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.schemas import ContactModel, ContactResponse
+from src.schemas import (
+    CONTACT_FIELDS,
+    ContactChanges,
+    ContactIds,
+    ContactMerge,
+    ContactModel,
+    ContactPartial,
+    ContactResponse,
+    ContactsById,
+    DuplicateGroup,
+)
 from src.services.auth import get_current_user
-from src.services.contacts import ContactsService
+from src.services.contacts import (
+    ContactsService,
+    get_contacts_db,
+    get_contacts_read_db,
+)
 from src.database.models import User
+from src.services.events import ContactEventBroker, get_event_broker
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+partial_contacts = TypeAdapter(list[ContactPartial])
+
+
+def contact_fields(
+    fields: str | None = Query(
+        None,
+        description="Comma separated fields to return, e.g. first_name,phone; "
+        "all of them by default.",
+    )
+) -> tuple[str, ...] | None:
+    """
+    The ``fields`` parameter as a tuple in ``CONTACT_FIELDS`` order, so that
+    each set of fields maps to one statement.
+    """
+    if not fields:
+        return None
+    names = {name.strip() for name in fields.split(",")} - {""}
+    unknown = names.difference(CONTACT_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return tuple(name for name in CONTACT_FIELDS if name in names) or None
+
 
 @router.get("/birthdays", response_model=List[ContactResponse])
 async def get_birthdays(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_contacts_read_db),
     user: User = Depends(get_current_user),
 ):
     contact_service = ContactsService(db)
@@ -24,38 +65,168 @@ async def get_birthdays(
 
 @router.get("/", response_model=List[ContactResponse])
 async def read_contacts(
+    response: Response,
     name: str = "",
     email: str = "",
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    fields: tuple[str, ...] | None = Depends(contact_fields),
+    db: AsyncSession = Depends(get_contacts_read_db),
     user: User = Depends(get_current_user),
 ):
+    """
+    List the user's contacts. Without filters, ``X-Total-Count`` gives the
+    number of contacts for pagination. With ``fields``, only those columns
+    are read and returned.
+    """
     contact_service = ContactsService(db)
-    contacts = await contact_service.get_contacts(name, email, skip, limit, user)
+    contacts = await contact_service.get_contacts(
+        name, email, skip, limit, user, fields
+    )
+    headers = {}
+    if not name and not email:
+        # Filtered totals would need a COUNT(*) per request.
+        total = await contact_service.count_contacts(user)
+        headers["X-Total-Count"] = str(total)
+    if fields is not None:
+        # Serialized here: the rows would not validate as ContactResponse.
+        body = partial_contacts.dump_json(
+            partial_contacts.validate_python(contacts), exclude_unset=True
+        )
+        return Response(body, media_type="application/json", headers=headers)
+    response.headers.update(headers)
     return contacts
 
 
+@router.post("/mget", response_model=ContactsById)
+async def get_contacts_by_ids(
+    body: ContactIds,
+    db: AsyncSession = Depends(get_contacts_read_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Return up to 500 of the user's contacts by id in one query, in the order
+    of ``ids``. Ids that are not the user's contacts are listed in
+    ``missing``.
+    """
+    contact_service = ContactsService(db)
+    return await contact_service.get_contacts_by_ids(body.ids, user)
+
+
+@router.get("/changes", response_model=ContactChanges)
+async def get_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=1000),
+    db: AsyncSession = Depends(get_contacts_read_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Return the contacts changed since the ``since`` token; pass the returned
+    ``next`` as ``since`` on the following sync.
+    """
+    contact_service = ContactsService(db)
+    return await contact_service.get_changes(user, since, limit)
+
+
+@router.get("/lookup", response_model=List[ContactResponse])
+async def lookup_contacts(
+    phone: str | None = Query(None, min_length=1, max_length=30),
+    email: str | None = Query(None, min_length=1, max_length=100),
+    db: AsyncSession = Depends(get_contacts_read_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Return the contacts with exactly this phone number and/or email, e.g. for
+    caller ID. Formatting is ignored: ``+380 67 123 45 67`` finds a contact
+    saved as ``0671234567``.
+    """
+    if phone is None and email is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass a phone number or an email",
+        )
+    contact_service = ContactsService(db)
+    return await contact_service.lookup_contacts(user, phone, email)
+
+
+@router.get("/duplicates", response_model=List[DuplicateGroup])
+async def get_duplicates(
+    threshold: float = Query(0.8, ge=0.5, le=1.0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_contacts_read_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Return groups of contacts that are likely the same person, best match
+    first. Scores range from 0 to 1; contacts sharing an email or phone
+    number after normalization score at least 0.7.
+    """
+    contact_service = ContactsService(db)
+    return await contact_service.find_duplicates(user, threshold, limit)
+
+
+@router.post("/merge", response_model=ContactResponse)
+async def merge_contacts(
+    body: ContactMerge,
+    db: AsyncSession = Depends(get_contacts_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Merge the duplicates into the primary contact, which takes the given
+    ``fields``, and delete them.
+    """
+    contact_service = ContactsService(db)
+    contact = await contact_service.merge_contacts(body, user)
+    if contact is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
+        )
+    return contact
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_contacts(
+    user: User = Depends(get_current_user),
+    events: ContactEventBroker = Depends(get_event_broker),
+):
+    """
+    Push ``created``, ``updated`` and ``deleted`` events for the user's
+    contacts as server-sent events. Each event id is a change feed token; a
+    ``resync`` event asks the client to catch up through ``/changes``.
+    """
+    return StreamingResponse(
+        events.stream(user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{contact_id}", response_model=ContactResponse)
 async def react_contact(
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
+    fields: tuple[str, ...] | None = Depends(contact_fields),
+    db: AsyncSession = Depends(get_contacts_read_db),
     user: User = Depends(get_current_user),
 ):
     contact_service = ContactsService(db)
-    contact = await contact_service.get_contact(contact_id, user)
+    contact = await contact_service.get_contact(contact_id, user, fields)
 
     if contact is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
         )
+    if fields is not None:
+        return Response(
+            ContactPartial.model_validate(contact).model_dump_json(exclude_unset=True),
+            media_type="application/json",
+        )
     return contact
 
 
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
 async def create_contact(
     body: ContactModel,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_contacts_db),
     user: User = Depends(get_current_user),
 ):
     contact_service = ContactsService(db)
@@ -66,7 +237,7 @@ async def create_contact(
 async def update_contact(
     body: ContactModel,
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_contacts_db),
     user: User = Depends(get_current_user),
 ):
     contact_service = ContactsService(db)
@@ -81,7 +252,7 @@ async def update_contact(
 @router.delete("/{contact_id}", response_model=ContactResponse)
 async def remote_contact(
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_contacts_db),
     user: User = Depends(get_current_user),
 ):
     contact_service = ContactsService(db)
@@ -1,25 +1,70 @@
+import functools
+from functools import lru_cache
+
 from fastapi import APIRouter, Depends, Request, UploadFile, File
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from src.conf.config import settings
+from src.conf.lazy import LazyObject
 from src.database.db import get_db
 from src.schemas import User
 from src.services.auth import get_current_user, get_current_admin_user
-from src.services.upload_file import UploadFileService
+from src.services.upload_file import UploadFileService, get_upload_file_service
 from src.services.users import UserService
 from sqlalchemy.ext.asyncio import AsyncSession
 
+router = APIRouter(prefix="/users", tags=["users"])
 
-from src.conf.config import settings
 
-router = APIRouter(prefix="/users", tags=["users"])
-limiter = Limiter(key_func=get_remote_address)
+@lru_cache
+def get_limiter() -> Limiter:
+    """
+    The rate limiter. With ``RATE_LIMIT_STORAGE`` set to "redis" its
+    counters are kept in the configured Redis deployment, so that limits
+    hold across workers; if Redis fails, it counts in the worker's memory
+    until Redis recovers.
+    """
+    from src.services.redis_clients import rate_limit_storage_uri
+
+    storage_uri = None
+    if settings.RATE_LIMIT_STORAGE == "redis":
+        storage_uri = rate_limit_storage_uri(settings)
+    return Limiter(
+        key_func=get_remote_address,
+        storage_uri=storage_uri,
+        in_memory_fallback_enabled=True,
+    )
+
+
+limiter: Limiter = LazyObject(get_limiter)
+
+
+def rate_limit(limit_value: str):
+    """
+    ``limiter.limit(limit_value)``, applied on the first request rather than
+    at import: a Redis Cluster storage connects as soon as it is created.
+    """
+
+    def decorator(func):
+        limited = None
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            nonlocal limited
+            if limited is None:
+                limited = limiter.limit(limit_value)(func)
+            return await limited(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
 
 @router.get(
     "/me", response_model=User, description="No more than 10 requests per minute"
 )
-@limiter.limit("10/minute")
+@rate_limit("10/minute")
 async def me(request: Request, user: User = Depends(get_current_user)):
     # The `request` is now passed to the function
     return user
@@ -30,12 +75,9 @@ async def update_avatar_user(
     file: UploadFile = File(),
     user: User = Depends(get_current_admin_user),
     db: AsyncSession = Depends(get_db),
+    upload_service: UploadFileService = Depends(get_upload_file_service),
 ):
-    avatar_url = UploadFileService(
-        settings.CLOUDINARY_NAME,
-        settings.CLOUDINARY_API_KEY,
-        settings.CLOUDINARY_API_SECRET,
-    ).upload_file(file, user.username)
+    avatar_url = upload_service.upload_file(file, user.username)
 
     user_service = UserService(db)
     user = await user_service.update_avatar_url(user.email, avatar_url)
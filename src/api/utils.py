@@ -1,10 +1,36 @@
+import hmac
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
+from src.conf.config import settings
 from src.database.db import get_db
+from src.services import metrics
 
 router = APIRouter(tags=["utils"])
+metrics_scheme = HTTPBearer(auto_error=False)
+
+
+def verify_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(metrics_scheme),
+) -> None:
+    """
+    Let through requests bearing ``METRICS_TOKEN``. Without a token
+    configured the metrics are not served at all.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not hmac.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
 
 @router.get("/healthchecker")
@@ -25,3 +51,15 @@ async def healthchecker(db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error connecting to the database",
         )
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(verify_metrics_token)],
+)
+async def get_metrics():
+    """Metrics of this worker process, in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
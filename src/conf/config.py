@@ -1,9 +1,30 @@
+from functools import lru_cache
+from typing import Literal
+
 from pydantic import ConfigDict, EmailStr
 from pydantic_settings import BaseSettings
 
+from src.conf.lazy import LazyObject
+
 
 class Settings(BaseSettings):
     DB_URL: str
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_STRATEGY: Literal["round_robin", "least_connections"] = "round_robin"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # Compiled SQL kept per engine, and prepared statements kept per asyncpg
+    # connection; both should exceed the number of distinct hot statements.
+    DB_QUERY_CACHE_SIZE: int = 1000
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    # "asyncpg" serves the hottest reads (contact list and detail, the user
+    # lookup of authentication) from plain asyncpg pools, bypassing the ORM;
+    # they use the replicas the way ORM reads do. PostgreSQL only; ignored
+    # when contacts are sharded.
+    DB_READ_BACKEND: Literal["orm", "asyncpg"] = "orm"
+    # Shard name -> URL. When set, contacts are stored on these databases.
+    DB_SHARD_URLS: dict[str, str] = {}
+    DB_SHARD_VNODES: int = 64
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_SECONDS: int = 3600
@@ -19,17 +40,78 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = True
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
+    MAIL_POOL_SIZE: int = 5
+
+    BIRTHDAY_DIGEST_DAYS: int = 7
+    BIRTHDAY_DIGEST_BATCH_SIZE: int = 1000
+    BIRTHDAY_DIGEST_HOUR: int = 6  # UTC
 
     CLOUDINARY_NAME: str
     CLOUDINARY_API_KEY: int = 326488457974591
     CLOUDINARY_API_SECRET: str = "secret"
 
+    GRAVATAR_URL: str = "https://www.gravatar.com"
+    GRAVATAR_DEFAULT: str = "identicon"
+    GRAVATAR_CHECK_EXISTS: bool = False
+    GRAVATAR_TIMEOUT: float = 2.0
+    GRAVATAR_MAX_CONNECTIONS: int = 20
+    GRAVATAR_CACHE_TTL: int = 60 * 60 * 24
+
+    # Bloom filter of taken emails and usernames: 2 MiB, ~0.05% false
+    # positives at a million users.
+    REGISTRATION_FILTER_BITS: int = 1 << 24
+    REGISTRATION_FILTER_HASHES: int = 7
+
     REDIS_PORT: int = 6379
     REDIS_HOST: str = "localhost"
+    REDIS_PASSWORD: str | None = None
+    REDIS_MODE: Literal["standalone", "sentinel", "cluster"] = "standalone"
+    # "host:port" entries. Sentinel mode needs the sentinels; cluster mode
+    # falls back to REDIS_HOST:REDIS_PORT as the only startup node.
+    REDIS_SENTINELS: list[str] = []
+    REDIS_SENTINEL_SERVICE: str = "mymaster"
+    REDIS_CLUSTER_NODES: list[str] = []
+    REDIS_MAX_CONNECTIONS: int = 50
+    # Seconds; a slow Redis fails the command instead of stalling requests.
+    REDIS_SOCKET_TIMEOUT: float = 0.5
+    REDIS_CONNECT_TIMEOUT: float = 0.5
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # Retries of a command failing on a connection error or timeout, with
+    # exponential backoff starting at REDIS_RETRY_BACKOFF seconds.
+    REDIS_RETRIES: int = 1
+    REDIS_RETRY_BACKOFF: float = 0.01
+    # After this many consecutive failures, authentication skips Redis for
+    # REDIS_BREAKER_RESET_SECONDS and reads users from the database.
+    REDIS_BREAKER_FAILURES: int = 5
+    REDIS_BREAKER_RESET_SECONDS: float = 30.0
+    # "redis" shares rate limit counters between workers, in the Redis
+    # deployment configured above; "memory" keeps them per worker.
+    RATE_LIMIT_STORAGE: Literal["memory", "redis"] = "memory"
+
+    # Most contacts a user may have, by role; a missing role has no limit.
+    CONTACTS_QUOTAS: dict[str, int] = {"user": 10_000, "admin": 100_000}
+    # Calling code assumed for phone numbers entered without one.
+    CONTACTS_PHONE_COUNTRY_CODE: str = "380"
+
+    # Bearer token scrapers send to GET /api/metrics; unset disables it.
+    METRICS_TOKEN: str | None = None
+
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_QUEUE_SIZE: int = 100
+
+    APP_HOST: str = "0.0.0.0"
+    APP_PORT: int = 8000
+    APP_WORKERS: int = 1
+    APP_GRACEFUL_SHUTDOWN_SECONDS: int = 30
 
     model_config = ConfigDict(
         extra="ignore", env_file=".env", env_file_encoding="utf-8", case_sensitive=True
     )
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings: Settings = LazyObject(get_settings)
@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+class LazyObject:
+    """
+    Proxy for a process-wide singleton that is built on first use.
+
+    Attribute access is forwarded to ``factory()``, which is expected to cache
+    its result (e.g. with ``functools.lru_cache``). Module-level names such as
+    ``settings`` or ``redis_client`` can therefore be imported anywhere
+    without reading the environment, importing client libraries or opening
+    connections at import time. Attributes set on the proxy itself (as
+    ``unittest.mock.patch`` does) shadow those of the wrapped object.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._factory(), name)
+
+    @contextmanager
+    def override(self, obj: Any) -> Iterator[None]:
+        """
+        Forward to ``obj`` instead of the singleton until the block exits,
+        everywhere the proxy was imported, e.g. a fake Redis in a benchmark.
+        """
+        factory = self._factory
+        self._factory = lambda: obj
+        try:
+            yield
+        finally:
+            self._factory = factory
+
+    def __repr__(self) -> str:
+        return f"<LazyObject {self._factory.__qualname__}>"
@@ -1,26 +1,208 @@
+import asyncio
 import contextlib
+import itertools
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable
 
+from fastapi import Depends
+from sqlalchemy import make_url, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
+    AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
 
 from src.conf.config import settings
+from src.conf.lazy import LazyObject
+from src.database.models import User
+from src.database.sharding import HashRing
+
+# Set once the current request (or task) has committed on the primary. Reads
+# made afterwards in the same context go to the primary as well, so they see
+# that write even if the replicas lag behind.
+_read_your_writes: ContextVar[bool] = ContextVar("read_your_writes", default=False)
+
+
+class _PrimarySession(AsyncSession):
+    async def commit(self) -> None:
+        await super().commit()
+        _read_your_writes.set(True)
+
+
+class _ReplicaSession(Session):
+    """
+    Session that sends queries to the replica chosen for it, except for
+    flushes and for reads after a write in the same context.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or _read_your_writes.get():
+            return self.info["primary"]
+        return self.info["replica"]
+
+
+class LazySession:
+    """
+    Stands in for an ``AsyncSession`` that is only built when first used.
+
+    Requests answered from caches never query the database, and building
+    and closing a session costs more than the rest of such a request.
+    Attribute access is forwarded to the session, created by ``factory`` on
+    first access.
+    """
+
+    def __init__(self, factory: Callable[[], AsyncSession]):
+        self._factory = factory
+        self._session: AsyncSession | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+
+@contextlib.asynccontextmanager
+async def lazy_session(factory: Callable[[], AsyncSession]):
+    """
+    Yield a ``LazySession``; if it was used, roll it back on a database
+    error and close it on exit.
+    """
+    session = LazySession(factory)
+    try:
+        yield session
+    except SQLAlchemyError:
+        if session.started:
+            await session.rollback()
+        raise
+    finally:
+        if session.started:
+            await session.close()
+
 
 class DatabaseSessionManager:
-    def __init__(self, url: str):
-        self._engine: AsyncEngine | None = create_async_engine(url)
-        self._session_maker: async_sessionmaker = async_sessionmaker(
-            autoflush=False, autocommit=False, bind=self._engine
-        )
+    def __init__(
+        self,
+        url: str,
+        replica_urls: list[str] | tuple[str, ...] = (),
+        replica_strategy: str = "round_robin",
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        query_cache_size: int = 500,
+        prepared_statement_cache_size: int = 100,
+        shard_urls: dict[str, str] | None = None,
+        shard_vnodes: int = 64,
+    ):
+        # Engines (and with them the DBAPI driver) are created on first use,
+        # so importing the application never touches the database.
+        if replica_strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica strategy: {replica_strategy}")
+        self._url = url
+        self._replica_urls = list(replica_urls)
+        self._replica_strategy = replica_strategy
+        self._pool_options = {"pool_size": pool_size, "max_overflow": max_overflow}
+        self._query_cache_size = query_cache_size
+        self._prepared_statement_cache_size = prepared_statement_cache_size
+        self._engine: AsyncEngine | None = None
+        self._replica_engines: list[AsyncEngine] | None = None
+        self._session_maker: async_sessionmaker | None = None
+        self._read_session_maker: async_sessionmaker | None = None
+        self._round_robin = itertools.count()
+        self._replica_sessions = [0] * len(self._replica_urls)
+        self._shard_urls = dict(shard_urls or {})
+        self._shard_engines: dict[str, AsyncEngine] = {}
+        self._shard_session_makers: dict[str, async_sessionmaker] = {}
+        self.ring = HashRing(self._shard_urls, shard_vnodes) if self.sharded else None
 
-    @contextlib.asynccontextmanager
-    async def session(self):
+    def _create_engine(self, url: str) -> AsyncEngine:
+        options = {"query_cache_size": self._query_cache_size}
+        parsed = make_url(url)
+        # Only queue pools are sized; in-memory SQLite, for one, uses a
+        # StaticPool, which rejects these options.
+        if issubclass(parsed.get_dialect().get_pool_class(parsed), QueuePool):
+            options.update(self._pool_options)
+        if parsed.get_driver_name() == "asyncpg":
+            options["connect_args"] = {
+                "prepared_statement_cache_size": self._prepared_statement_cache_size
+            }
+        return create_async_engine(url, **options)
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = self._create_engine(self._url)
+        return self._engine
+
+    @property
+    def replica_engines(self) -> list[AsyncEngine]:
+        if self._replica_engines is None:
+            self._replica_engines = [
+                self._create_engine(url) for url in self._replica_urls
+            ]
+        return self._replica_engines
+
+    @property
+    def session_maker(self) -> async_sessionmaker:
         if self._session_maker is None:
-            raise Exception("Database session is not initialized")
-        session = self._session_maker()
+            self._session_maker = async_sessionmaker(
+                autoflush=False,
+                autocommit=False,
+                bind=self.engine,
+                class_=_PrimarySession,
+            )
+        return self._session_maker
+
+    @property
+    def read_session_maker(self) -> async_sessionmaker:
+        if self._read_session_maker is None:
+            self._read_session_maker = async_sessionmaker(
+                autoflush=False,
+                autocommit=False,
+                class_=_PrimarySession,
+                sync_session_class=_ReplicaSession,
+            )
+        return self._read_session_maker
+
+    @property
+    def replicated(self) -> bool:
+        return bool(self._replica_urls)
+
+    @property
+    def sharded(self) -> bool:
+        return bool(self._shard_urls)
+
+    def shard_engine(self, name: str) -> AsyncEngine:
+        if name not in self._shard_urls:
+            raise KeyError(f"Unknown shard: {name}")
+        if name not in self._shard_engines:
+            self._shard_engines[name] = self._create_engine(self._shard_urls[name])
+        return self._shard_engines[name]
+
+    def shard_for(self, user: User) -> str:
+        """
+        Name the shard holding the contacts of ``user``: the one recorded on
+        the user, otherwise the one the hash ring assigns to the user id.
+        """
+        return user.contacts_shard or self.ring.node_for(user.id)
+
+    def _pick_replica(self) -> int:
+        if self._replica_strategy == "least_connections":
+            return min(
+                range(len(self._replica_urls)),
+                key=self._replica_sessions.__getitem__,
+            )
+        return next(self._round_robin) % len(self._replica_urls)
+
+    @contextlib.asynccontextmanager
+    async def _managed(self, session: AsyncSession):
         try:
             yield session
         except SQLAlchemyError as e:
@@ -29,8 +211,138 @@ class DatabaseSessionManager:
         finally:
             await session.close()
 
-sessionmanager = DatabaseSessionManager(settings.DB_URL)
+    @contextlib.asynccontextmanager
+    async def session(self):
+        async with self._managed(self.session_maker()) as session:
+            yield session
+
+    def _new_read_session(self) -> tuple[AsyncSession, int | None]:
+        if not self._replica_urls:
+            return self.session_maker(), None
+        index = self._pick_replica()
+        session = self.read_session_maker(
+            info={
+                "primary": self.engine.sync_engine,
+                "replica": self.replica_engines[index].sync_engine,
+            }
+        )
+        self._replica_sessions[index] += 1
+        return session, index
+
+    @contextlib.asynccontextmanager
+    async def read_session(self):
+        """
+        Session for read-only work, served by a replica when any are
+        configured.
+
+        Replicas are picked round-robin or by fewest open read sessions
+        (``least_connections``). Writes, and reads issued after this context
+        committed on the primary, are sent to the primary.
+        """
+        session, index = self._new_read_session()
+        try:
+            async with self._managed(session):
+                yield session
+        finally:
+            if index is not None:
+                self._replica_sessions[index] -= 1
+
+    @contextlib.asynccontextmanager
+    async def request_session(self, read_only: bool = False):
+        """
+        Like ``session``, or ``read_session`` when ``read_only``, but the
+        session is only built if the request uses it.
+        """
+        index = None
+
+        def factory() -> AsyncSession:
+            nonlocal index
+            if not read_only:
+                return self.session_maker()
+            session, index = self._new_read_session()
+            return session
+
+        try:
+            async with lazy_session(factory) as session:
+                yield session
+        finally:
+            if index is not None:
+                self._replica_sessions[index] -= 1
+
+    @contextlib.asynccontextmanager
+    async def shard_session(self, name: str):
+        if name not in self._shard_session_makers:
+            self._shard_session_makers[name] = async_sessionmaker(
+                autoflush=False,
+                autocommit=False,
+                bind=self.shard_engine(name),
+                class_=_PrimarySession,
+            )
+        async with self._managed(self._shard_session_makers[name]()) as session:
+            yield session
+
+    async def warmup(self, connections: int = 1) -> None:
+        """
+        Open ``connections`` pooled connections per engine up front, so the
+        first requests after startup do not pay for connecting to the
+        database.
+        """
+
+        async def _touch(engine: AsyncEngine):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        engines = [
+            self.engine,
+            *self.replica_engines,
+            *(self.shard_engine(name) for name in self._shard_urls),
+        ]
+        await asyncio.gather(
+            *(_touch(engine) for engine in engines for _ in range(connections))
+        )
+
+    async def close(self) -> None:
+        """Close every pooled connection."""
+        engines = [
+            self._engine,
+            *(self._replica_engines or []),
+            *self._shard_engines.values(),
+        ]
+        for engine in engines:
+            if engine is not None:
+                await engine.dispose()
+
+
+@lru_cache
+def get_sessionmanager() -> DatabaseSessionManager:
+    return DatabaseSessionManager(
+        settings.DB_URL,
+        replica_urls=settings.DB_REPLICA_URLS,
+        replica_strategy=settings.DB_REPLICA_STRATEGY,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        prepared_statement_cache_size=settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        shard_urls=settings.DB_SHARD_URLS,
+        shard_vnodes=settings.DB_SHARD_VNODES,
+    )
+
+
+sessionmanager: DatabaseSessionManager = LazyObject(get_sessionmanager)
+
 
 async def get_db():
-    async with sessionmanager.session() as session:
+    async with sessionmanager.request_session() as session:
+        yield session
+
+
+async def get_read_db(db: AsyncSession = Depends(get_db)):
+    """
+    Without replicas, reads share the request's primary session, so a
+    route and ``get_current_user`` use one session and one connection.
+    """
+    if not sessionmanager.replicated:
+        yield db
+        return
+    async with sessionmanager.request_session(read_only=True) as session:
         yield session
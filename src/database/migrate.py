@@ -0,0 +1,106 @@
+"""
+Runs the Alembic migrations as a step of their own, before the app starts::
+
+    python -m src.database.migrate                 # upgrade to head
+    python -m src.database.migrate b9f37d2a6c15    # or to a revision
+    python -m src.database.migrate -x contacts_partitions=0
+
+Migrations using ``online_ddl`` take as long as indexing or backfilling the
+table does, and must run once rather than in every container that starts
+the app, where they would race each other and hold up the health checks.
+``migrations/env.py`` therefore refuses to upgrade or downgrade unless
+started from here, or from ``alembic`` with ``-x direct=true`` in
+development. On PostgreSQL an advisory lock makes a second runner wait for
+the first.
+"""
+
+import argparse
+import logging
+from contextlib import contextmanager
+from typing import Iterator
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+RUNNER_ATTRIBUTE = "migration_runner"
+# Any constant shared by the runners; "contacts" in ASCII.
+ADVISORY_LOCK_KEY = 0x636F6E7461637473
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationRefused(RuntimeError):
+    """Migrations were started other than by ``python -m src.database.migrate``."""
+
+
+def check_runner(config: Config, x_arguments: dict[str, str]) -> None:
+    """
+    Refuse to apply migrations unless started by the migration runner.
+
+    Alembic commands that only read, such as ``current``, ``history`` or
+    ``revision --autogenerate``, are let through.
+
+    Args:
+        config: The Alembic config of the running command.
+        x_arguments: The ``-x`` arguments given to the command.
+
+    Raises:
+        MigrationRefused: When the command applies migrations and was not
+            started by the runner or with ``-x direct=true``.
+    """
+    if config.attributes.get(RUNNER_ATTRIBUTE):
+        return
+    if x_arguments.get("direct", "").lower() == "true":
+        return
+    cmd = getattr(config.cmd_opts, "cmd", None)
+    if cmd and cmd[0].__name__ not in ("upgrade", "downgrade"):
+        return
+    raise MigrationRefused(
+        "Migrations run separately from the app: "
+        "python -m src.database.migrate [revision]"
+    )
+
+
+@contextmanager
+def migration_lock(connection: Connection) -> Iterator[None]:
+    """
+    Hold a PostgreSQL advisory lock for the duration of the migrations.
+
+    The lock belongs to the session, so the commits of ``online_ddl`` do not
+    release it. Other databases are not locked.
+    """
+    if connection.dialect.name != "postgresql":
+        yield
+        return
+    logger.info("Waiting for the migration lock")
+    connection.execute(
+        text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY}
+    )
+    connection.commit()
+    try:
+        yield
+    finally:
+        connection.execute(
+            text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY}
+        )
+        connection.commit()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("revision", nargs="?", default="head")
+    parser.add_argument("--config", default="alembic.ini")
+    parser.add_argument(
+        "-x", action="append", default=[], help="Passed to env.py, as by alembic."
+    )
+    args = parser.parse_args(argv)
+
+    config = Config(args.config, cmd_opts=argparse.Namespace(x=args.x))
+    config.attributes[RUNNER_ATTRIBUTE] = True
+    command.upgrade(config, args.revision)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,19 @@ from typing import Optional
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import Integer, String, func, ForeignKey, Boolean, Enum as SqlEnum
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    Index,
+    Integer,
+    String,
+    func,
+    ForeignKey,
+    Boolean,
+    Enum as SqlEnum,
+    extract,
+    literal_column,
+)
 from sqlalchemy.orm import relationship, mapped_column, Mapped, DeclarativeBase
 from sqlalchemy.sql.sqltypes import DateTime
 
@@ -23,19 +35,36 @@ class User(Base):
     email = mapped_column(String, unique=True)
     hashed_password = mapped_column(String)
     refresh_token: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    created_at = mapped_column(DateTime, default=func.now())
+    created_at = mapped_column(DateTime, default=func.now(), index=True)
     avatar = mapped_column(String(255), nullable=True)
-    confirmed = mapped_column(Boolean, default=False)
-    role = mapped_column(SqlEnum(UserRole), default=UserRole.USER, nullable=False)
+    confirmed = mapped_column(Boolean, default=False, index=True)
+    role = mapped_column(
+        SqlEnum(UserRole), default=UserRole.USER, nullable=False, index=True
+    )
+    # Deactivated users can no longer log in; their data is kept.
+    is_active = mapped_column(Boolean, default=True, nullable=False)
+    # Shard holding the user's contacts; empty means the hash ring decides.
+    contacts_shard: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
 
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("ix_contacts_user_id_change_seq", "user_id", "change_seq"),
+        Index("ix_contacts_user_id_email_normalized", "user_id", "email_normalized"),
+        Index("ix_contacts_user_id_phone_normalized", "user_id", "phone_normalized"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     first_name: Mapped[str] = mapped_column(String(50), nullable=False)
     last_name: Mapped[str] = mapped_column(String(50), nullable=False)
+    # Unique across all users. The hash-partitioned PostgreSQL table can only
+    # enforce this per owner (see src.database.partitioning).
     email: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
     phone: Mapped[str] = mapped_column(String(20), nullable=False, unique=True)
+    # Canonical forms for exact lookups, set by ContactRepository on write.
+    # The phone is E.164, or NULL when the number cannot be one.
+    email_normalized: Mapped[Optional[str]] = mapped_column(String(100))
+    phone_normalized: Mapped[Optional[str]] = mapped_column(String(16))
     birthday: Mapped[datetime] = mapped_column(DateTime)
     created_at: Mapped[datetime] = mapped_column(
         "created_at", DateTime, default=func.now()
@@ -44,6 +73,72 @@ class Contact(Base):
         "updated_at", DateTime, default=func.now(), onupdate=func.now()
     )
     user_id = mapped_column(
-        "user_id", ForeignKey("users.id", ondelete="CASCADE"), default=None
+        "user_id",
+        ForeignKey("users.id", ondelete="CASCADE"),
+        default=None,
+        nullable=False,
     )
+    # Position of the latest change of this contact in its owner's feed.
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
     user = relationship("User", backref="notes")
+
+    # The partitioned table's key; including user_id lets PostgreSQL prune
+    # partitions for the UPDATE and DELETE statements the ORM emits.
+    __mapper_args__ = {"primary_key": [id, user_id]}
+
+
+def birthday_key(birthday):
+    """
+    SQL expression giving the day of the year of ``birthday`` as MMDD, e.g.
+    1231 for December 31st. Indexed together with ``user_id`` for the
+    birthday queries.
+    """
+    # A literal rather than a bound 100, so queries match the index
+    # expression exactly.
+    return extract("month", birthday) * literal_column("100") + extract("day", birthday)
+
+
+Index(
+    "ix_contacts_user_id_birthday_key",
+    Contact.user_id,
+    birthday_key(Contact.birthday),
+)
+
+
+class ContactTombstone(Base):
+    """Record of a deleted contact, kept for the change feed."""
+
+    __tablename__ = "contact_tombstones"
+    __table_args__ = (
+        Index("ix_contact_tombstones_user_id_change_seq", "user_id", "change_seq"),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    contact_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+
+class ContactCounter(Base):
+    """Per-user counters of the contacts table, one row per owner."""
+
+    __tablename__ = "contact_counters"
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    last_change_seq: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    contact_count: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+
+class BirthdayDigestRun(Base):
+    """Progress of the birthday digest job for one day."""
+
+    __tablename__ = "birthday_digest_runs"
+    run_date: Mapped[datetime] = mapped_column(Date, primary_key=True)
+    last_user_id: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sent: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    failed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
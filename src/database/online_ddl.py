@@ -0,0 +1,268 @@
+"""
+Schema changes for Alembic migrations that leave the tables writable.
+
+``op.create_index`` locks the table against writes until the index is
+built, and filling a new column with one ``UPDATE`` holds every row lock of
+the table until it commits. On PostgreSQL ``create_index_online`` builds
+the index with ``CREATE INDEX CONCURRENTLY``, partition by partition on a
+partitioned table, and ``backfill`` updates the rows in short batches that
+commit one by one. Both commit the migration's transaction so far, so a
+migration using them is not atomic; they are written to be re-run after a
+failure. On other databases they fall back to the plain operations.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+DEFAULT_LOCK_TIMEOUT = "5s"
+# PostgreSQL truncates longer identifiers.
+MAX_NAME_LENGTH = 63
+
+logger = logging.getLogger(__name__)
+
+
+def partition_index_name(name: str, partition: str) -> str:
+    """The name of the index ``name`` on one partition of its table."""
+    return f"{partition}_{name}"[:MAX_NAME_LENGTH]
+
+
+def create_index_statements(
+    name: str,
+    table: str,
+    columns: Sequence[str | sa.TextClause],
+    partitions: Sequence[str] = (),
+    unique: bool = False,
+) -> list[str]:
+    """
+    SQL building an index without blocking writes to the table.
+
+    ``CONCURRENTLY`` is not supported on a partitioned table, so there the
+    index is created on the parent only, built concurrently on each
+    partition and attached. The parent index is valid once every partition
+    index is attached.
+
+    Args:
+        name: The name of the index.
+        table: The table to index.
+        columns: The indexed columns, or expressions as ``sa.text``.
+        partitions: The partitions of ``table``, if it is partitioned.
+        unique: Whether to create a unique index.
+
+    Returns:
+        The statements to run outside a transaction, in order.
+    """
+    create = "CREATE UNIQUE INDEX" if unique else "CREATE INDEX"
+    column_list = ", ".join(str(column) for column in columns)
+    if not partitions:
+        return [
+            f"{create} CONCURRENTLY IF NOT EXISTS {name} ON {table} ({column_list})"
+        ]
+    statements = [f"{create} IF NOT EXISTS {name} ON ONLY {table} ({column_list})"]
+    for partition in partitions:
+        child = partition_index_name(name, partition)
+        statements += [
+            f"{create} CONCURRENTLY IF NOT EXISTS {child} "
+            f"ON {partition} ({column_list})",
+            f"ALTER INDEX {name} ATTACH PARTITION {child}",
+        ]
+    return statements
+
+
+def drop_index_statements(name: str, partitioned: bool = False) -> list[str]:
+    """
+    SQL dropping an index without blocking reads of the table.
+
+    An index of a partitioned table cannot be dropped concurrently; dropping
+    it takes an exclusive lock on the table, but only briefly.
+
+    Args:
+        name: The name of the index.
+        partitioned: Whether the index is on a partitioned table.
+
+    Returns:
+        The statements to run outside a transaction, in order.
+    """
+    if partitioned:
+        return [f"DROP INDEX IF EXISTS {name}"]
+    return [f"DROP INDEX CONCURRENTLY IF EXISTS {name}"]
+
+
+def create_index_online(
+    name: str,
+    table: str,
+    columns: Sequence[str | sa.TextClause],
+    unique: bool = False,
+    lock_timeout: str = DEFAULT_LOCK_TIMEOUT,
+) -> None:
+    """
+    Create an index from a migration while the table stays writable.
+
+    A concurrent build that fails, e.g. on ``lock_timeout`` or a duplicate
+    of a unique index, leaves an invalid index behind; it is dropped and
+    built again when the migration is re-run.
+
+    Args:
+        name: The name of the index.
+        table: The table to index.
+        columns: The indexed columns, or expressions as ``sa.text``.
+        unique: Whether to create a unique index.
+        lock_timeout: How long each statement waits for its locks before
+            failing, rather than queueing the application's queries behind it.
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_index(name, table, list(columns), unique=unique)
+        return
+    partitions = _partitions(table)
+    statements = create_index_statements(name, table, columns, partitions, unique)
+    children = [partition_index_name(name, p) for p in partitions]
+    with op.get_context().autocommit_block(), _lock_timeout(lock_timeout):
+        for invalid in _invalid_indexes([name, *children]):
+            logger.warning("Dropping invalid index %s left by a failed build", invalid)
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {invalid}")
+        for statement in statements:
+            logger.info("%s", statement)
+            op.execute(statement)
+
+
+def drop_index_online(
+    name: str, table: str, lock_timeout: str = DEFAULT_LOCK_TIMEOUT
+) -> None:
+    """
+    Drop an index from a migration while the table stays readable.
+
+    Args:
+        name: The name of the index.
+        table: The table of the index.
+        lock_timeout: How long each statement waits for its locks.
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        op.drop_index(name, table_name=table)
+        return
+    partitioned = bool(_partitions(table))
+    with op.get_context().autocommit_block(), _lock_timeout(lock_timeout):
+        for statement in drop_index_statements(name, partitioned):
+            op.execute(statement)
+
+
+def backfill(
+    table: sa.TableClause,
+    values: Callable[[sa.Row], dict[str, Any]],
+    where: sa.ColumnElement[bool] | None = None,
+    key: Sequence[str] = ("id",),
+    batch_size: int = 1000,
+    pause: float = 0.1,
+) -> int:
+    """
+    Fill in columns of the existing rows of a table in batches.
+
+    Reads the rows in order of the first ``key`` column, ``batch_size`` at a
+    time, and updates each with what ``values`` returns for it. Every batch
+    is committed on its own and followed by ``pause`` seconds of sleep, so
+    its row locks are held briefly and the application's writes,
+    replication and autovacuum keep up. Pass ``where`` to skip the rows
+    already filled in, so that a re-run resumes where a failed one stopped.
+
+    Args:
+        table: The table, with the ``key`` columns and those ``values``
+            reads.
+        values: The new column values of one row; return the same columns
+            for every row.
+        where: Which rows need filling in.
+        key: Columns identifying a row. The first orders the batches and
+            must be unique; the others narrow the update, e.g. to a
+            partition.
+        batch_size: Rows read and updated per transaction.
+        pause: Seconds to sleep after each batch.
+
+    Returns:
+        The number of rows updated.
+    """
+    order = table.c[key[0]]
+    query = sa.select(table).order_by(order).limit(batch_size)
+    if where is not None:
+        query = query.where(where)
+    match = [table.c[k] == sa.bindparam(f"b_{k}") for k in key]
+
+    last, updated = None, 0
+    while (
+        rows := op.get_bind()
+        .execute(query if last is None else query.where(order > last))
+        .all()
+    ):
+        params = []
+        for row in rows:
+            new = values(row)
+            params.append(
+                {
+                    **{f"b_{k}": getattr(row, k) for k in key},
+                    **{f"b_{column}": value for column, value in new.items()},
+                }
+            )
+        update = (
+            table.update()
+            .where(*match)
+            .values({column: sa.bindparam(f"b_{column}") for column in new})
+        )
+        op.get_bind().execute(update, params)
+        _commit()
+        updated += len(rows)
+        last = getattr(rows[-1], key[0])
+        logger.info("Backfilled %d rows of %s", updated, table.name)
+        if pause:
+            time.sleep(pause)
+    return updated
+
+
+def _commit() -> None:
+    # Leaving the block commits what the migration has run so far.
+    with op.get_context().autocommit_block():
+        pass
+
+
+@contextmanager
+def _lock_timeout(timeout: str) -> Iterator[None]:
+    op.execute(f"SET lock_timeout = '{timeout}'")
+    try:
+        yield
+    finally:
+        op.execute("RESET lock_timeout")
+
+
+def _partitions(table: str) -> list[str]:
+    return list(
+        op.get_bind()
+        .scalars(
+            sa.text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :table AND p.relkind = 'p' "
+                "ORDER BY c.relname"
+            ),
+            {"table": table},
+        )
+        .all()
+    )
+
+
+def _invalid_indexes(names: list[str]) -> list[str]:
+    # Partitioned indexes (relkind 'I') stay invalid until every partition
+    # index is attached, and are completed rather than dropped.
+    return list(
+        op.get_bind()
+        .scalars(
+            sa.text(
+                "SELECT c.relname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE NOT i.indisvalid AND c.relkind = 'i' "
+                "AND c.relname = ANY(:names)"
+            ),
+            {"names": names},
+        )
+        .all()
+    )
@@ -0,0 +1,86 @@
+"""
+Hash partitioning of the contacts table on PostgreSQL.
+
+Every contact query filters on ``user_id``, so partitioning ``contacts`` by a
+hash of it lets the planner scan a single partition. PostgreSQL requires the
+partition key in every unique constraint of a partitioned table, which is
+why the primary key is ``(id, user_id)`` and emails and phone numbers are
+unique per owner rather than across all users.
+"""
+
+DEFAULT_PARTITIONS = 16
+
+
+def partition_contacts_statements(partitions: int = DEFAULT_PARTITIONS) -> list[str]:
+    """
+    SQL turning the plain ``contacts`` table into a hash-partitioned one.
+
+    The rows are copied into the new table, so this takes the table offline
+    for the duration of the copy. Contacts without an owner make it fail.
+
+    Args:
+        partitions: The number of hash partitions.
+
+    Returns:
+        The statements to run in one transaction, in order.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be positive")
+    return [
+        "ALTER TABLE contacts RENAME TO contacts_unpartitioned",
+        "ALTER TABLE contacts_unpartitioned "
+        "DROP CONSTRAINT IF EXISTS contacts_pkey, "
+        "DROP CONSTRAINT IF EXISTS contacts_email_key, "
+        "DROP CONSTRAINT IF EXISTS contacts_phone_key, "
+        "DROP CONSTRAINT IF EXISTS contacts_user_id_email_key, "
+        "DROP CONSTRAINT IF EXISTS contacts_user_id_phone_key, "
+        "DROP CONSTRAINT IF EXISTS contacts_user_id_fkey",
+        "ALTER SEQUENCE contacts_id_seq OWNED BY NONE",
+        "CREATE TABLE contacts (LIKE contacts_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY HASH (user_id)",
+        *(
+            f"CREATE TABLE contacts_p{i} PARTITION OF contacts "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})"
+            for i in range(partitions)
+        ),
+        "INSERT INTO contacts SELECT * FROM contacts_unpartitioned",
+        "DROP TABLE contacts_unpartitioned",
+        "ALTER SEQUENCE contacts_id_seq OWNED BY contacts.id",
+        "ALTER TABLE contacts ALTER COLUMN user_id SET NOT NULL",
+        *_constraint_statements(),
+    ]
+
+
+def unpartition_contacts_statements() -> list[str]:
+    """
+    SQL turning a partitioned ``contacts`` table back into a plain one.
+
+    Returns:
+        The statements to run in one transaction, in order.
+    """
+    return [
+        "ALTER TABLE contacts RENAME TO contacts_partitioned",
+        "ALTER TABLE contacts_partitioned "
+        "DROP CONSTRAINT contacts_pkey, "
+        "DROP CONSTRAINT contacts_user_id_email_key, "
+        "DROP CONSTRAINT contacts_user_id_phone_key, "
+        "DROP CONSTRAINT contacts_user_id_fkey",
+        "ALTER SEQUENCE contacts_id_seq OWNED BY NONE",
+        "CREATE TABLE contacts (LIKE contacts_partitioned INCLUDING DEFAULTS)",
+        "INSERT INTO contacts SELECT * FROM contacts_partitioned",
+        "DROP TABLE contacts_partitioned",
+        "ALTER SEQUENCE contacts_id_seq OWNED BY contacts.id",
+        *_constraint_statements(),
+    ]
+
+
+def _constraint_statements() -> list[str]:
+    return [
+        "ALTER TABLE contacts ADD CONSTRAINT contacts_pkey PRIMARY KEY (id, user_id)",
+        "ALTER TABLE contacts ADD CONSTRAINT contacts_user_id_email_key "
+        "UNIQUE (user_id, email)",
+        "ALTER TABLE contacts ADD CONSTRAINT contacts_user_id_phone_key "
+        "UNIQUE (user_id, phone)",
+        "ALTER TABLE contacts ADD CONSTRAINT contacts_user_id_fkey "
+        "FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE",
+    ]
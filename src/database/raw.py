@@ -0,0 +1,124 @@
+import asyncio
+import itertools
+import logging
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import make_url
+
+from src.conf.config import settings
+from src.conf.lazy import LazyObject
+from src.database.db import _read_your_writes
+
+logger = logging.getLogger(__name__)
+
+
+def _dsn(url: str) -> str:
+    # asyncpg takes a libpq URL, without SQLAlchemy's driver suffix.
+    return (
+        make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+    )
+
+
+class RawPool:
+    """
+    Plain asyncpg pools for the read paths that skip the ORM (see
+    ``src.repository.raw``).
+
+    Reads are routed like those of ``DatabaseSessionManager.read_session``:
+    to a replica picked round-robin or by fewest queries in flight
+    (``least_connections``), and to the primary when there are no replicas
+    or the current request or task has committed on the primary already.
+
+    The pools are opened by the application lifespan, or on first use if
+    that failed. Queries are run with ``fetch``/``fetchrow``, each on a
+    pooled connection whose prepared statements are cached.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        replica_urls: list[str] | tuple[str, ...] = (),
+        replica_strategy: str = "round_robin",
+        max_size: int = 10,
+        statement_cache_size: int = 100,
+    ):
+        if replica_strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica strategy: {replica_strategy}")
+        # The primary first, then the replicas.
+        self._dsns = [_dsn(url), *(_dsn(replica) for replica in replica_urls)]
+        self._replica_strategy = replica_strategy
+        self._round_robin = itertools.count()
+        self._in_flight = [0] * len(self._dsns)
+        self._max_size = max_size
+        self._statement_cache_size = statement_cache_size
+        self._pools: list | None = None
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> list:
+        import asyncpg
+
+        async with self._lock:
+            if self._pools is None:
+                self._pools = await asyncio.gather(
+                    *(
+                        asyncpg.create_pool(
+                            dsn,
+                            min_size=1,
+                            max_size=self._max_size,
+                            statement_cache_size=self._statement_cache_size,
+                        )
+                        for dsn in self._dsns
+                    )
+                )
+        return self._pools
+
+    def _pick(self) -> int:
+        replicas = len(self._dsns) - 1
+        if not replicas or _read_your_writes.get():
+            return 0
+        if self._replica_strategy == "least_connections":
+            return 1 + min(range(replicas), key=lambda i: self._in_flight[1 + i])
+        return 1 + next(self._round_robin) % replicas
+
+    async def _run(self, method: str, query: str, args: tuple) -> Any:
+        pools = self._pools or await self.open()
+        index = self._pick()
+        self._in_flight[index] += 1
+        try:
+            return await getattr(pools[index], method)(query, *args)
+        finally:
+            self._in_flight[index] -= 1
+
+    async def fetch(self, query: str, *args: Any) -> list:
+        return await self._run("fetch", query, args)
+
+    async def fetchrow(self, query: str, *args: Any):
+        return await self._run("fetchrow", query, args)
+
+    async def close(self) -> None:
+        if self._pools is not None:
+            await asyncio.gather(*(pool.close() for pool in self._pools))
+            self._pools = None
+
+
+def raw_reads_enabled() -> bool:
+    """
+    Whether the hottest reads go through ``RawPool``: only when configured,
+    and never with sharded contacts, which the pool does not route.
+    """
+    return settings.DB_READ_BACKEND == "asyncpg" and not settings.DB_SHARD_URLS
+
+
+@lru_cache
+def get_raw_pool() -> RawPool:
+    return RawPool(
+        settings.DB_URL,
+        replica_urls=settings.DB_REPLICA_URLS,
+        replica_strategy=settings.DB_REPLICA_STRATEGY,
+        max_size=settings.DB_POOL_SIZE,
+        statement_cache_size=settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    )
+
+
+raw_pool: RawPool = LazyObject(get_raw_pool)
@@ -0,0 +1,566 @@
+"""
+Sharding of contacts across several databases by owner.
+
+Users stay on the primary database. Each user's contacts live on exactly one
+shard: the one named in ``users.contacts_shard`` or, when that is empty, the
+one the consistent-hash ring assigns to the user id.
+
+Shards hold copies of the contacts tables without the foreign key to
+``users``. Contact ids must stay unique across shards so that contacts keep
+their ids when they move. Give every shard its own id range when creating
+it::
+
+    python -m src.database.sharding init --shard eu-1 --id-offset 1000000000
+
+Adding a shard to ``DB_SHARD_URLS`` changes the ring, so pin the current
+placement of every user first, then deploy the new configuration and move
+users onto the new shard::
+
+    python -m src.database.sharding pin
+    python -m src.database.sharding rebalance --dry-run
+    python -m src.database.sharding rebalance
+    python -m src.database.sharding move 42 eu-2
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import logging
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.sql.visitors import replacement_traverse
+
+from src.database.models import Base, User
+from src.services.cache import user_key
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+    from src.database.db import DatabaseSessionManager
+
+logger = logging.getLogger(__name__)
+
+# Tables stored on the shards rather than on the primary database. All of
+# them are keyed by owner through a ``user_id`` column.
+SHARDED_TABLES = ("contacts", "contact_tombstones", "contact_counters")
+
+
+class HashRing:
+    """
+    Consistent-hash ring mapping keys to node names.
+
+    Every node is placed on the ring ``vnodes`` times, so keys spread evenly
+    and adding or removing a node only moves the keys that node gains or
+    loses.
+    """
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = 64):
+        self.nodes = sorted(set(nodes))
+        if not self.nodes:
+            raise ValueError("A hash ring needs at least one node")
+        points = sorted(
+            (self._hash(f"{node}#{i}"), node)
+            for node in self.nodes
+            for i in range(vnodes)
+        )
+        self._keys = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def node_for(self, key: int | str) -> str:
+        """
+        Return the node owning ``key``.
+
+        Args:
+            key: The key to place, usually a user id.
+
+        Returns:
+            The name of the node.
+        """
+        index = bisect.bisect(self._keys, self._hash(str(key)))
+        return self._owners[index % len(self._owners)]
+
+
+def _shard_table(table: Table, metadata: MetaData) -> Table:
+    columns = [
+        Column(
+            column.name,
+            # Shard id ranges are offset far apart, past what INTEGER holds.
+            (
+                BigInteger().with_variant(Integer(), "sqlite")
+                if column is table.autoincrement_column
+                else column.type
+            ),
+            primary_key=column.primary_key,
+            nullable=column.nullable,
+            unique=column.unique,
+            index=column.index,
+            autoincrement=column is table.autoincrement_column,
+        )
+        for column in table.columns
+    ]
+    copy = Table(table.name, metadata, *columns, sqlite_autoincrement=True)
+    for index in table.indexes:
+
+        def retarget(element):
+            if isinstance(element, Column) and element.table is table:
+                return copy.c[element.name]
+
+        Index(
+            index.name,
+            *(replacement_traverse(expr, {}, retarget) for expr in index.expressions),
+            unique=index.unique,
+        )
+    return copy
+
+
+def shard_metadata() -> MetaData:
+    """
+    Build the schema of a shard: the sharded tables without foreign keys
+    to tables that stay on the primary database.
+    """
+    metadata = MetaData()
+    for name in SHARDED_TABLES:
+        _shard_table(Base.metadata.tables[name], metadata)
+    return metadata
+
+
+async def _set_id_floor(conn: AsyncConnection, table: str, floor: int) -> None:
+    if conn.dialect.name == "postgresql":
+        await conn.execute(
+            text("SELECT setval(pg_get_serial_sequence(:table, 'id'), :floor)"),
+            {"table": table, "floor": floor},
+        )
+    elif conn.dialect.name == "sqlite":
+        await conn.execute(
+            text("DELETE FROM sqlite_sequence WHERE name = :table"), {"table": table}
+        )
+        await conn.execute(
+            text("INSERT INTO sqlite_sequence (name, seq) VALUES (:table, :floor)"),
+            {"table": table, "floor": floor},
+        )
+    else:
+        raise ValueError(f"Cannot set id offsets on {conn.dialect.name}")
+
+
+async def init_shard(engine: AsyncEngine, id_offset: int = 0) -> None:
+    """
+    Create the shard schema on ``engine``.
+
+    Args:
+        engine: The engine of the shard.
+        id_offset: New contacts on this shard get ids above this value.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(shard_metadata().create_all)
+        if id_offset:
+            for name in SHARDED_TABLES:
+                if Base.metadata.tables[name].autoincrement_column is not None:
+                    await _set_id_floor(conn, name, id_offset)
+
+
+def _batched(items: list, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class ShardMover:
+    """
+    Moves a user's contacts from one shard to another while the API keeps
+    serving them.
+
+    The contacts are copied to the target shard and the user is pointed at
+    the target. After in-flight requests had time to finish on the source
+    shard, the changes they made there since the copy started, found by
+    their ``change_seq``, are applied to the target unless the contact has
+    changed on the target since. Only then are the rows removed from the
+    source shard.
+    """
+
+    def __init__(
+        self,
+        manager: "DatabaseSessionManager",
+        redis: "Redis",
+        batch_size: int = 1000,
+        settle_seconds: float = 1.0,
+    ):
+        self.manager = manager
+        self.redis = redis
+        self.batch_size = batch_size
+        self.settle_seconds = settle_seconds
+        self.tables = [Base.metadata.tables[name] for name in SHARDED_TABLES]
+
+    async def move(self, user_id: int, target: str) -> int:
+        """
+        Move the contacts of a user to the ``target`` shard.
+
+        Args:
+            user_id: The ID of the user.
+            target: The name of the destination shard.
+
+        Returns:
+            The number of contacts copied.
+        """
+        async with self.manager.session() as db:
+            user = await db.get(User, user_id)
+        if user is None:
+            raise ValueError(f"User {user_id} not found")
+        source = self.manager.shard_for(user)
+        if source == target:
+            return 0
+        source_engine = self.manager.shard_engine(source)
+        target_engine = self.manager.shard_engine(target)
+
+        # Read before the copy, so that a change committed during the copy
+        # is applied again rather than missed.
+        copied_from = await self._last_change_seq(source_engine, user_id)
+        try:
+            copied = await self._sync(user_id, source_engine, target_engine)
+        except Exception:
+            # Nothing reads from the target yet, so the copy can be dropped.
+            await self._purge(target_engine, user_id)
+            raise
+        copied_to = await self._last_change_seq(target_engine, user_id)
+        await self._set_placement(user, target)
+        await asyncio.sleep(self.settle_seconds)
+        caught_up = await self._catch_up(
+            user_id, source_engine, target_engine, copied_from, copied_to
+        )
+        await self._purge(source_engine, user_id)
+        # The cached total predates the changes applied by the catch-up.
+        await self.redis.delete(user_key(user.username, "contacts", "count"))
+        logger.info(
+            "Moved %s contacts of user %s from %s to %s, then %s later changes",
+            copied,
+            user_id,
+            source,
+            target,
+            caught_up,
+        )
+        return copied
+
+    async def _rows(
+        self, engine: AsyncEngine, table: Table, user_id: int
+    ) -> dict[tuple, dict]:
+        async with engine.connect() as conn:
+            result = await conn.execute(select(table).where(table.c.user_id == user_id))
+            return {
+                tuple(row[column.name] for column in table.primary_key): dict(row)
+                for row in result.mappings()
+            }
+
+    async def _sync(
+        self, user_id: int, source: AsyncEngine, target: AsyncEngine
+    ) -> int:
+        copied = 0
+        for table in self.tables:
+            copied_rows = await self._sync_table(table, user_id, source, target)
+            if table.name == "contacts":
+                copied = copied_rows
+        return copied
+
+    async def _sync_table(
+        self, table: Table, user_id: int, source: AsyncEngine, target: AsyncEngine
+    ) -> int:
+        # Rows are compared whole: ``updated_at`` alone can miss an edit made
+        # within the same clock tick as the copy.
+        source_rows = await self._rows(source, table, user_id)
+        target_rows = await self._rows(target, table, user_id)
+        changed = [
+            key for key, row in source_rows.items() if target_rows.get(key) != row
+        ]
+        removed = [key for key in target_rows if key not in source_rows]
+        key = tuple_(*table.primary_key.columns)
+
+        for batch in _batched(changed, self.batch_size):
+            async with target.begin() as conn:
+                await conn.execute(
+                    delete(table).where(table.c.user_id == user_id, key.in_(batch))
+                )
+                await conn.execute(insert(table), [source_rows[k] for k in batch])
+        for batch in _batched(removed, self.batch_size):
+            async with target.begin() as conn:
+                await conn.execute(
+                    delete(table).where(table.c.user_id == user_id, key.in_(batch))
+                )
+        return len(changed)
+
+    async def _last_change_seq(self, engine: AsyncEngine, user_id: int) -> int:
+        counters = Base.metadata.tables["contact_counters"]
+        async with engine.connect() as conn:
+            seq = await conn.scalar(
+                select(counters.c.last_change_seq).where(counters.c.user_id == user_id)
+            )
+        return seq or 0
+
+    async def _catch_up(
+        self,
+        user_id: int,
+        source: AsyncEngine,
+        target: AsyncEngine,
+        copied_from: int,
+        copied_to: int,
+    ) -> int:
+        """
+        Apply the changes made on the source shard after ``copied_from`` to
+        the target shard, skipping the contacts changed on the target after
+        ``copied_to``, i.e. since the user was pointed at it.
+
+        Returns:
+            The number of changes applied.
+        """
+        contacts, tombstones, counters = (
+            Base.metadata.tables[name] for name in SHARDED_TABLES
+        )
+        async with source.connect() as conn:
+            result = await conn.execute(
+                select(contacts).where(
+                    contacts.c.user_id == user_id, contacts.c.change_seq > copied_from
+                )
+            )
+            changed = [dict(row) for row in result.mappings()]
+            deleted = (
+                await conn.scalars(
+                    select(tombstones.c.contact_id).where(
+                        tombstones.c.user_id == user_id,
+                        tombstones.c.change_seq > copied_from,
+                    )
+                )
+            ).all()
+        if not changed and not deleted:
+            return 0
+
+        async with target.begin() as conn:
+            # Every contact write claims a position from the counter row, so
+            # locking it holds the user's writes on the target until the
+            # catch-up commits.
+            seq = await conn.scalar(
+                select(counters.c.last_change_seq)
+                .where(counters.c.user_id == user_id)
+                .with_for_update()
+            )
+            if seq is None:
+                seq = 0
+                await conn.execute(
+                    insert(counters).values(
+                        user_id=user_id, last_change_seq=0, contact_count=0
+                    )
+                )
+            touched = set(
+                await conn.scalars(
+                    select(contacts.c.id).where(
+                        contacts.c.user_id == user_id, contacts.c.change_seq > copied_to
+                    )
+                )
+            )
+            touched.update(
+                await conn.scalars(
+                    select(tombstones.c.contact_id).where(
+                        tombstones.c.user_id == user_id,
+                        tombstones.c.change_seq > copied_to,
+                    )
+                )
+            )
+
+            applied = 0
+            for row in changed:
+                if row["id"] in touched:
+                    continue
+                seq += 1
+                try:
+                    async with conn.begin_nested():
+                        await conn.execute(
+                            delete(contacts).where(
+                                contacts.c.user_id == user_id,
+                                contacts.c.id == row["id"],
+                            )
+                        )
+                        # A new position, so that feed clients see the change.
+                        await conn.execute(
+                            insert(contacts).values({**row, "change_seq": seq})
+                        )
+                except IntegrityError:
+                    logger.warning(
+                        "Contact %s of user %s conflicts with one created on the "
+                        "new shard; keeping the new shard's",
+                        row["id"],
+                        user_id,
+                    )
+                    continue
+                applied += 1
+            for contact_id in deleted:
+                if contact_id in touched:
+                    continue
+                result = await conn.execute(
+                    delete(contacts).where(
+                        contacts.c.user_id == user_id, contacts.c.id == contact_id
+                    )
+                )
+                if result.rowcount:
+                    seq += 1
+                    await conn.execute(
+                        insert(tombstones).values(
+                            contact_id=contact_id, user_id=user_id, change_seq=seq
+                        )
+                    )
+                    applied += 1
+
+            count = await conn.scalar(
+                select(func.count())
+                .select_from(contacts)
+                .where(contacts.c.user_id == user_id)
+            )
+            await conn.execute(
+                update(counters)
+                .where(counters.c.user_id == user_id)
+                .values(last_change_seq=seq, contact_count=count)
+            )
+        return applied
+
+    async def _purge(self, engine: AsyncEngine, user_id: int) -> None:
+        async with engine.begin() as conn:
+            for table in self.tables:
+                await conn.execute(delete(table).where(table.c.user_id == user_id))
+
+    async def _set_placement(self, user: User, shard: str) -> None:
+        from src.services.auth import forget_cached_user
+
+        async with self.manager.session() as db:
+            await db.execute(
+                update(User).where(User.id == user.id).values(contacts_shard=shard)
+            )
+            await db.commit()
+        # Authenticated users are cached with their placement.
+        await forget_cached_user(user.username, self.redis)
+
+
+async def pin_users(manager: "DatabaseSessionManager", batch_size: int = 1000) -> int:
+    """
+    Store the current ring placement on every user that has none, so that
+    changing the ring does not re-route them.
+
+    Returns:
+        The number of users pinned.
+    """
+    pinned = 0
+    last_id = 0
+    while True:
+        async with manager.session() as db:
+            result = await db.execute(
+                select(User.id)
+                .where(User.id > last_id, User.contacts_shard.is_(None))
+                .order_by(User.id)
+                .limit(batch_size)
+            )
+            ids = result.scalars().all()
+            if not ids:
+                return pinned
+            for user_id in ids:
+                await db.execute(
+                    update(User)
+                    .where(User.id == user_id)
+                    .values(contacts_shard=manager.ring.node_for(user_id))
+                )
+            await db.commit()
+        pinned += len(ids)
+        last_id = ids[-1]
+
+
+async def misplaced_users(manager: "DatabaseSessionManager") -> list[tuple[int, str]]:
+    """
+    List the users whose contacts are not on the shard the ring assigns.
+
+    Returns:
+        ``(user_id, shard)`` pairs naming the shard each user belongs on.
+    """
+    async with manager.session() as db:
+        result = await db.execute(
+            select(User.id, User.contacts_shard).where(User.contacts_shard.is_not(None))
+        )
+        rows = result.all()
+    return [
+        (user_id, manager.ring.node_for(user_id))
+        for user_id, shard in rows
+        if shard != manager.ring.node_for(user_id)
+    ]
+
+
+async def _run(args: argparse.Namespace) -> None:
+    from src.database.db import sessionmanager
+    from src.services.cache import redis_client
+
+    if not sessionmanager.sharded:
+        raise SystemExit("DB_SHARD_URLS is not configured")
+    try:
+        if args.command == "init":
+            names = [args.shard] if args.shard else sessionmanager.ring.nodes
+            for name in names:
+                await init_shard(sessionmanager.shard_engine(name), args.id_offset)
+                print(f"initialized {name}")
+        elif args.command == "pin":
+            print(f"pinned {await pin_users(sessionmanager)} users")
+        elif args.command == "move":
+            mover = ShardMover(sessionmanager, redis_client, args.batch_size)
+            copied = await mover.move(args.user_id, args.shard)
+            print(f"moved {copied} contacts")
+        elif args.command == "rebalance":
+            mover = ShardMover(sessionmanager, redis_client, args.batch_size)
+            for user_id, shard in await misplaced_users(sessionmanager):
+                if args.dry_run:
+                    print(f"user {user_id} -> {shard}")
+                else:
+                    copied = await mover.move(user_id, shard)
+                    print(f"user {user_id} -> {shard}: {copied} contacts")
+    finally:
+        await redis_client.aclose()
+        await sessionmanager.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage contact shards.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init", help="create the shard schema")
+    init.add_argument("--shard", help="only this shard")
+    init.add_argument("--id-offset", type=int, default=0)
+    commands.add_parser("pin", help="store the ring placement on every user")
+    move = commands.add_parser("move", help="move a user's contacts")
+    move.add_argument("user_id", type=int)
+    move.add_argument("shard")
+    rebalance = commands.add_parser("rebalance", help="move users to the ring")
+    rebalance.add_argument("--dry-run", action="store_true")
+    for command in (move, rebalance):
+        command.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args(argv)
+    if args.command == "init" and args.id_offset and not args.shard:
+        parser.error("--id-offset needs --shard")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
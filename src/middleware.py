@@ -0,0 +1,302 @@
+import hashlib
+import logging
+import time
+import zlib
+from importlib.util import find_spec
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class FirstRequestTimer:
+    """
+    Measures the first HTTP request served by a worker.
+
+    The latency is logged and stored in ``app.state.first_request_ms``; every
+    later request is passed straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.pending = True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if not self.pending or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.pending = False
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = round((time.perf_counter() - start) * 1000, 2)
+            if "app" in scope:
+                scope["app"].state.first_request_ms = elapsed
+            logger.info(
+                "First request %s %s served in %.1f ms",
+                scope["method"],
+                scope["path"],
+                elapsed,
+            )
+
+
+class _Encoder:
+    """Incremental compressor of one response body."""
+
+    def __init__(self, compress, flush, finish):
+        self.compress = compress
+        self.flush = flush
+        self.finish = finish
+
+
+def _gzip_encoder() -> _Encoder:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return _Encoder(
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def _brotli_encoder() -> _Encoder:
+    import brotli
+
+    compressor = brotli.Compressor(quality=4)
+    return _Encoder(compressor.process, compressor.flush, compressor.finish)
+
+
+def _zstd_encoder() -> _Encoder:
+    import zstandard
+
+    compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    return _Encoder(
+        compressor.compress,
+        lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush,
+    )
+
+
+# In order of preference; brotli and zstd only when their package is installed.
+ENCODERS: dict[str, Callable[[], _Encoder]] = {
+    "br": _brotli_encoder,
+    "zstd": _zstd_encoder,
+    "gzip": _gzip_encoder,
+}
+_ENCODER_MODULES = {"br": "brotli", "zstd": "zstandard"}
+
+
+def available_encodings() -> list[str]:
+    return [
+        name
+        for name in ENCODERS
+        if name not in _ENCODER_MODULES or find_spec(_ENCODER_MODULES[name])
+    ]
+
+
+def _accepted(header: str) -> dict[str, float]:
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies with the best encoding the client accepts:
+    brotli or zstd when installed, else gzip.
+
+    Bodies sent in one piece are compressed only from ``minimum_size`` bytes
+    on. Streamed bodies, like the NDJSON exports, are compressed chunk by
+    chunk and flushed after each one, so the client still receives every
+    record as soon as it is produced. Event streams, already encoded bodies
+    and media types that do not compress are passed through.
+    """
+
+    SKIPPED_TYPES = ("text/event-stream", "image/", "video/", "audio/")
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: list[str] | None = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings if encodings is not None else available_encodings()
+
+    def choose(self, accept_encoding: str) -> str | None:
+        accepted = _accepted(accept_encoding)
+        for name in self.encodings:
+            if accepted.get(name, accepted.get("*", 0.0)) > 0:
+                return name
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.choose(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        encoder: _Encoder | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(scope=start)
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or start["status"] in (204, 304)
+                    or content_type.startswith(self.SKIPPED_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    await send(start)
+                    await send(message)
+                    start = None
+                    return
+                encoder = ENCODERS[encoding]()
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                await send(start)
+
+            if more_body:
+                body = encoder.compress(body) + encoder.flush()
+            else:
+                body = encoder.compress(body) + encoder.finish()
+            await send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_compressed)
+
+
+def weak_etag(body: bytes, *headers: tuple[bytes, bytes]) -> str:
+    """A weak ETag of ``body`` and of the given ``(name, value)`` headers."""
+    digest = hashlib.blake2b(body, digest_size=16)
+    for name, value in headers:
+        digest.update(b"\n" + name.lower() + b": " + value)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """Weak comparison of ``etag`` with an ``If-None-Match`` header."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+class ConditionalGetMiddleware:
+    """
+    Adds a weak ETag to successful GET responses sent in one piece and
+    answers ``304 Not Modified`` when it matches ``If-None-Match``, so a
+    client polling an unchanged resource does not download it again.
+
+    The tag is a hash of the body and of the headers in ``TAGGED_HEADERS``,
+    which carry data next to it, so the endpoint still runs; what is saved
+    is the transfer. Responses to requests with an ``Authorization`` header
+    get ``Vary: Authorization``, as they depend on the user. Streamed
+    responses are left alone.
+    """
+
+    # Headers that change with the resource although the body may not.
+    TAGGED_HEADERS = ("x-total-count",)
+
+    # Headers a 304 repeats from the response it stands for (RFC 9110 15.4.5).
+    KEPT_HEADERS = (
+        "cache-control",
+        "content-location",
+        "date",
+        "etag",
+        "expires",
+        "vary",
+    )
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        authorized = "authorization" in request_headers
+        start: Message | None = None
+
+        async def send_tagged(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            response_start, start = start, None
+            headers = MutableHeaders(scope=response_start)
+            if response_start["status"] != 200 or message.get("more_body", False):
+                await send(response_start)
+                await send(message)
+                return
+            if authorized:
+                headers.add_vary_header("Authorization")
+            tagged = sorted(
+                (name.lower(), value)
+                for name, value in response_start["headers"]
+                if name.decode("latin-1").lower() in self.TAGGED_HEADERS
+            )
+            etag = headers.get("etag") or weak_etag(message.get("body", b""), *tagged)
+            headers["ETag"] = etag
+            if if_none_match and etag_matches(etag, if_none_match):
+                kept = [
+                    (name, value)
+                    for name, value in response_start["headers"]
+                    if name.decode("latin-1").lower() in self.KEPT_HEADERS
+                ]
+                await send(
+                    {"type": "http.response.start", "status": 304, "headers": kept}
+                )
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(response_start)
+            await send(message)
+
+        await self.app(scope, receive, send_tagged)
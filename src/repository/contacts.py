@@ -1,19 +1,103 @@
-from typing import List
+from functools import lru_cache
+from typing import AsyncIterator, List, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Integer, RowMapping, Select, any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.expression import or_
-from sqlalchemy import func
 
-from src.database.models import Contact, User
+from src.conf.config import settings
+from src.database.models import (
+    Contact,
+    ContactCounter,
+    ContactTombstone,
+    User,
+    birthday_key,
+)
 from src.schemas import ContactModel
+from src.services.normalization import normalize_email, normalize_phone
 
-from datetime import datetime, timedelta
+import calendar
+from datetime import date, datetime, timedelta
+
+
+def birthday_window(today: date, days: int) -> list[int]:
+    """
+    List the MMDD keys (see ``birthday_key``) of ``today`` and the ``days``
+    days after it. The window may wrap around the new year. In non-leap
+    years, February 29th birthdays are celebrated on March 1st.
+    """
+    keys = []
+    for offset in range(days + 1):
+        day = today + timedelta(days=offset)
+        keys.append(day.month * 100 + day.day)
+        if day.month == 3 and day.day == 1 and not calendar.isleap(day.year):
+            keys.append(229)
+    return keys
+
+
+def _normalize(contact: Contact) -> None:
+    contact.email_normalized = normalize_email(contact.email)
+    contact.phone_normalized = normalize_phone(
+        contact.phone, settings.CONTACTS_PHONE_COUNTRY_CODE
+    )
+
+
+# Statements of the hottest reads, built once per process. Executing the same
+# statement object reuses its memoized cache key, so each call skips building
+# the construct and hashing it for the compiled cache; asyncpg then reuses the
+# per-connection prepared statement for the identical SQL.
+_CONTACTS_PAGE = (
+    select(Contact)
+    .where(Contact.user_id == bindparam("user_id"))
+    .where(
+        or_(
+            Contact.first_name.contains(bindparam("name")),
+            Contact.last_name.contains(bindparam("name")),
+        )
+    )
+    .where(Contact.email.contains(bindparam("email")))
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_CONTACT_BY_ID = select(Contact).where(
+    Contact.id == bindparam("contact_id"), Contact.user_id == bindparam("user_id")
+)
+
+# PostgreSQL gets the ids as one array parameter, so the SQL, and the
+# prepared statement, is the same for any number of them.
+_CONTACTS_BY_IDS = {
+    "postgresql": select(Contact).where(
+        Contact.user_id == bindparam("user_id"),
+        Contact.id == any_(bindparam("ids", type_=ARRAY(Integer))),
+    ),
+    "default": select(Contact).where(
+        Contact.user_id == bindparam("user_id"),
+        Contact.id.in_(bindparam("ids", expanding=True)),
+    ),
+}
+
+
+@lru_cache(maxsize=256)
+def _only_columns(stmt: Select, fields: tuple[str, ...]) -> Select:
+    """``stmt`` selecting only the ``fields`` columns, built once per set."""
+    return stmt.with_only_columns(*(getattr(Contact, name) for name in fields))
+
+
+class ContactQuotaExceeded(Exception):
+    """Raised when a user would have more contacts than allowed."""
+
+    def __init__(self, quota: int):
+        super().__init__(f"Contact quota of {quota} exceeded")
+        self.quota = quota
 
 
 class ContactRepository:
     """
     Repository for managing contact-related database operations.
+
+    Every query filters on ``user_id``, the partition (and shard) key of the
+    contacts table, so PostgreSQL only scans the owner's partition.
     """
 
     def __init__(self, session: AsyncSession):
@@ -25,9 +109,86 @@ class ContactRepository:
         """
         self.db = session
 
+    async def _next_change_seq(
+        self, user: User, added: int = 0, quota: int | None = None
+    ) -> int:
+        """
+        Claim the next position in the user's change feed, and adjust the
+        user's contact count in the same statement.
+
+        The counter row stays locked until the transaction ends, so a user's
+        changes become visible in the order of their positions and a reader
+        never skips one that commits late. The lock also makes the quota
+        check atomic with the change.
+
+        Args:
+            user: The owner of the changed contact.
+            added: The change in the number of contacts, e.g. 1 or -1.
+            quota: The most contacts the user may have after the change.
+
+        Returns:
+            The claimed position.
+
+        Raises:
+            ContactQuotaExceeded: If the change would exceed ``quota``.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        if quota is not None and added > quota:
+            raise ContactQuotaExceeded(quota)
+        stmt = (
+            insert(ContactCounter)
+            .values(user_id=user.id, last_change_seq=1, contact_count=max(added, 0))
+            .on_conflict_do_update(
+                index_elements=[ContactCounter.user_id],
+                set_={
+                    "last_change_seq": ContactCounter.last_change_seq + 1,
+                    "contact_count": ContactCounter.contact_count + added,
+                },
+                where=(
+                    ContactCounter.contact_count + added <= quota
+                    if quota is not None
+                    else None
+                ),
+            )
+            .returning(ContactCounter.last_change_seq)
+        )
+        result = await self.db.execute(stmt)
+        seq = result.scalar_one_or_none()
+        if seq is None:
+            raise ContactQuotaExceeded(quota)
+        return seq
+
+    async def count_contacts(self, user: User) -> int:
+        """
+        Return how many contacts the user has, from the maintained counter
+        rather than by counting rows.
+
+        Args:
+            user: The owner of the contacts.
+
+        Returns:
+            The number of contacts.
+        """
+        count = await self.db.scalar(
+            select(ContactCounter.contact_count).where(
+                ContactCounter.user_id == user.id
+            )
+        )
+        return count or 0
+
     async def get_contacts(
-        self, name: str, email: str, skip: int, limit: int, user: User
-    ) -> List[Contact]:
+        self,
+        name: str,
+        email: str,
+        skip: int,
+        limit: int,
+        user: User,
+        fields: Sequence[str] | None = None,
+    ) -> List[Contact] | List[RowMapping]:
         """
         Retrieve a list of contacts owned by a user, filtered by name and email with pagination.
 
@@ -37,50 +198,191 @@ class ContactRepository:
             skip: The number of contacts to skip.
             limit: The maximum number of contacts to return.
             user: The owner of the contacts.
+            fields: Select only these columns, see ``CONTACT_FIELDS``.
+
+        Returns:
+            A list of Contact objects matching the filters, or of rows with
+            just ``fields`` when given.
+        """
+        stmt = _CONTACTS_PAGE
+        if fields is not None:
+            stmt = _only_columns(stmt, tuple(fields))
+        contacts = await self.db.execute(
+            stmt,
+            {
+                "user_id": user.id,
+                "name": name,
+                "email": email,
+                "skip": skip,
+                "limit": limit,
+            },
+        )
+        if fields is not None:
+            return contacts.mappings().all()
+        return contacts.scalars().all()
+
+    async def lookup_contacts(
+        self, user: User, phone: str | None = None, email: str | None = None
+    ) -> List[Contact]:
+        """
+        Retrieve the contacts with exactly this phone number and/or email,
+        however either was formatted when entered.
+
+        Both values are normalized like the stored ones, so the lookup is an
+        equality match on the ``(user_id, phone_normalized)`` or
+        ``(user_id, email_normalized)`` index.
+
+        Args:
+            user: The owner of the contacts.
+            phone: The phone number to match, in any format.
+            email: The email address to match.
 
         Returns:
-            A list of Contact objects matching the filters.
+            The contacts matching every given value.
+        """
+        stmt = select(Contact).where(Contact.user_id == user.id)
+        if phone is not None:
+            phone = normalize_phone(phone, settings.CONTACTS_PHONE_COUNTRY_CODE)
+            if phone is None:
+                return []
+            stmt = stmt.where(Contact.phone_normalized == phone)
+        if email is not None:
+            stmt = stmt.where(Contact.email_normalized == normalize_email(email))
+        result = await self.db.execute(stmt.order_by(Contact.id))
+        return result.scalars().all()
+
+    async def get_contacts_after(
+        self, user: User, after_id: int, limit: int
+    ) -> List[Contact]:
+        """
+        Retrieve one page of a user's contacts in id order, after ``after_id``.
+
+        Args:
+            user: The owner of the contacts.
+            after_id: The last ID of the previous page, 0 for the first.
+            limit: The maximum number of contacts to return.
+
+        Returns:
+            The contacts of the page.
         """
         stmt = (
             select(Contact)
-            .filter_by(user=user)
-            .where(
-                or_(Contact.first_name.contains(name), Contact.last_name.contains(name))
-            )
-            .where(Contact.email.contains(email))
-            .offset(skip)
+            .where(Contact.user_id == user.id, Contact.id > after_id)
+            .order_by(Contact.id)
             .limit(limit)
         )
         contacts = await self.db.execute(stmt)
         return contacts.scalars().all()
 
-    async def get_contact_by_id(self, contact_id: int, user: User) -> Contact | None:
+    async def get_first_contacts(
+        self, users: Sequence[User], per_user: int
+    ) -> List[Contact]:
+        """
+        Retrieve the first ``per_user`` contacts, in id order, of each of
+        ``users`` in one query.
+
+        Args:
+            users: The owners of the contacts.
+            per_user: The maximum number of contacts per owner.
+
+        Returns:
+            The contacts, ordered by owner and id.
+        """
+        ranked = (
+            select(
+                Contact.id,
+                Contact.user_id,
+                func.row_number()
+                .over(partition_by=Contact.user_id, order_by=Contact.id)
+                .label("position"),
+            )
+            .where(Contact.user_id.in_([user.id for user in users]))
+            .subquery()
+        )
+        stmt = (
+            select(Contact)
+            .join(
+                ranked,
+                (Contact.id == ranked.c.id) & (Contact.user_id == ranked.c.user_id),
+            )
+            .where(ranked.c.position <= per_user)
+            .order_by(Contact.user_id, Contact.id)
+        )
+        contacts = await self.db.execute(stmt)
+        return contacts.scalars().all()
+
+    async def stream_contacts(
+        self, user: User, batch_size: int = 1000
+    ) -> AsyncIterator[Contact]:
+        """
+        Yield every contact of a user in id order, read through a server-side
+        cursor ``batch_size`` rows at a time.
+
+        Args:
+            user: The owner of the contacts.
+            batch_size: The number of rows fetched per round trip.
+        """
+        stmt = (
+            select(Contact)
+            .where(Contact.user_id == user.id)
+            .order_by(Contact.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream(stmt)
+        async for contact in result.scalars():
+            yield contact
+
+    async def get_contact_by_id(
+        self, contact_id: int, user: User, fields: Sequence[str] | None = None
+    ) -> Contact | RowMapping | None:
         """
         Retrieve a contact by its ID.
 
         Args:
             contact_id: The ID of the contact.
             user: The owner of the contact.
+            fields: Select only these columns, see ``CONTACT_FIELDS``.
 
         Returns:
-            The contact if found, otherwise None.
+            The contact if found, as a row with just ``fields`` when given,
+            otherwise None.
         """
-        stmt = select(Contact).filter_by(id=contact_id, user=user)
-        contact = await self.db.execute(stmt)
+        stmt = _CONTACT_BY_ID
+        if fields is not None:
+            stmt = _only_columns(stmt, tuple(fields))
+        contact = await self.db.execute(
+            stmt, {"contact_id": contact_id, "user_id": user.id}
+        )
+        if fields is not None:
+            return contact.mappings().one_or_none()
         return contact.scalar_one_or_none()
 
-    async def create_contact(self, body: ContactModel, user: User) -> Contact:
+    async def create_contact(
+        self, body: ContactModel, user: User, quota: int | None = None
+    ) -> Contact:
         """
         Create a new contact.
 
         Args:
             body: A ContactModel containing contact details.
             user: The owner of the contact.
+            quota: The most contacts the user may have, None for no limit.
 
         Returns:
             The newly created Contact object.
+
+        Raises:
+            ContactQuotaExceeded: If the user already has ``quota`` contacts.
         """
-        contact = Contact(**body.model_dump(exclude_unset=True), user=user)
+        # Link by key rather than through the relationship, so the user
+        # (loaded by a different session during authentication) is not
+        # cascaded into this one.
+        contact = Contact(
+            **body.model_dump(exclude_unset=True),
+            user_id=user.id,
+            change_seq=await self._next_change_seq(user, added=1, quota=quota),
+        )
+        _normalize(contact)
         self.db.add(contact)
         await self.db.commit()
         await self.db.refresh(contact)
@@ -104,10 +406,24 @@ class ContactRepository:
         if contact:
             for key, value in body.model_dump(exclude_unset=True).items():
                 setattr(contact, key, value)
+            _normalize(contact)
+            contact.change_seq = await self._next_change_seq(user)
             await self.db.commit()
             await self.db.refresh(contact)
         return contact
 
+    async def _delete(self, contact: Contact, user: User) -> None:
+        # The deleted contact carries the position of its deletion.
+        contact.change_seq = await self._next_change_seq(user, added=-1)
+        self.db.add(
+            ContactTombstone(
+                contact_id=contact.id,
+                user_id=user.id,
+                change_seq=contact.change_seq,
+            )
+        )
+        await self.db.delete(contact)
+
     async def remove_contact(self, contact_id: int, user: User) -> Contact | None:
         """
         Remove a contact by its ID.
@@ -121,10 +437,153 @@ class ContactRepository:
         """
         contact = await self.get_contact_by_id(contact_id, user)
         if contact:
-            await self.db.delete(contact)
+            await self._delete(contact, user)
             await self.db.commit()
         return contact
 
+    async def get_dedup_rows(self, user: User) -> list:
+        """
+        Retrieve the fields compared when looking for duplicates, for all of
+        the user's contacts. Plain rows, as building ORM objects for a large
+        address book costs more than comparing them.
+
+        Args:
+            user: The owner of the contacts.
+
+        Returns:
+            One row per contact, with the id, names, email, phone and
+            birthday.
+        """
+        stmt = select(
+            Contact.id,
+            Contact.first_name,
+            Contact.last_name,
+            Contact.email,
+            Contact.phone,
+            Contact.birthday,
+        ).where(Contact.user_id == user.id)
+        result = await self.db.execute(stmt)
+        return result.all()
+
+    async def get_contacts_by_ids(
+        self, contact_ids: list[int], user: User
+    ) -> List[Contact]:
+        """
+        Retrieve several contacts of a user by their IDs.
+
+        Args:
+            contact_ids: The IDs of the contacts.
+            user: The owner of the contacts.
+
+        Returns:
+            The contacts found, in no particular order.
+        """
+        dialect = self.db.get_bind().dialect.name
+        stmt = _CONTACTS_BY_IDS.get(dialect, _CONTACTS_BY_IDS["default"])
+        result = await self.db.execute(
+            stmt, {"user_id": user.id, "ids": list(contact_ids)}
+        )
+        return result.scalars().all()
+
+    async def merge_contacts(
+        self,
+        primary_id: int,
+        duplicate_ids: list[int],
+        fields: dict,
+        user: User,
+    ) -> tuple[Contact, List[Contact]] | None:
+        """
+        Merge duplicates into a primary contact in one transaction.
+
+        The duplicates are deleted first, so the primary contact can take
+        over their email or phone number through ``fields``.
+
+        Args:
+            primary_id: The ID of the contact that is kept.
+            duplicate_ids: The IDs of the contacts merged into it.
+            fields: Values to set on the primary contact.
+            user: The owner of the contacts.
+
+        Returns:
+            The updated primary contact and the deleted duplicates, or None
+            if any of the contacts was not found.
+        """
+        contacts = await self.get_contacts_by_ids([primary_id, *duplicate_ids], user)
+        by_id = {contact.id: contact for contact in contacts}
+        if primary_id not in by_id or len(by_id) != len({*duplicate_ids}) + 1:
+            return None
+
+        duplicates = [by_id[contact_id] for contact_id in sorted({*duplicate_ids})]
+        for duplicate in duplicates:
+            await self._delete(duplicate, user)
+        await self.db.flush()
+
+        primary = by_id[primary_id]
+        for key, value in fields.items():
+            setattr(primary, key, value)
+        _normalize(primary)
+        primary.change_seq = await self._next_change_seq(user)
+        await self.db.commit()
+        await self.db.refresh(primary)
+        return primary, duplicates
+
+    async def get_changes(self, user: User, since: int, limit: int) -> dict:
+        """
+        Retrieve the contacts created, updated or deleted after a position in
+        the user's change feed.
+
+        Args:
+            user: The owner of the contacts.
+            since: The position returned by the previous call, 0 for all.
+            limit: The maximum number of changes to return.
+
+        Returns:
+            A dict with the ``changed`` contacts, the ids of ``deleted``
+            contacts, the ``next`` position to pass as ``since`` and whether
+            more changes are pending (``has_more``).
+        """
+        # Positions up to the current head are all committed, so reading
+        # below it gives a consistent cut across both tables.
+        head = await self.db.scalar(
+            select(ContactCounter.last_change_seq).where(
+                ContactCounter.user_id == user.id
+            )
+        )
+        head = head or 0
+        changed = await self.db.execute(
+            select(Contact)
+            .where(
+                Contact.user_id == user.id,
+                Contact.change_seq > since,
+                Contact.change_seq <= head,
+            )
+            .order_by(Contact.change_seq)
+            .limit(limit + 1)
+        )
+        deleted = await self.db.execute(
+            select(ContactTombstone.change_seq, ContactTombstone.contact_id)
+            .where(
+                ContactTombstone.user_id == user.id,
+                ContactTombstone.change_seq > since,
+                ContactTombstone.change_seq <= head,
+            )
+            .order_by(ContactTombstone.change_seq)
+            .limit(limit + 1)
+        )
+        events = sorted(
+            [(contact.change_seq, contact) for contact in changed.scalars()]
+            + [(seq, contact_id) for seq, contact_id in deleted],
+            key=lambda event: event[0],
+        )
+        page = events[:limit]
+        has_more = len(events) > limit
+        return {
+            "changed": [item for _, item in page if isinstance(item, Contact)],
+            "deleted": [item for _, item in page if not isinstance(item, Contact)],
+            "next": page[-1][0] if has_more else max(head, since),
+            "has_more": has_more,
+        }
+
     async def get_birthdays(self, user: User) -> list[Contact]:
         """
         Retrieve contacts with upcoming birthdays within the next 7 days.
@@ -135,16 +594,31 @@ class ContactRepository:
         Returns:
             A list of contacts whose birthdays fall within the next 7 days.
         """
-        today = datetime.now().date()
-        week = today + timedelta(days=7)
+        return await self.get_birthdays_for_users([user.id], datetime.now().date())
 
-        stmt = select(Contact).where(
-            Contact.user == user,
-            or_(
-                func.to_char(Contact.birthday, "MM-DD").between(
-                    today.strftime("%m-%d"), week.strftime("%m-%d")
-                )
-            ),
+    async def get_birthdays_for_users(
+        self, user_ids: list[int], today: date, days: int = 7
+    ) -> list[Contact]:
+        """
+        Retrieve the contacts of several users whose birthdays fall within
+        ``days`` days from ``today``, in a single query.
+
+        Args:
+            user_ids: The owners of the contacts.
+            today: The first day of the window.
+            days: The number of days after ``today`` in the window.
+
+        Returns:
+            The matching contacts, ordered by owner and birthday.
+        """
+        key = birthday_key(Contact.birthday)
+        stmt = (
+            select(Contact)
+            .where(
+                Contact.user_id.in_(user_ids),
+                key.in_(birthday_window(today, days)),
+            )
+            .order_by(Contact.user_id, key)
         )
         result = await self.db.execute(stmt)
         return result.scalars().all()
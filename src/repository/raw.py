@@ -0,0 +1,137 @@
+from functools import lru_cache
+from typing import List, Sequence
+
+from src.database.models import User, UserRole
+from src.schemas import CONTACT_FIELDS, ContactResponse
+
+# The same queries as ContactRepository and UserRepository, selecting only
+# the columns of the response. ``birthday`` is stored as a timestamp.
+_COLUMN_SQL = {"birthday": "birthday::date AS birthday"}
+_CONTACTS_PAGE = (
+    "SELECT {columns} FROM contacts "
+    "WHERE user_id = $1 "
+    "AND (first_name LIKE '%' || $2 || '%' OR last_name LIKE '%' || $2 || '%') "
+    "AND email LIKE '%' || $3 || '%' "
+    "OFFSET $4 LIMIT $5"
+)
+_CONTACT_BY_ID = "SELECT {columns} FROM contacts WHERE id = $1 AND user_id = $2"
+_CONTACTS_BY_IDS = (
+    "SELECT {columns} FROM contacts WHERE user_id = $1 AND id = ANY($2::int[])"
+)
+_USER_BY_USERNAME = (
+    "SELECT id, username, email, hashed_password, refresh_token, created_at, "
+    "avatar, confirmed, role, is_active, contacts_shard "
+    "FROM users WHERE username = $1"
+)
+
+
+@lru_cache(maxsize=256)
+def _sql(query: str, fields: tuple[str, ...]) -> str:
+    return query.format(columns=", ".join(_COLUMN_SQL.get(f, f) for f in fields))
+
+
+class RawContactRepository:
+    """
+    Read-only counterpart of ``ContactRepository`` on a plain asyncpg pool.
+
+    Records are mapped straight to ``ContactResponse`` without validation,
+    skipping the ORM's identity map and instance state, which dominate the
+    cost of reading a page of contacts.
+    """
+
+    def __init__(self, pool):
+        """
+        Initialize a RawContactRepository.
+
+        Args:
+            pool: A ``RawPool`` or an asyncpg pool.
+        """
+        self.pool = pool
+
+    async def get_contacts(
+        self,
+        name: str,
+        email: str,
+        skip: int,
+        limit: int,
+        user: User,
+        fields: Sequence[str] | None = None,
+    ) -> List[ContactResponse] | List[dict]:
+        """
+        Retrieve a list of contacts owned by a user, filtered by name and email with pagination.
+
+        Args:
+            name: The name filter for the contacts.
+            email: The email filter for the contacts.
+            skip: The number of contacts to skip.
+            limit: The maximum number of contacts to return.
+            user: The owner of the contacts.
+            fields: Select only these columns, see ``CONTACT_FIELDS``.
+
+        Returns:
+            A list of contacts matching the filters, as dicts of just
+            ``fields`` when given.
+        """
+        query = _sql(_CONTACTS_PAGE, tuple(fields or CONTACT_FIELDS))
+        records = await self.pool.fetch(query, user.id, name, email, skip, limit)
+        if fields is not None:
+            return [dict(record) for record in records]
+        return [ContactResponse.model_construct(**record) for record in records]
+
+    async def get_contact_by_id(
+        self, contact_id: int, user: User, fields: Sequence[str] | None = None
+    ) -> ContactResponse | dict | None:
+        """
+        Retrieve a contact by its ID.
+
+        Args:
+            contact_id: The ID of the contact.
+            user: The owner of the contact.
+            fields: Select only these columns, see ``CONTACT_FIELDS``.
+
+        Returns:
+            The contact if found, as a dict of just ``fields`` when given,
+            otherwise None.
+        """
+        query = _sql(_CONTACT_BY_ID, tuple(fields or CONTACT_FIELDS))
+        record = await self.pool.fetchrow(query, contact_id, user.id)
+        if record is None:
+            return None
+        if fields is not None:
+            return dict(record)
+        return ContactResponse.model_construct(**record)
+
+    async def get_contacts_by_ids(
+        self, contact_ids: list[int], user: User
+    ) -> List[ContactResponse]:
+        """
+        Retrieve several contacts of a user by their IDs.
+
+        Args:
+            contact_ids: The IDs of the contacts.
+            user: The owner of the contacts.
+
+        Returns:
+            The contacts found, in no particular order.
+        """
+        records = await self.pool.fetch(
+            _sql(_CONTACTS_BY_IDS, CONTACT_FIELDS), user.id, list(contact_ids)
+        )
+        return [ContactResponse.model_construct(**record) for record in records]
+
+
+class RawUserRepository:
+    """Read-only counterpart of ``UserRepository`` on a plain asyncpg pool."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def get_user_by_username(self, username: str) -> User | None:
+        # A transient User, like the ones authentication reads from the cache.
+        record = await self.pool.fetchrow(_USER_BY_USERNAME, username)
+        if record is None:
+            return None
+        fields = dict(record)
+        # PostgreSQL stores the enum by name.
+        fields["role"] = UserRole[fields["role"]]
+        return User(**fields)
@@ -1,36 +1,141 @@
-from sqlalchemy import select
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import Select, bindparam, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import User
+from src.database.models import User, UserRole
 from src.schemas import UserCreate
 
+# Lookups run on every authentication, built once per process; see the
+# statements at the top of ``src.repository.contacts``.
+_USER_BY_ID = select(User).where(User.id == bindparam("id"))
+_USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+_USER_BY_REFRESH_TOKEN = select(User).where(
+    User.username == bindparam("username"),
+    User.refresh_token == bindparam("refresh_token"),
+)
+
+
+def _filtered_users(
+    role: UserRole | None = None,
+    confirmed: bool | None = None,
+    active: bool | None = None,
+    search: str = "",
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+) -> Select:
+    stmt = select(User)
+    if role is not None:
+        stmt = stmt.where(User.role == role)
+    if confirmed is not None:
+        stmt = stmt.where(User.confirmed.is_(confirmed))
+    if active is not None:
+        stmt = stmt.where(User.is_active.is_(active))
+    if search:
+        stmt = stmt.where(
+            or_(User.username.icontains(search), User.email.icontains(search))
+        )
+    if created_after is not None:
+        stmt = stmt.where(User.created_at >= created_after)
+    if created_before is not None:
+        stmt = stmt.where(User.created_at < created_before)
+    return stmt
+
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
         self.db = session
 
     async def get_user_by_id(self, user_id: int) -> User | None:
-        stmt = select(User).filter_by(id=user_id)
-        user = await self.db.execute(stmt)
+        user = await self.db.execute(_USER_BY_ID, {"id": user_id})
         return user.scalar_one_or_none()
 
     async def get_user_by_username(self, username: str) -> User | None:
-        stmt = select(User).filter_by(username=username)
-        user = await self.db.execute(stmt)
+        user = await self.db.execute(_USER_BY_USERNAME, {"username": username})
         return user.scalar_one_or_none()
 
     async def get_user_by_refresh_token(
         self, username: str, refresh_token: str
     ) -> User | None:
-        stmt = select(User).filter_by(username=username, refresh_token=refresh_token)
-        user = await self.db.execute(stmt)
+        user = await self.db.execute(
+            _USER_BY_REFRESH_TOKEN,
+            {"username": username, "refresh_token": refresh_token},
+        )
         return user.scalar_one_or_none()
 
     async def get_user_by_email(self, email: str) -> User | None:
-        stmt = select(User).filter_by(email=email)
-        user = await self.db.execute(stmt)
+        user = await self.db.execute(_USER_BY_EMAIL, {"email": email})
         return user.scalar_one_or_none()
 
+    async def get_users_by_email_or_username(
+        self, email: str | None, username: str | None
+    ) -> list[User]:
+        # One round trip for both uniqueness checks of a registration.
+        conditions = []
+        if email is not None:
+            conditions.append(User.email == email)
+        if username is not None:
+            conditions.append(User.username == username)
+        if not conditions:
+            return []
+        stmt = select(User).where(or_(*conditions))
+        users = await self.db.execute(stmt)
+        return users.scalars().all()
+
+    async def get_identities_after(self, last_id: int, limit: int) -> list:
+        stmt = (
+            select(User.id, User.email, User.username)
+            .where(User.id > last_id)
+            .order_by(User.id)
+            .limit(limit)
+        )
+        rows = await self.db.execute(stmt)
+        return rows.all()
+
+    async def list_users(
+        self, after_id: int = 0, limit: int = 100, **filters
+    ) -> list[User]:
+        """
+        One page of users matching ``filters`` (see ``_filtered_users``),
+        in id order after ``after_id``. Keyset pagination costs the same on
+        the last page as on the first.
+        """
+        stmt = (
+            _filtered_users(**filters)
+            .where(User.id > after_id)
+            .order_by(User.id)
+            .limit(limit)
+        )
+        users = await self.db.execute(stmt)
+        return users.scalars().all()
+
+    async def stream_users(
+        self, batch_size: int = 1000, **filters
+    ) -> AsyncIterator[User]:
+        """
+        Every user matching ``filters``, in id order, read through a
+        server-side cursor ``batch_size`` rows at a time.
+        """
+        stmt = (
+            _filtered_users(**filters)
+            .order_by(User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream(stmt)
+        async for user in result.scalars():
+            yield user
+
+    async def deactivate_user(self, user_id: int) -> User | None:
+        user = await self.get_user_by_id(user_id)
+        if user is not None:
+            user.is_active = False
+            user.refresh_token = None
+            await self.db.commit()
+            await self.db.refresh(user)
+        return user
+
     async def create_user(self, body: UserCreate, avatar: str = None) -> User:
         user = User(
             **body.model_dump(exclude_unset=True, exclude={"password"}),
@@ -20,6 +20,61 @@ class ContactResponse(ContactModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Names accepted by the ``fields`` parameter of the contact reads.
+CONTACT_FIELDS = tuple(ContactResponse.model_fields)
+
+
+class ContactPartial(BaseModel):
+    """A contact read with ``fields``: only the requested fields are set."""
+
+    id: Optional[int] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    birthday: Optional[date] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class ContactIds(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=500)
+
+
+class ContactsById(BaseModel):
+    # In the order of the requested ids, each once.
+    items: list[ContactResponse]
+    # Requested ids that are not the user's contacts.
+    missing: list[int]
+
+
+class ContactChanges(BaseModel):
+    changed: list[ContactResponse]
+    deleted: list[int]
+    next: int
+    has_more: bool
+
+
+class DuplicateGroup(BaseModel):
+    score: float
+    contacts: list[ContactResponse]
+
+
+class ContactFields(BaseModel):
+    first_name: Optional[str] = Field(None, min_length=2, max_length=50)
+    last_name: Optional[str] = Field(None, min_length=2, max_length=50)
+    email: Optional[EmailStr] = Field(None, min_length=7, max_length=100)
+    phone: Optional[str] = Field(None, min_length=7, max_length=20)
+    birthday: Optional[date] = None
+
+
+class ContactMerge(BaseModel):
+    primary_id: int
+    duplicate_ids: list[int] = Field(min_length=1, max_length=100)
+    # Values for the merged contact, e.g. the phone number of a duplicate.
+    fields: ContactFields = ContactFields()
+
+
 class User(BaseModel):
     id: int
     username: str
@@ -30,6 +85,29 @@ class User(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AdminUser(User):
+    avatar: Optional[str]
+    confirmed: bool
+    is_active: bool
+    created_at: Optional[datetime]
+
+
+class AdminUserContacts(AdminUser):
+    # The user's first contacts in id order, see ``contacts`` on /admin/users.
+    contacts: list[ContactResponse]
+
+
+class UserPage(BaseModel):
+    items: list[AdminUserContacts | AdminUser]
+    # Pass as ``after_id`` for the next page; None on the last one.
+    next_after_id: Optional[int]
+
+
+class ContactPage(BaseModel):
+    items: list[ContactResponse]
+    next_after_id: Optional[int]
+
+
 class UserCreate(BaseModel):
     username: str
     email: str
@@ -0,0 +1,59 @@
+"""
+Production entry point::
+
+    python -m src.server [--host HOST] [--port PORT] [--workers N]
+
+Defaults come from ``APP_HOST``, ``APP_PORT`` and ``APP_WORKERS``. uvloop and
+httptools are used when installed (``uvicorn[standard]``), otherwise the
+pure-Python asyncio loop and h11 parser.
+"""
+
+import argparse
+import copy
+import importlib.util
+
+import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+
+from src.conf.config import settings
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def log_config() -> dict:
+    # Workers are spawned processes, so application loggers have to be part
+    # of the config uvicorn applies in each of them.
+    config = copy.deepcopy(LOGGING_CONFIG)
+    config["loggers"]["src"] = {
+        "handlers": ["default"],
+        "level": "INFO",
+        "propagate": False,
+    }
+    return config
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the contacts API.")
+    parser.add_argument("--host", default=settings.APP_HOST)
+    parser.add_argument("--port", type=int, default=settings.APP_PORT)
+    parser.add_argument("--workers", type=int, default=settings.APP_WORKERS)
+    args = parser.parse_args(argv)
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop" if _available("uvloop") else "asyncio",
+        http="httptools" if _available("httptools") else "h11",
+        lifespan="on",
+        proxy_headers=True,
+        timeout_graceful_shutdown=settings.APP_GRACEFUL_SHUTDOWN_SECONDS,
+        log_config=log_config(),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+User management for administrators.
+
+Reports read from a replica when one is configured, and exports stream rows
+through a server-side cursor, so neither loads whole tables into memory nor
+holds locks that OLTP traffic would wait on.
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import sessionmanager
+from src.database.models import User
+from src.repository.contacts import ContactRepository
+from src.repository.users import UserRepository
+from src.schemas import AdminUser, ContactResponse
+from src.services.auth import forget_cached_user
+from src.services.loaders import DataLoader
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def contacts_read_session(user: User) -> AsyncIterator[AsyncSession]:
+    """Read session on the database holding ``user``'s contacts."""
+    if sessionmanager.sharded:
+        session = sessionmanager.shard_session(sessionmanager.shard_for(user))
+    else:
+        session = sessionmanager.read_session()
+    async with session as db:
+        yield db
+
+
+def contacts_loader(per_user: int) -> DataLoader[User, list]:
+    """
+    Loader of the first ``per_user`` contacts of users, batching the users
+    by the database holding their contacts.
+    """
+
+    async def batch(users: Sequence[User]) -> list[list]:
+        by_database: dict[str | None, list[User]] = {}
+        for user in users:
+            shard = sessionmanager.shard_for(user) if sessionmanager.sharded else None
+            by_database.setdefault(shard, []).append(user)
+        found: dict[int, list] = {user.id: [] for user in users}
+        for group in by_database.values():
+            async with contacts_read_session(group[0]) as db:
+                contacts = await ContactRepository(db).get_first_contacts(
+                    group, per_user
+                )
+            for contact in contacts:
+                found[contact.user_id].append(contact)
+        return [found[user.id] for user in users]
+
+    return DataLoader(batch)
+
+
+class AdminService:
+    def __init__(self, db: AsyncSession):
+        self.repository = UserRepository(db)
+
+    async def list_users(
+        self, after_id: int, limit: int, contacts: int = 0, **filters
+    ) -> dict:
+        """
+        One page of users; with ``contacts``, each with up to that many of
+        their first contacts, loaded in one query per database.
+        """
+        users = await self.repository.list_users(after_id, limit, **filters)
+        items = users
+        if contacts:
+            loader = contacts_loader(contacts)
+            items = [
+                {**AdminUser.model_validate(user).model_dump(), "contacts": found}
+                for user, found in zip(users, await loader.load_many(users))
+            ]
+        return {
+            "items": items,
+            "next_after_id": users[-1].id if len(users) == limit else None,
+        }
+
+    async def get_user(self, user_id: int) -> User | None:
+        return await self.repository.get_user_by_id(user_id)
+
+    async def deactivate_user(self, user_id: int) -> User | None:
+        """
+        Deactivate a user and drop their cached copy.
+
+        Raises:
+            RedisError: When the cached copy could not be dropped. The user
+                is deactivated in the database already, and calling this
+                again retries dropping it.
+        """
+        from redis.exceptions import RedisError
+
+        user = await self.repository.deactivate_user(user_id)
+        if user is not None:
+            # Authentication checks is_active when it loads the user, so the
+            # cached copy has to go.
+            try:
+                await forget_cached_user(user.username)
+            except RedisError as e:
+                logger.warning("Dropping a deactivated user failed: %s", e)
+                raise
+        return user
+
+    async def list_contacts(self, user: User, after_id: int, limit: int) -> dict:
+        async with contacts_read_session(user) as db:
+            contacts = await ContactRepository(db).get_contacts_after(
+                user, after_id, limit
+            )
+        return {
+            "items": contacts,
+            "next_after_id": contacts[-1].id if len(contacts) == limit else None,
+        }
+
+
+async def export_users(**filters) -> AsyncIterator[str]:
+    """
+    Yield the users matching ``filters`` as newline-delimited JSON.
+
+    The session is opened here rather than taken from a dependency, because
+    it has to stay open while the response is being sent.
+    """
+    async with sessionmanager.read_session() as db:
+        async for user in UserRepository(db).stream_users(**filters):
+            yield AdminUser.model_validate(user).model_dump_json() + "\n"
+
+
+async def export_contacts(user: User) -> AsyncIterator[str]:
+    """Yield the contacts of ``user`` as newline-delimited JSON."""
+    async with contacts_read_session(user) as db:
+        async for contact in ContactRepository(db).stream_contacts(user):
+            yield ContactResponse.model_validate(contact).model_dump_json() + "\n"
@@ -1,28 +1,59 @@
 from datetime import datetime, timedelta, UTC
-from typing import Optional, Literal
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional, Literal
 
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 
-from src.database.db import get_db
+from src.database.db import get_read_db
+from src.database.raw import raw_pool, raw_reads_enabled
 from src.conf.config import settings
+from src.conf.lazy import LazyObject
 from src.database.models import UserRole, User
+from src.repository.raw import RawUserRepository
+from src.services.cache import (
+    SingleFlight,
+    jittered,
+    redis_breaker,
+    redis_client,
+    user_key,
+)
+from src.services.metrics import redis_breaker_skips
 from src.services.users import UserService
 
+import asyncio
+import logging
 import pickle
-import redis.asyncio as redis
+import time
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=False
-)
+
+# Authenticated users are cached for about ten minutes, spread by jittered().
+USER_CACHE_SECONDS = 600
+# A cache miss is loaded once per worker, and by one worker at a time.
+USER_LOCK_MS = 2000
+USER_LOCK_WAIT = 0.5
+USER_LOCK_POLL = 0.02
+# Bumped by forget_cached_user; outlives any load that read it.
+USER_GENERATION_SECONDS = USER_CACHE_SECONDS
+_user_loads = SingleFlight()
+# Returned by _user_cache when Redis was not reached.
+_SKIPPED = object()
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_password_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 class Hash:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = LazyObject(get_password_context)
 
     def verify_password(self, plain_password, hashed_password):
         return self.pwd_context.verify(plain_password, hashed_password)
@@ -30,6 +61,12 @@ class Hash:
     def get_password_hash(self, password: str):
         return self.pwd_context.hash(password)
 
+    @classmethod
+    def warmup(cls):
+        # Resolves and self-tests the bcrypt backend, which passlib otherwise
+        # does lazily inside the first login request.
+        cls.pwd_context.handler().get_backend()
+
 
 def create_token(
     data: dict, expires_delta: timedelta, token_type: Literal["access", "refresh"]
@@ -75,7 +112,7 @@ def create_password_reset_token(email: str, expires_hours: int = 1) -> str:
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -93,20 +130,114 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    cached_user = await redis_client.get(f"user:{username}")
-    if cached_user:
-        user = pickle.loads(cached_user)
-        return user
-
-    user_service = UserService(db)
-    user = await user_service.get_user_by_username(username)
-    if user is None:
+    key = user_key(username)
+    cached_user = await _user_cache(lambda: redis_client.get(key))
+    if not cached_user:
+        # Requests missing the same expired key share one lookup. It runs in
+        # the lazy session of the request that started it, which the route
+        # then reuses; the other requests only await its result.
+        cached_user = await _user_loads.do(key, lambda: _load_user(key, username, db))
+    if not cached_user:
         raise credentials_exception
+    return pickle.loads(cached_user)
 
-    await redis_client.setex(
-        f"user:{username}", timedelta(minutes=10), pickle.dumps(user)
-    )
-    return user
+
+async def _user_cache(command: Callable[[], Awaitable[Any]], default: Any = None):
+    """
+    Run a user cache command unless the Redis breaker is open. Returns
+    ``default`` instead of raising when Redis is skipped or fails, so
+    authentication falls back to the database.
+    """
+    from redis.exceptions import RedisError
+
+    if not redis_breaker.allow():
+        redis_breaker_skips.inc("user")
+        return default
+    try:
+        result = await command()
+    except RedisError as e:
+        redis_breaker.failure()
+        logger.warning("User cache unavailable: %s", e)
+        return default
+    redis_breaker.success()
+    return result
+
+
+async def _load_user(key: str, username: str, db: Session) -> bytes | None:
+    """
+    Load an active user into the cache and return the pickled user, None if
+    there is no such active user.
+
+    Only the worker holding ``{key}:lock`` queries the database; the others
+    wait up to ``USER_LOCK_WAIT`` seconds for it to fill the cache before
+    querying themselves. The generation of the key is read before the query
+    and again after the cache is filled; if ``forget_cached_user`` bumped it
+    in between, the user read may be stale and the cached copy is dropped.
+    """
+    lock = f"{key}:lock"
+    generation_key = f"{key}:gen"
+    pipeline = redis_client.pipeline(transaction=False)
+    pipeline.set(lock, 1, nx=True, px=USER_LOCK_MS)
+    pipeline.get(generation_key)
+    locked, generation = await _user_cache(pipeline.execute, (_SKIPPED, None))
+    if not locked:
+        deadline = time.monotonic() + USER_LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(USER_LOCK_POLL)
+            cached_user = await _user_cache(lambda: redis_client.get(key), _SKIPPED)
+            if cached_user is _SKIPPED:
+                break
+            if cached_user:
+                return cached_user
+
+    try:
+        if raw_reads_enabled():
+            user = await RawUserRepository(raw_pool).get_user_by_username(username)
+        else:
+            user = await UserService(db).get_user_by_username(username)
+    except BaseException:
+        if locked is True:
+            await _user_cache(lambda: redis_client.delete(lock))
+        raise
+
+    cached_user = None
+    if user is not None and user.is_active:
+        cached_user = pickle.dumps(user)
+    if locked is not _SKIPPED:
+        # Fill the cache, release the lock and re-read the generation in one
+        # round trip.
+        pipeline = redis_client.pipeline(transaction=False)
+        if cached_user is not None:
+            pipeline.setex(key, jittered(USER_CACHE_SECONDS), cached_user)
+        if locked:
+            pipeline.delete(lock)
+        pipeline.get(generation_key)
+        results = await _user_cache(pipeline.execute)
+        if cached_user is not None and results and results[-1] != generation:
+            await _user_cache(lambda: redis_client.delete(key))
+    return cached_user
+
+
+async def forget_cached_user(username: str, redis=None) -> None:
+    """
+    Drop the cached copy of a user after changing the user in the database.
+
+    Also bumps the generation ``_load_user`` checks, so that a load which
+    read the user before the change does not cache it again afterwards.
+
+    Args:
+        username: The user that changed.
+        redis: The Redis client to use, ``redis_client`` by default.
+
+    Raises:
+        RedisError: When Redis is unavailable.
+    """
+    key = user_key(username)
+    pipeline = (redis or redis_client).pipeline(transaction=False)
+    pipeline.incr(f"{key}:gen")
+    pipeline.expire(f"{key}:gen", USER_GENERATION_SECONDS)
+    pipeline.delete(key)
+    await pipeline.execute()
 
 
 async def verify_refresh_token(refresh_token: str, db: Session):
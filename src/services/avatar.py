@@ -0,0 +1,144 @@
+import hashlib
+import logging
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from urllib.parse import urlencode
+
+from src.conf.config import settings
+from src.services.cache import redis_client
+
+if TYPE_CHECKING:
+    import httpx
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+class GravatarResolver:
+    """
+    Resolves the avatar URL assigned to a user at registration.
+
+    Without an existence check the URL is derived from the email hash alone
+    and no I/O happens. With ``check_exists`` enabled, Gravatar is asked
+    whether the hash has a custom image through one pooled HTTP client with
+    a hard timeout, and the answer is cached in Redis. Users without a
+    custom image get the configured default image instead of Gravatar's
+    generic one.
+    """
+
+    def __init__(
+        self,
+        redis: "Redis",
+        base_url: str = "https://www.gravatar.com",
+        default: str = "identicon",
+        check_exists: bool = False,
+        timeout: float = 2.0,
+        max_connections: int = 20,
+        cache_ttl: int = 60 * 60 * 24,
+    ):
+        self.redis = redis
+        self.base_url = base_url.rstrip("/")
+        self.default = default
+        self.check_exists = check_exists
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.cache_ttl = cache_ttl
+        self._client: "httpx.AsyncClient | None" = None
+
+    @staticmethod
+    def email_hash(email: str) -> str:
+        return hashlib.md5(email.strip().lower().encode("utf-8")).hexdigest()
+
+    def url_for(self, digest: str, default: str | None = None) -> str:
+        url = f"{self.base_url}/avatar/{digest}"
+        if default:
+            url += "?" + urlencode({"d": default})
+        return url
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None or self._client.is_closed:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def resolve(self, email: str) -> str:
+        """
+        Return the avatar URL for ``email``.
+
+        Args:
+            email: The email address the user registers with.
+
+        Returns:
+            The Gravatar URL for the address, never raising on network or
+            cache failures.
+        """
+        digest = self.email_hash(email)
+        if not self.check_exists:
+            return self.url_for(digest)
+
+        key = f"avatar:{digest}"
+        cached = await self._cache_get(key)
+        if cached is not None:
+            return cached.decode()
+
+        url = await self._lookup(digest)
+        if url is not None:
+            await self._cache_set(key, url)
+            return url
+        return self.url_for(digest)
+
+    async def _lookup(self, digest: str) -> str | None:
+        import httpx
+
+        try:
+            response = await self.client.head(self.url_for(digest), params={"d": "404"})
+        except httpx.HTTPError as e:
+            logger.warning("Gravatar lookup failed: %r", e)
+            return None
+        if response.status_code == 404:
+            return self.url_for(digest, default=self.default)
+        if response.is_success:
+            return self.url_for(digest)
+        return None
+
+    async def _cache_get(self, key: str) -> bytes | None:
+        from redis.exceptions import RedisError
+
+        try:
+            return await self.redis.get(key)
+        except RedisError as e:
+            logger.warning("Avatar cache read failed: %s", e)
+            return None
+
+    async def _cache_set(self, key: str, url: str) -> None:
+        from redis.exceptions import RedisError
+
+        try:
+            await self.redis.setex(key, self.cache_ttl, url)
+        except RedisError as e:
+            logger.warning("Avatar cache write failed: %s", e)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+
+@lru_cache
+def get_avatar_resolver() -> GravatarResolver:
+    return GravatarResolver(
+        redis_client,
+        base_url=settings.GRAVATAR_URL,
+        default=settings.GRAVATAR_DEFAULT,
+        check_exists=settings.GRAVATAR_CHECK_EXISTS,
+        timeout=settings.GRAVATAR_TIMEOUT,
+        max_connections=settings.GRAVATAR_MAX_CONNECTIONS,
+        cache_ttl=settings.GRAVATAR_CACHE_TTL,
+    )
@@ -0,0 +1,256 @@
+"""
+Daily birthday digest emails.
+
+Every confirmed, active user with contacts whose birthdays fall within the next
+``BIRTHDAY_DIGEST_DAYS`` days gets one email listing them. Run it once a
+day, from cron or as a long-running scheduler::
+
+    python -m src.services.birthday_digest            # today, then exit
+    python -m src.services.birthday_digest --date 2025-03-01
+    python -m src.services.birthday_digest --daemon   # daily at BIRTHDAY_DIGEST_HOUR
+
+Users are processed in batches in id order and the last finished batch is
+recorded in ``birthday_digest_runs``, so a restarted run resumes after it.
+A batch interrupted half way is sent again, so a crash can duplicate at
+most one batch of mails.
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import UTC, date, datetime, time, timedelta
+from email.charset import QP, Charset
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formataddr
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select
+
+from src.conf.config import settings
+from src.database.models import BirthdayDigestRun, Contact, User
+from src.repository.contacts import ContactRepository
+from src.services.email import template_environment
+
+if TYPE_CHECKING:
+    from src.database.db import DatabaseSessionManager
+    from src.services.smtp import SMTPPool
+
+logger = logging.getLogger(__name__)
+
+# Quoted-printable keeps mostly ASCII bodies readable, unlike the base64
+# MIMEText picks for utf-8 by default.
+UTF8_QP = Charset("utf-8")
+UTF8_QP.body_encoding = QP
+
+
+class BirthdayDigestJob:
+    """
+    Builds and sends the birthday digests for one day.
+
+    Each batch of users costs one query for the users and one set-based
+    query per shard for their contacts, answered from the
+    ``(user_id, birthday_key)`` index.
+    """
+
+    def __init__(
+        self,
+        manager: "DatabaseSessionManager",
+        smtp: "SMTPPool",
+        batch_size: int = 1000,
+        days: int = 7,
+    ):
+        self.manager = manager
+        self.smtp = smtp
+        self.batch_size = batch_size
+        self.days = days
+        self.template = template_environment().get_template("birthday_digest.html")
+        self.sender = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+
+    async def run(self, run_date: date) -> BirthdayDigestRun:
+        """
+        Send the digests for ``run_date``, resuming an interrupted run.
+
+        Args:
+            run_date: The day the digests are for.
+
+        Returns:
+            The checkpoint of the run.
+        """
+        checkpoint = await self._checkpoint(run_date)
+        if checkpoint.finished_at is not None:
+            logger.info("Birthday digests for %s were already sent", run_date)
+            return checkpoint
+        if checkpoint.last_user_id:
+            logger.info(
+                "Resuming birthday digests for %s after user %s",
+                run_date,
+                checkpoint.last_user_id,
+            )
+
+        while users := await self._users_after(checkpoint.last_user_id):
+            birthdays = await self._birthdays(users, run_date)
+            results = await asyncio.gather(
+                *(
+                    self._send(user, birthdays[user.id], run_date)
+                    for user in users
+                    if birthdays[user.id]
+                )
+            )
+            checkpoint.last_user_id = users[-1].id
+            checkpoint.sent += sum(results)
+            checkpoint.failed += len(results) - sum(results)
+            await self._save(checkpoint)
+
+        checkpoint.finished_at = datetime.now(UTC).replace(tzinfo=None)
+        await self._save(checkpoint)
+        logger.info(
+            "Birthday digests for %s: %s sent, %s failed",
+            run_date,
+            checkpoint.sent,
+            checkpoint.failed,
+        )
+        return checkpoint
+
+    async def _checkpoint(self, run_date: date) -> BirthdayDigestRun:
+        async with self.manager.session() as db:
+            checkpoint = await db.get(BirthdayDigestRun, run_date)
+            if checkpoint is None:
+                checkpoint = BirthdayDigestRun(
+                    run_date=run_date, last_user_id=0, sent=0, failed=0
+                )
+                db.add(checkpoint)
+                await db.commit()
+                await db.refresh(checkpoint)
+            db.expunge(checkpoint)
+        return checkpoint
+
+    async def _save(self, checkpoint: BirthdayDigestRun) -> None:
+        async with self.manager.session() as db:
+            await db.merge(checkpoint)
+            await db.commit()
+
+    async def _users_after(self, last_user_id: int) -> list:
+        async with self.manager.read_session() as db:
+            result = await db.execute(
+                select(User.id, User.username, User.email, User.contacts_shard)
+                .where(
+                    User.id > last_user_id,
+                    User.confirmed.is_(True),
+                    User.is_active.is_(True),
+                )
+                .order_by(User.id)
+                .limit(self.batch_size)
+            )
+            return result.all()
+
+    async def _birthdays(self, users: list, run_date: date) -> dict[int, list]:
+        if self.manager.sharded:
+            by_shard = defaultdict(list)
+            for user in users:
+                by_shard[self.manager.shard_for(user)].append(user.id)
+            sessions = [
+                (self.manager.shard_session(shard), ids)
+                for shard, ids in by_shard.items()
+            ]
+        else:
+            sessions = [(self.manager.read_session(), [user.id for user in users])]
+
+        birthdays = defaultdict(list)
+        for session, user_ids in sessions:
+            async with session as db:
+                contacts = await ContactRepository(db).get_birthdays_for_users(
+                    user_ids, run_date, self.days
+                )
+            for contact in contacts:
+                birthdays[contact.user_id].append(contact)
+        return birthdays
+
+    def _message(self, user, contacts: list[Contact], run_date: date) -> MIMEMultipart:
+        # The compat32 MIME classes are several times cheaper to build and
+        # serialise than EmailMessage, whose header parsing dominates when
+        # sending digests in bulk.
+        lines = [f"{c.first_name} {c.last_name}: {c.birthday:%d.%m}" for c in contacts]
+        message = MIMEMultipart("alternative")
+        message["From"] = self.sender
+        message["To"] = user.email
+        message["Subject"] = "Upcoming birthdays"
+        message.attach(
+            MIMEText(
+                f"Hi {user.username},\n\nUpcoming birthdays:\n" + "\n".join(lines),
+                "plain",
+                UTF8_QP,
+            )
+        )
+        message.attach(
+            MIMEText(
+                self.template.render(
+                    username=user.username, contacts=contacts, run_date=run_date
+                ),
+                "html",
+                UTF8_QP,
+            )
+        )
+        return message
+
+    async def _send(self, user, contacts: list[Contact], run_date: date) -> bool:
+        from aiosmtplib import SMTPException
+
+        try:
+            await self.smtp.send(self._message(user, contacts, run_date))
+        except (SMTPException, OSError) as e:
+            logger.warning("Birthday digest for user %s failed: %s", user.id, e)
+            return False
+        return True
+
+
+def seconds_until(hour: int, now: datetime) -> float:
+    """Seconds from ``now`` until the next ``hour``:00 UTC."""
+    next_run = datetime.combine(now.date(), time(hour), tzinfo=UTC)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+async def _run(args: argparse.Namespace) -> None:
+    from src.database.db import sessionmanager
+    from src.services.smtp import get_smtp_pool
+
+    smtp = get_smtp_pool()
+    job = BirthdayDigestJob(
+        sessionmanager,
+        smtp,
+        batch_size=settings.BIRTHDAY_DIGEST_BATCH_SIZE,
+        days=settings.BIRTHDAY_DIGEST_DAYS,
+    )
+    try:
+        if not args.daemon:
+            await job.run(args.date or datetime.now(UTC).date())
+            return
+        while True:
+            now = datetime.now(UTC)
+            if now.hour >= settings.BIRTHDAY_DIGEST_HOUR:
+                # After a restart this finishes, or skips, today's run.
+                await job.run(now.date())
+            await asyncio.sleep(
+                seconds_until(settings.BIRTHDAY_DIGEST_HOUR, datetime.now(UTC))
+            )
+    finally:
+        await smtp.aclose()
+        await sessionmanager.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Send birthday digest emails.")
+    parser.add_argument("--date", type=date.fromisoformat, default=None)
+    parser.add_argument("--daemon", action="store_true")
+    args = parser.parse_args(argv)
+    if args.daemon and args.date:
+        parser.error("--date cannot be combined with --daemon")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
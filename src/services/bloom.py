@@ -0,0 +1,81 @@
+import hashlib
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Bloom filter stored as a Redis bitmap, shared by every worker.
+
+    ``might_contain`` never misses a value that was added, but may report a
+    few that were not, at a rate set by ``bits`` and ``hashes``: about 0.05%
+    for a million values with the defaults. The bitmap takes ``bits / 8``
+    bytes of Redis memory.
+
+    A filter starts out not ready and reports every value as possibly
+    present until ``mark_ready`` is called, typically after loading it from
+    the source of truth. The ready flag is a bit of the same key, so a bitmap
+    that Redis evicted or lost reads as not ready rather than empty.
+    """
+
+    def __init__(self, redis: "Redis", key: str, bits: int = 1 << 24, hashes: int = 7):
+        self.redis = redis
+        self.key = key
+        self.bits = bits
+        self.hashes = hashes
+
+    def positions(self, value: str) -> list[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    async def add(self, *values: str) -> None:
+        """Add ``values``, in one round trip."""
+        command = self.redis.bitfield(self.key)
+        for value in values:
+            for position in self.positions(value):
+                command.set("u1", position, 1)
+        await command.execute()
+
+    async def might_contain(self, *values: str) -> list[bool]:
+        """
+        Check ``values`` in one round trip.
+
+        Returns:
+            False for each value that was certainly never added, True for
+            the others. All True while the filter is not ready or Redis is
+            unavailable.
+        """
+        from redis.exceptions import RedisError
+
+        command = self.redis.bitfield(self.key).get("u1", self.bits)
+        for value in values:
+            for position in self.positions(value):
+                command.get("u1", position)
+        try:
+            ready, *found = await command.execute()
+        except RedisError as e:
+            logger.warning("Bloom filter %s is unavailable: %s", self.key, e)
+            return [True] * len(values)
+        if not ready:
+            return [True] * len(values)
+        return [
+            all(found[i * self.hashes : (i + 1) * self.hashes])
+            for i in range(len(values))
+        ]
+
+    async def is_ready(self) -> bool:
+        return bool(await self.redis.getbit(self.key, self.bits))
+
+    async def mark_ready(self) -> None:
+        await self.redis.setbit(self.key, self.bits, 1)
+
+    async def clear(self) -> None:
+        await self.redis.delete(self.key)
@@ -0,0 +1,124 @@
+import asyncio
+import random
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Awaitable, Callable, TypeVar
+
+from src.conf.config import settings
+from src.conf.lazy import LazyObject
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+T = TypeVar("T")
+
+
+@lru_cache
+def get_redis() -> "Redis":
+    from src.services.redis_clients import create_redis
+
+    return create_redis(settings)
+
+
+redis_client: "Redis" = LazyObject(get_redis)
+
+
+@lru_cache
+def get_pubsub_redis() -> "Redis":
+    if settings.REDIS_MODE != "cluster":
+        return get_redis()
+    from src.services.redis_clients import create_node_redis
+
+    return create_node_redis(settings)
+
+
+# Publishes and subscribes to the contact event channels.
+pubsub_client: "Redis" = LazyObject(get_pubsub_redis)
+
+
+def user_key(username: str, *parts: str) -> str:
+    """
+    Redis key of a per-user value, e.g. ``user:{alice}:lock``.
+
+    The username is the key's hash tag, so in a Redis Cluster all keys of
+    one user land on the same slot and can share a pipeline or a script.
+    """
+    return ":".join((f"user:{{{username}}}", *parts))
+
+
+class CircuitBreaker:
+    """
+    Lets callers skip a failing dependency instead of waiting on it.
+
+    After ``failures`` consecutive failures the breaker opens and ``allow``
+    returns False for ``reset_after`` seconds. Then one trial call is let
+    through: success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failures: int = 5, reset_after: float = 30.0):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._failed = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if time.monotonic() - self._opened_at < self.reset_after:
+            return False
+        # Half open: the next failure reopens at once.
+        self._opened_at = time.monotonic()
+        return True
+
+    def success(self) -> None:
+        self._failed = 0
+        self._opened_at = None
+
+    def failure(self) -> None:
+        self._failed += 1
+        if self._failed >= self.failures:
+            self._opened_at = time.monotonic()
+
+
+@lru_cache
+def get_redis_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        settings.REDIS_BREAKER_FAILURES, settings.REDIS_BREAKER_RESET_SECONDS
+    )
+
+
+redis_breaker: CircuitBreaker = LazyObject(get_redis_breaker)
+
+
+def jittered(seconds: int, spread: float = 0.1) -> int:
+    """
+    ``seconds`` moved randomly by up to ``spread`` of itself either way, so
+    keys written in a burst (e.g. by a wave of logins) do not all expire
+    at once.
+    """
+    return max(1, round(seconds * random.uniform(1 - spread, 1 + spread)))
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key in this process.
+
+    The first caller for a key starts ``func``; callers arriving while it
+    runs await the same result (or exception) instead of calling ``func``
+    again. A caller being cancelled does not cancel the shared call.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(future)
@@ -1,11 +1,28 @@
+import asyncio
+import logging
+from typing import Sequence
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
-from src.repository.contacts import ContactRepository
+from src.conf.config import settings
+from src.database.db import get_db, get_read_db, sessionmanager
+from src.database.raw import raw_pool, raw_reads_enabled
+from src.repository.contacts import ContactQuotaExceeded, ContactRepository
+from src.repository.raw import RawContactRepository
 from src.database.models import User
-from src.schemas import ContactModel
+from src.schemas import ContactMerge, ContactModel, ContactResponse
+from src.services.auth import get_current_user
+from src.services.cache import redis_client, user_key
+from src.services.dedup import DuplicateFinder
+from src.services.events import ContactEventBroker, get_event_broker
+
+from fastapi import Depends, HTTPException, status
 
-from fastapi import HTTPException, status
+logger = logging.getLogger(__name__)
+
+# Cached contact counts may lag a concurrent write by at most this long.
+COUNT_CACHE_SECONDS = 60
 
 
 def _handle_integrity_error():
@@ -15,34 +32,206 @@ def _handle_integrity_error():
     )
 
 
+async def get_contacts_db(
+    user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+):
+    """
+    Session for changing the current user's contacts: the primary database,
+    or the user's shard when contacts are sharded.
+    """
+    if not sessionmanager.sharded:
+        yield db
+        return
+    async with sessionmanager.shard_session(sessionmanager.shard_for(user)) as session:
+        yield session
+
+
+async def get_contacts_read_db(
+    user: User = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Session for reading the current user's contacts: a replica when any are
+    configured, or the user's shard when contacts are sharded.
+    """
+    if not sessionmanager.sharded:
+        yield db
+        return
+    async with sessionmanager.shard_session(sessionmanager.shard_for(user)) as session:
+        yield session
+
+
+def contact_quota(user: User) -> int | None:
+    """The most contacts ``user`` may have, None for no limit."""
+    return settings.CONTACTS_QUOTAS.get(user.role.value)
+
+
 class ContactsService:
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self, db: AsyncSession, events: ContactEventBroker | None = None, redis=None
+    ):
         self.repository = ContactRepository(db)
+        # Serves get_contacts and get_contact; see DB_READ_BACKEND.
+        self.reader = (
+            RawContactRepository(raw_pool) if raw_reads_enabled() else self.repository
+        )
+        self.events = events if events is not None else get_event_broker()
+        self.redis = redis if redis is not None else redis_client
+
+    @staticmethod
+    def _count_key(user: User) -> str:
+        return user_key(user.username, "contacts", "count")
+
+    async def count_contacts(self, user: User) -> int:
+        """
+        Number of the user's contacts: cached in Redis, and read from the
+        maintained counter on a miss, never by counting rows.
+        """
+        from redis.exceptions import RedisError
+
+        key = self._count_key(user)
+        try:
+            cached = await self.redis.get(key)
+        except RedisError as e:
+            logger.warning("Reading a cached contact count failed: %s", e)
+            return await self.repository.count_contacts(user)
+        if cached is not None:
+            return int(cached)
+        count = await self.repository.count_contacts(user)
+        try:
+            await self.redis.set(key, count, ex=COUNT_CACHE_SECONDS)
+        except RedisError as e:
+            logger.warning("Caching a contact count failed: %s", e)
+        return count
+
+    async def _forget_count(self, user: User) -> None:
+        # Dropped rather than updated: two writers could store their counts
+        # in the wrong order, while the next read always loads the latest.
+        from redis.exceptions import RedisError
+
+        try:
+            await self.redis.delete(self._count_key(user))
+        except RedisError as e:
+            logger.warning("Dropping a cached contact count failed: %s", e)
+
+    async def _publish(self, event: str, contact, user: User):
+        data = None
+        if event != "deleted":
+            data = ContactResponse.model_validate(contact).model_dump(mode="json")
+        await self.events.publish(user.id, event, contact.change_seq, contact.id, data)
 
     async def create_contact(self, body: ContactModel, user: User):
         try:
-            return await self.repository.create_contact(body, user)
+            contact = await self.repository.create_contact(
+                body, user, quota=contact_quota(user)
+            )
         except IntegrityError:
             await self.repository.db.rollback()
             _handle_integrity_error()
+        except ContactQuotaExceeded as e:
+            await self.repository.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Contact limit of {e.quota} reached",
+            )
+        await self._forget_count(user)
+        await self._publish("created", contact, user)
+        return contact
 
     async def get_contacts(
-        self, name: str, email: str, skip: int, limit: int, user: User
+        self,
+        name: str,
+        email: str,
+        skip: int,
+        limit: int,
+        user: User,
+        fields: Sequence[str] | None = None,
     ):
-        return await self.repository.get_contacts(name, email, skip, limit, user)
+        return await self.reader.get_contacts(name, email, skip, limit, user, fields)
 
-    async def get_contact(self, tag_id: int, user: User):
-        return await self.repository.get_contact_by_id(tag_id, user)
+    async def lookup_contacts(
+        self, user: User, phone: str | None = None, email: str | None = None
+    ):
+        return await self.repository.lookup_contacts(user, phone, email)
+
+    async def get_contacts_by_ids(self, contact_ids: list[int], user: User) -> dict:
+        """
+        The user's contacts with the given ids, in the order requested and
+        without repeats, and the ids that matched none of them.
+        """
+        ids = list(dict.fromkeys(contact_ids))
+        contacts = await self.reader.get_contacts_by_ids(ids, user)
+        by_id = {contact.id: contact for contact in contacts}
+        return {
+            "items": [by_id[i] for i in ids if i in by_id],
+            "missing": [i for i in ids if i not in by_id],
+        }
+
+    async def get_contact(
+        self, tag_id: int, user: User, fields: Sequence[str] | None = None
+    ):
+        return await self.reader.get_contact_by_id(tag_id, user, fields)
 
     async def update_contact(self, tag_id: int, body: ContactModel, user: User):
         try:
-            return await self.repository.update_contact(tag_id, body, user)
+            contact = await self.repository.update_contact(tag_id, body, user)
         except IntegrityError:
             await self.repository.db.rollback()
             _handle_integrity_error()
+        if contact is not None:
+            await self._publish("updated", contact, user)
+        return contact
 
     async def remove_contact(self, tag_id: int, user: User):
-        return await self.repository.remove_contact(tag_id, user)
+        contact = await self.repository.remove_contact(tag_id, user)
+        if contact is not None:
+            await self._forget_count(user)
+            await self._publish("deleted", contact, user)
+        return contact
+
+    async def find_duplicates(self, user: User, threshold: float, limit: int):
+        rows = await self.repository.get_dedup_rows(user)
+        finder = DuplicateFinder(settings.CONTACTS_PHONE_COUNTRY_CODE, threshold)
+        # Scoring a large address book takes a while; keep the event loop free.
+        groups = (await asyncio.to_thread(finder.find, rows))[:limit]
+        contacts = await self.repository.get_contacts_by_ids(
+            [contact_id for group in groups for contact_id in group.ids], user
+        )
+        by_id = {contact.id: contact for contact in contacts}
+        return [
+            {
+                "score": group.score,
+                "contacts": [by_id[i] for i in group.ids if i in by_id],
+            }
+            for group in groups
+        ]
+
+    async def merge_contacts(self, body: ContactMerge, user: User):
+        if body.primary_id in body.duplicate_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A contact cannot be merged into itself",
+            )
+        try:
+            merged = await self.repository.merge_contacts(
+                body.primary_id,
+                body.duplicate_ids,
+                body.fields.model_dump(exclude_unset=True),
+                user,
+            )
+        except IntegrityError:
+            await self.repository.db.rollback()
+            _handle_integrity_error()
+        if merged is None:
+            return None
+        primary, duplicates = merged
+        await self._forget_count(user)
+        for duplicate in duplicates:
+            await self._publish("deleted", duplicate, user)
+        await self._publish("updated", primary, user)
+        return primary
+
+    async def get_changes(self, user: User, since: int, limit: int):
+        return await self.repository.get_changes(user, since, limit)
 
     async def get_birthdays(self, user: User):
         return await self.repository.get_birthdays(user)
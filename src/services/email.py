@@ -1,28 +1,62 @@
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
 from pydantic import EmailStr
 
 from src.services.auth import create_email_token
 from src.conf.config import settings
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-    MAIL_STARTTLS=settings.MAIL_STARTTLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    USE_CREDENTIALS=settings.USE_CREDENTIALS,
-    VALIDATE_CERTS=settings.VALIDATE_CERTS,
-    TEMPLATE_FOLDER=Path(__file__).parent / "templates",
-)
+if TYPE_CHECKING:
+    from fastapi_mail import ConnectionConfig
+    from jinja2 import Environment
+
+TEMPLATE_FOLDER = Path(__file__).parent / "templates"
+
+
+@lru_cache
+def template_environment() -> "Environment":
+    from jinja2 import Environment, FileSystemLoader
+
+    return Environment(loader=FileSystemLoader(TEMPLATE_FOLDER))
+
+
+@lru_cache
+def get_mail_config() -> "ConnectionConfig":
+    from fastapi_mail import ConnectionConfig
+
+    class CachedTemplatesConfig(ConnectionConfig):
+        # fastapi_mail builds a fresh Jinja environment, and so recompiles
+        # the template, on every send_message call; share one instead.
+        def template_engine(self) -> "Environment":
+            return template_environment()
+
+    return CachedTemplatesConfig(
+        MAIL_USERNAME=settings.MAIL_USERNAME,
+        MAIL_PASSWORD=settings.MAIL_PASSWORD,
+        MAIL_FROM=settings.MAIL_FROM,
+        MAIL_PORT=settings.MAIL_PORT,
+        MAIL_SERVER=settings.MAIL_SERVER,
+        MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
+        MAIL_STARTTLS=settings.MAIL_STARTTLS,
+        MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
+        USE_CREDENTIALS=settings.USE_CREDENTIALS,
+        VALIDATE_CERTS=settings.VALIDATE_CERTS,
+        TEMPLATE_FOLDER=TEMPLATE_FOLDER,
+    )
+
+
+def preload_templates() -> None:
+    get_mail_config()
+    env = template_environment()
+    for template in TEMPLATE_FOLDER.glob("*.html"):
+        env.get_template(template.name)
 
 
 async def send_email(email: EmailStr, username: str, host: str):
+    from fastapi_mail import FastMail, MessageSchema, MessageType
+    from fastapi_mail.errors import ConnectionErrors
+
     try:
         token_verification = create_email_token({"sub": email})
         message = MessageSchema(
@@ -36,13 +70,16 @@ async def send_email(email: EmailStr, username: str, host: str):
             subtype=MessageType.html,
         )
 
-        fm = FastMail(conf)
+        fm = FastMail(get_mail_config())
         await fm.send_message(message, template_name="verify_email.html")
     except ConnectionErrors as err:
         print(err)
 
 
 async def send_password_reset_email(email: EmailStr, host: str, token: str):
+    from fastapi_mail import FastMail, MessageSchema, MessageType
+    from fastapi_mail.errors import ConnectionErrors
+
     reset_url = f"{str(host)}auth/reset_password_form?token={token}"
     subject = "Password Reset Request"
     body = {
@@ -57,7 +94,7 @@ async def send_password_reset_email(email: EmailStr, host: str, token: str):
             template_body=body,
             subtype=MessageType.html,
         )
-        fm = FastMail(conf)
+        fm = FastMail(get_mail_config())
         await fm.send_message(message, template_name="reset_password.html")
     except ConnectionErrors as err:
         print(err)
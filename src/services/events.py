@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator
+
+from src.conf.config import settings
+from src.services.cache import pubsub_client
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+    from redis.asyncio.client import PubSub
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "contacts:events:"
+
+
+class Subscription:
+    """
+    Buffer of events waiting to be sent to one stream.
+
+    The buffer is bounded: a client that cannot keep up is marked as
+    overflowed and told to resynchronise, instead of holding an unbounded
+    backlog in the worker.
+    """
+
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue(size)
+        self.overflowed = False
+
+    def offer(self, message: bytes | None) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            if message is None:
+                # Closing wins over pending events.
+                self.queue.get_nowait()
+                self.queue.put_nowait(None)
+
+
+class ContactEventBroker:
+    """
+    Fans out contact change events to server-sent event streams.
+
+    Events are published to a Redis channel per user, so a change made on
+    any worker reaches streams served by every other worker. Each worker
+    keeps a single pub/sub connection and subscribes to a user's channel
+    only while one of that user's streams is open on it.
+    """
+
+    def __init__(self, redis: "Redis", queue_size: int = 100, heartbeat: float = 15.0):
+        self.redis = redis
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._pubsub: "PubSub | None" = None
+        self._listener: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def channel(user_id: int) -> str:
+        return f"{CHANNEL_PREFIX}{user_id}"
+
+    async def publish(
+        self, user_id: int, event: str, seq: int, contact_id: int, data: dict | None
+    ) -> None:
+        """
+        Publish a change of one of the user's contacts.
+
+        Delivery is best effort; clients catch up on missed events through
+        the change feed, using the ``seq`` of the last event they saw.
+
+        Args:
+            user_id: The owner of the contact.
+            event: ``created``, ``updated`` or ``deleted``.
+            seq: The change feed position of the change.
+            contact_id: The ID of the contact.
+            data: The contact as returned by the API, None for deletes.
+        """
+        from redis.exceptions import RedisError
+
+        message = json.dumps(
+            {"event": event, "seq": seq, "id": contact_id, "contact": data}
+        )
+        try:
+            await self.redis.publish(self.channel(user_id), message)
+        except RedisError as e:
+            logger.warning("Publishing a contact event failed: %s", e)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[Subscription]:
+        subscription = Subscription(self.queue_size)
+        async with self._lock:
+            subscribers = self._subscribers.setdefault(user_id, set())
+            subscribers.add(subscription)
+            if len(subscribers) == 1:
+                await self._get_pubsub().subscribe(self.channel(user_id))
+                self._ensure_listener()
+        try:
+            yield subscription
+        finally:
+            async with self._lock:
+                subscribers.discard(subscription)
+                if not subscribers and self._subscribers.get(user_id) is subscribers:
+                    del self._subscribers[user_id]
+                    await self._pubsub.unsubscribe(self.channel(user_id))
+
+    async def stream(self, user_id: int) -> AsyncIterator[str]:
+        """
+        Yield the server-sent events for one connection of ``user_id``.
+
+        A comment line is sent every ``heartbeat`` seconds without events, so
+        proxies keep the idle connection open and dead clients are noticed.
+        """
+        async with self.subscribe(user_id) as subscription:
+            yield "retry: 5000\n\n"
+            while True:
+                if subscription.overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), self.heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if message is None:
+                    return
+                event = json.loads(message)
+                yield (
+                    f"id: {event['seq']}\n"
+                    f"event: {event['event']}\n"
+                    f"data: {message.decode()}\n\n"
+                )
+
+    def _get_pubsub(self) -> "PubSub":
+        if self._pubsub is None:
+            self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        return self._pubsub
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        from redis.exceptions import RedisError
+
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except RedisError as e:
+                logger.warning("Contact event subscription failed: %s", e)
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            user_id = int(message["channel"].decode().removeprefix(CHANNEL_PREFIX))
+            for subscription in self._subscribers.get(user_id, ()):
+                subscription.offer(message["data"])
+
+    async def aclose(self) -> None:
+        """End every open stream and close the pub/sub connection."""
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.offer(None)
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        self._subscribers.clear()
+        self._listener = None
+        self._pubsub = None
+
+
+@lru_cache
+def get_event_broker() -> ContactEventBroker:
+    return ContactEventBroker(
+        pubsub_client,
+        queue_size=settings.SSE_QUEUE_SIZE,
+        heartbeat=settings.SSE_HEARTBEAT_SECONDS,
+    )
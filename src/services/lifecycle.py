@@ -0,0 +1,84 @@
+import inspect
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable
+
+from fastapi import FastAPI
+
+from src.conf.config import settings
+from src.database.db import sessionmanager
+from src.database.raw import raw_pool, raw_reads_enabled
+from src.services.auth import Hash, redis_client
+from src.services.cache import pubsub_client
+from src.services.avatar import get_avatar_resolver
+from src.services.email import preload_templates
+from src.services.events import get_event_broker
+from src.services.users import get_registration_filter
+
+logger = logging.getLogger(__name__)
+
+
+async def _timed_step(name: str, timings: dict, func: Callable[[], Any]) -> None:
+    # Warm-up is best effort: a dependency that is down at boot should show
+    # up in the health check and in the logs, not keep the worker from
+    # starting.
+    start = time.perf_counter()
+    try:
+        result = func()
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        logger.warning("Startup step %s failed: %s", name, e)
+    timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm up the worker before it accepts traffic and release its resources
+    on shutdown.
+
+    Startup fills the database pool (and the asyncpg pool of the raw read
+    backend, if enabled), pings Redis, connects the rate limiter to Redis
+    if ``RATE_LIMIT_STORAGE`` says so, loads the bcrypt backend,
+    compiles the email templates and starts loading the registration filter
+    if Redis does not have it yet. Step durations in milliseconds are
+    logged and kept in ``app.state.startup_timings``.
+    """
+    started = time.perf_counter()
+    timings: dict[str, float] = {}
+    await _timed_step(
+        "database", timings, lambda: sessionmanager.warmup(settings.DB_POOL_SIZE)
+    )
+    if raw_reads_enabled():
+        await _timed_step("raw_pool", timings, raw_pool.open)
+    await _timed_step("redis", timings, redis_client.ping)
+    if settings.RATE_LIMIT_STORAGE == "redis":
+        from src.api.users import get_limiter
+
+        await _timed_step("rate_limits", timings, get_limiter)
+    await _timed_step("password_hash", timings, Hash.warmup)
+    await _timed_step("email_templates", timings, preload_templates)
+    await _timed_step(
+        "registration_filter",
+        timings,
+        lambda: get_registration_filter().ensure_built(sessionmanager),
+    )
+    timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+    app.state.startup_timings = timings
+    logger.info("Worker started in %.1f ms: %s", timings["total"], timings)
+
+    yield
+
+    shutdown: dict[str, float] = {}
+    await _timed_step("contact_events", shutdown, get_event_broker().aclose)
+    await _timed_step("registration_filter", shutdown, get_registration_filter().aclose)
+    await _timed_step("redis", shutdown, redis_client.aclose)
+    if settings.REDIS_MODE == "cluster":
+        await _timed_step("redis_pubsub", shutdown, pubsub_client.aclose)
+    await _timed_step("avatar_client", shutdown, get_avatar_resolver().aclose)
+    await _timed_step("database", shutdown, sessionmanager.close)
+    if raw_reads_enabled():
+        await _timed_step("raw_pool", shutdown, raw_pool.close)
+    logger.info("Worker resources released: %s", shutdown)
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, Sequence, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """
+    Batches the ``load`` calls made while resolving one request.
+
+    Keys requested in the same event loop iteration, e.g. by the coroutines
+    of one ``asyncio.gather``, are passed together to ``batch``, which must
+    return one value per key in the same order. Each key is loaded once per
+    loader; create a loader per request so that values do not go stale.
+    """
+
+    def __init__(
+        self,
+        batch: Callable[[list[K]], Awaitable[Sequence[V]]],
+        max_batch_size: int = 1000,
+    ):
+        self.batch = batch
+        self.max_batch_size = max_batch_size
+        self._loaded: dict[K, asyncio.Future] = {}
+        self._queue: list[K] = []
+
+    def load(self, key: K) -> Awaitable[V]:
+        future = self._loaded.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._loaded[key] = loop.create_future()
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                # Runs after the coroutines already scheduled, so that their
+                # keys join this batch.
+                loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: Sequence[K]) -> list[V]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, []
+        for start in range(0, len(queue), self.max_batch_size):
+            asyncio.ensure_future(self._run(queue[start : start + self.max_batch_size]))
+
+    async def _run(self, keys: list[K]) -> None:
+        try:
+            values = await self.batch(keys)
+            if len(values) != len(keys):
+                raise ValueError(
+                    f"Batch returned {len(values)} values for {len(keys)} keys"
+                )
+        except Exception as e:
+            for key in keys:
+                # Not kept, so that a later load retries.
+                future = self._loaded.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, value in zip(keys, values):
+            future = self._loaded[key]
+            if not future.done():
+                future.set_result(value)
@@ -0,0 +1,106 @@
+"""
+Minimal in-process metrics, exposed in the Prometheus text format by
+``GET /api/metrics``. Each worker process reports its own values.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    """Cumulative histogram of observed values, per value of one label."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label: str,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.label = label
+        self.buckets = buckets
+        self._counts: dict[str, list[int]] = defaultdict(
+            lambda: [0] * (len(buckets) + 1)
+        )
+        self._sums: dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, label: str) -> None:
+        with self._lock:
+            self._counts[label][bisect_left(self.buckets, value)] += 1
+            self._sums[label] += value
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for label, counts in sorted(self._counts.items()):
+                labels = f'{self.label}="{label}"'
+                total = 0
+                for bound, count in zip((*self.buckets, "+Inf"), counts):
+                    total += count
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {total}')
+                lines.append(f"{self.name}_sum{{{labels}}} {self._sums[label]}")
+                lines.append(f"{self.name}_count{{{labels}}} {total}")
+        return lines
+
+
+class Counter:
+    """Monotonic count, per value of one label."""
+
+    def __init__(self, name: str, description: str, label: str):
+        self.name = name
+        self.description = description
+        self.label = label
+        self._values: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, label: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[label] += amount
+
+    def value(self, label: str) -> int:
+        return self._values.get(label, 0)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for label, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{{{self.label}="{label}"}} {value}')
+        return lines
+
+
+REGISTRY: list[Histogram | Counter] = []
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+redis_latency = Histogram(
+    "redis_command_duration_seconds",
+    "Round trip time of Redis commands and pipelines.",
+    label="command",
+)
+redis_errors = Counter(
+    "redis_command_errors_total",
+    "Redis commands and pipelines that failed.",
+    label="command",
+)
+redis_breaker_skips = Counter(
+    "redis_breaker_skipped_total",
+    "Cache operations skipped while the Redis circuit breaker was open.",
+    label="cache",
+)
@@ -0,0 +1,129 @@
+"""
+Canonical forms of contact fields, used to compare contacts that were typed
+differently, e.g. ``+380 (67) 123-45-67`` and ``0671234567``.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+_NON_DIGITS = re.compile(r"\D")
+_NON_LETTERS = re.compile(r"[^a-z]")
+
+# Letters with the same Soundex code; vowels, h, w and y have none.
+_SOUNDEX_CODES = {
+    letter: str(code)
+    for code, letters in enumerate(("bfpv", "cgjkqsxz", "dt", "l", "mn", "r"), start=1)
+    for letter in letters
+}
+
+# Mailbox providers that ignore dots in the local part.
+_DOTLESS_DOMAINS = {"gmail.com", "googlemail.com"}
+# Mailbox providers that deliver ``name+tag`` to ``name``. Elsewhere the
+# ``+`` may be part of a different mailbox's name.
+_PLUS_TAG_DOMAINS = {
+    "gmail.com",
+    "googlemail.com",
+    "outlook.com",
+    "hotmail.com",
+    "live.com",
+    "icloud.com",
+    "me.com",
+    "mac.com",
+    "proton.me",
+    "protonmail.com",
+    "fastmail.com",
+}
+
+
+def normalize_phone(phone: str, country_code: str) -> str | None:
+    """
+    Convert a phone number to E.164, e.g. ``+380671234567``.
+
+    Numbers without an international prefix are taken to be national numbers
+    of ``country_code``; a leading trunk ``0`` is dropped.
+
+    Args:
+        phone: The number as entered.
+        country_code: The calling code for national numbers, e.g. ``380``.
+
+    Returns:
+        The E.164 number, or None if ``phone`` cannot be one.
+    """
+    phone = phone.strip()
+    digits = _NON_DIGITS.sub("", phone)
+    if phone.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith(country_code) and len(digits) > 10:
+        pass
+    else:
+        digits = country_code + digits.removeprefix("0")
+    if not 8 <= len(digits) <= 15:
+        return None
+    return "+" + digits
+
+
+def normalize_email(email: str) -> str:
+    """
+    Lowercase an email address and drop the parts its mailbox provider
+    ignores: a ``+tag`` suffix on the providers known to treat it as an
+    alias, and the dots of Gmail local parts.
+    """
+    local, _, domain = email.strip().lower().rpartition("@")
+    if not local:
+        return domain
+    if domain in _PLUS_TAG_DOMAINS:
+        local = local.split("+", 1)[0]
+    if domain in _DOTLESS_DOMAINS:
+        local = local.replace(".", "")
+        domain = "gmail.com"
+    return f"{local}@{domain}"
+
+
+def fold(text: str) -> str:
+    """Lowercase ``text`` and strip accents, e.g. ``Zoë`` -> ``zoe``."""
+    if text.isascii():
+        return text.strip().lower()
+    decomposed = unicodedata.normalize("NFKD", text.strip().lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=65536)
+def soundex(name: str) -> str:
+    """
+    American Soundex code of ``name``, e.g. ``R163`` for Robert and Rupert.
+
+    Names without Latin letters are returned folded, so they still block
+    together when spelled the same.
+    """
+    letters = _NON_LETTERS.sub("", fold(name))
+    if not letters:
+        return fold(name)
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0])
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter)
+        if digit is not None and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def trigrams(text: str) -> frozenset[str]:
+    """Character trigrams of ``text``, padded like PostgreSQL's pg_trgm."""
+    words = fold(text).split()
+    if len(words) == 1:
+        return _word_trigrams(words[0])
+    return frozenset().union(*map(_word_trigrams, words))
+
+
+@lru_cache(maxsize=65536)
+def _word_trigrams(word: str) -> frozenset[str]:
+    # Names repeat a lot across an address book, so words are cached.
+    padded = f"  {word} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
@@ -0,0 +1,157 @@
+"""
+Construction of the Redis clients. Imported on first use of ``redis_client``,
+so that importing the application does not load redis-py.
+
+``REDIS_MODE`` selects a single node (``standalone``), the master of a
+Sentinel-monitored group (``sentinel``) or a Redis Cluster (``cluster``).
+"""
+
+import time
+from contextlib import contextmanager
+
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from redis.asyncio.cluster import ClusterNode, ClusterPipeline, RedisCluster
+from redis.asyncio.retry import Retry
+from redis.asyncio.sentinel import Sentinel
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, RedisError, TimeoutError
+
+from src.services.metrics import redis_errors, redis_latency
+
+
+@contextmanager
+def _measured(command: str):
+    start = time.perf_counter()
+    try:
+        yield
+    except RedisError:
+        redis_errors.inc(command)
+        raise
+    finally:
+        redis_latency.observe(time.perf_counter() - start, command)
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        with _measured("PIPELINE"):
+            return await super().execute(raise_on_error)
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client recording the latency and failures of every command."""
+
+    async def execute_command(self, *args, **options):
+        with _measured(str(args[0]).upper()):
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class InstrumentedClusterPipeline(ClusterPipeline):
+    async def execute(self, raise_on_error: bool = True, allow_redirections=True):
+        with _measured("PIPELINE"):
+            return await super().execute(raise_on_error, allow_redirections)
+
+
+class InstrumentedRedisCluster(RedisCluster):
+    """Cluster client recording the latency and failures of every command."""
+
+    async def execute_command(self, *args, **kwargs):
+        with _measured(str(args[0]).upper()):
+            return await super().execute_command(*args, **kwargs)
+
+    def pipeline(self, transaction=None, shard_hint=None) -> ClusterPipeline:
+        # Cluster pipelines are never transactional; keys may span nodes.
+        return InstrumentedClusterPipeline(self)
+
+
+def parse_nodes(nodes: list[str]) -> list[tuple[str, int]]:
+    """``["host:port", ...]`` as ``[(host, port), ...]``."""
+    parsed = []
+    for node in nodes:
+        host, _, port = node.rpartition(":")
+        parsed.append((host, int(port)))
+    return parsed
+
+
+def _client_options(settings) -> dict:
+    return {
+        "password": settings.REDIS_PASSWORD,
+        "decode_responses": False,
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+        "retry": Retry(
+            ExponentialBackoff(base=settings.REDIS_RETRY_BACKOFF),
+            settings.REDIS_RETRIES,
+        ),
+        "retry_on_error": [ConnectionError, TimeoutError],
+    }
+
+
+def _cluster_nodes(settings) -> list[tuple[str, int]]:
+    return parse_nodes(settings.REDIS_CLUSTER_NODES) or [
+        (settings.REDIS_HOST, settings.REDIS_PORT)
+    ]
+
+
+def create_redis(settings) -> "redis.Redis | RedisCluster":
+    """
+    Client for ``REDIS_MODE``, with a bounded pool, socket and connect
+    timeouts, periodic health checks and a short retry on connection errors
+    and timeouts.
+
+    With Sentinel the client asks the sentinels for the current master and
+    reconnects to the new one after a failover. With Cluster it routes each
+    command to the node owning its key's slot; see ``user_key`` for keeping
+    a user's keys in one slot.
+    """
+    options = _client_options(settings)
+    if settings.REDIS_MODE == "sentinel":
+        sentinel = Sentinel(
+            parse_nodes(settings.REDIS_SENTINELS),
+            sentinel_kwargs={
+                "password": settings.REDIS_PASSWORD,
+                "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+                "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT,
+            },
+        )
+        return sentinel.master_for(
+            settings.REDIS_SENTINEL_SERVICE, redis_class=InstrumentedRedis, **options
+        )
+    if settings.REDIS_MODE == "cluster":
+        return InstrumentedRedisCluster(
+            startup_nodes=[
+                ClusterNode(host, port) for host, port in _cluster_nodes(settings)
+            ],
+            **options,
+        )
+    return InstrumentedRedis(
+        host=settings.REDIS_HOST, port=settings.REDIS_PORT, **options
+    )
+
+
+def create_node_redis(settings) -> redis.Redis:
+    """
+    Plain client on the first cluster node, for pub/sub: the asyncio cluster
+    client has none, and a cluster forwards every PUBLISH to all its nodes.
+    """
+    host, port = _cluster_nodes(settings)[0]
+    return InstrumentedRedis(host=host, port=port, **_client_options(settings))
+
+
+def rate_limit_storage_uri(settings) -> str:
+    """URI of the same Redis deployment for the ``limits`` library."""
+    auth = f":{settings.REDIS_PASSWORD}@" if settings.REDIS_PASSWORD else ""
+    if settings.REDIS_MODE == "sentinel":
+        nodes = ",".join(settings.REDIS_SENTINELS)
+        return f"redis+sentinel://{auth}{nodes}/{settings.REDIS_SENTINEL_SERVICE}"
+    if settings.REDIS_MODE == "cluster":
+        nodes = ",".join(f"{host}:{port}" for host, port in _cluster_nodes(settings))
+        return f"redis+cluster://{auth}{nodes}"
+    return f"redis://{auth}{settings.REDIS_HOST}:{settings.REDIS_PORT}"
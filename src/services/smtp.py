@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from email.message import Message
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from src.conf.config import settings
+
+if TYPE_CHECKING:
+    from aiosmtplib import SMTP
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """
+    Pool of authenticated SMTP connections for bulk mail.
+
+    Connections are opened on demand up to ``size`` and reused between
+    messages, so sending many mails does not pay for a TCP, TLS and AUTH
+    handshake each time. A connection the server dropped is replaced
+    transparently.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        size: int = 5,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        validate_certs: bool = True,
+        timeout: float = 30.0,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.size = size
+        self.options = {
+            "username": username,
+            "password": password,
+            "use_tls": use_tls,
+            "start_tls": start_tls,
+            "validate_certs": validate_certs,
+            "timeout": timeout,
+        }
+        self._idle: list["SMTP"] = []
+        self._slots = asyncio.Semaphore(size)
+        self.connections_opened = 0
+
+    async def _connect(self) -> "SMTP":
+        from aiosmtplib import SMTP
+
+        client = SMTP(hostname=self.hostname, port=self.port, **self.options)
+        await client.connect()
+        self.connections_opened += 1
+        return client
+
+    async def send(self, message: Message) -> None:
+        """
+        Send ``message`` over a pooled connection.
+
+        Raises:
+            aiosmtplib.SMTPException: If the message could not be delivered.
+        """
+        from aiosmtplib import SMTPServerDisconnected
+
+        async with self._slots:
+            client = self._idle.pop() if self._idle else None
+            try:
+                if client is None or not client.is_connected:
+                    client = await self._connect()
+                try:
+                    await client.send_message(message)
+                except SMTPServerDisconnected:
+                    # Idle connections time out on the server side.
+                    client = await self._connect()
+                    await client.send_message(message)
+            finally:
+                if client is not None and client.is_connected:
+                    self._idle.append(client)
+
+    async def aclose(self) -> None:
+        from aiosmtplib import SMTPException
+
+        idle, self._idle = self._idle, []
+        for client in idle:
+            try:
+                await client.quit()
+            except SMTPException as e:
+                logger.debug("Closing an SMTP connection failed: %s", e)
+
+
+@lru_cache
+def get_smtp_pool() -> SMTPPool:
+    return SMTPPool(
+        settings.MAIL_SERVER,
+        settings.MAIL_PORT,
+        size=settings.MAIL_POOL_SIZE,
+        username=settings.MAIL_USERNAME if settings.USE_CREDENTIALS else None,
+        password=settings.MAIL_PASSWORD if settings.USE_CREDENTIALS else None,
+        use_tls=settings.MAIL_SSL_TLS,
+        start_tls=settings.MAIL_STARTTLS,
+        validate_certs=settings.VALIDATE_CERTS,
+    )
@@ -1,9 +1,12 @@
-import cloudinary
-import cloudinary.uploader
+from functools import lru_cache
+
+from src.conf.config import settings
 
 
 class UploadFileService:
     def __init__(self, cloud_name, api_key, api_secret):
+        import cloudinary
+
         self.cloud_name = cloud_name
         self.api_key = api_key
         self.api_secret = api_secret
@@ -16,9 +19,21 @@ class UploadFileService:
 
     @staticmethod
     def upload_file(file, username) -> str:
+        import cloudinary
+        import cloudinary.uploader
+
         public_id = f"RestApp/{username}"
         r = cloudinary.uploader.upload(file.file, public_id=public_id, overwrite=True)
         src_url = cloudinary.CloudinaryImage(public_id).build_url(
             width=250, height=250, crop="fill", version=r.get("version")
         )
         return src_url
+
+
+@lru_cache
+def get_upload_file_service() -> UploadFileService:
+    return UploadFileService(
+        settings.CLOUDINARY_NAME,
+        settings.CLOUDINARY_API_KEY,
+        settings.CLOUDINARY_API_SECRET,
+    )
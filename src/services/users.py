@@ -1,24 +1,157 @@
+import asyncio
+import logging
+from functools import lru_cache
+from typing import TYPE_CHECKING, Literal
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from libgravatar import Gravatar
-from sqlalchemy.sql.functions import user
 
+from src.conf.config import settings
 from src.repository.users import UserRepository
 from src.schemas import UserCreate
+from src.services.avatar import GravatarResolver, get_avatar_resolver
+from src.services.bloom import BloomFilter
+from src.services.cache import redis_client
 
+if TYPE_CHECKING:
+    from src.database.db import DatabaseSessionManager
 
-class UserService:
-    def __init__(self, db: AsyncSession):
-        self.repository = UserRepository(db)
+logger = logging.getLogger(__name__)
+
+
+class RegistrationFilter:
+    """
+    Bloom filter of the emails and usernames already taken.
+
+    Lets registration skip the database for values that are certainly free.
+    The filter only ever grows, and the unique constraints on ``users`` stay
+    the final authority: a value it misses, e.g. after a failed ``add``, is
+    still rejected on insert.
+    """
+
+    def __init__(self, bloom: BloomFilter):
+        self.bloom = bloom
+        self._rebuild: asyncio.Task | None = None
+
+    async def might_be_taken(self, email: str, username: str) -> tuple[bool, bool]:
+        taken = await self.bloom.might_contain(f"email:{email}", f"username:{username}")
+        return taken[0], taken[1]
+
+    async def add(self, email: str, username: str) -> None:
+        from redis.exceptions import RedisError
 
-    async def create_user(self, body: UserCreate):
-        avatar = None
         try:
-            g = Gravatar(body.email)
-            avatar = g.get_image()
+            await self.bloom.add(f"email:{email}", f"username:{username}")
+        except RedisError as e:
+            logger.warning("Adding a user to the registration filter failed: %s", e)
+
+    async def rebuild(
+        self, manager: "DatabaseSessionManager", batch_size: int = 5000
+    ) -> int:
+        """
+        Load every registered email and username into the filter and mark
+        it ready. Users registering meanwhile are added by ``create_user``.
+
+        Returns:
+            The number of users loaded.
+        """
+        last_id, loaded = 0, 0
+        while True:
+            async with manager.read_session() as db:
+                rows = await UserRepository(db).get_identities_after(
+                    last_id, batch_size
+                )
+            if not rows:
+                break
+            values = []
+            for row in rows:
+                values += [f"email:{row.email}", f"username:{row.username}"]
+            await self.bloom.add(*values)
+            last_id, loaded = rows[-1].id, loaded + len(rows)
+        await self.bloom.mark_ready()
+        logger.info("Registration filter loaded with %s users", loaded)
+        return loaded
+
+    async def ensure_built(self, manager: "DatabaseSessionManager") -> None:
+        """
+        Start loading the filter in the background unless it is ready or
+        another worker is already loading it.
+        """
+        if await self.bloom.is_ready():
+            return
+        if self._rebuild is not None and not self._rebuild.done():
+            return
+        if await self.bloom.redis.set(self._lock_key, 1, nx=True, ex=600):
+            self._rebuild = asyncio.create_task(self._rebuild_in_background(manager))
+
+    @property
+    def _lock_key(self) -> str:
+        return f"{self.bloom.key}:rebuilding"
+
+    async def _rebuild_in_background(self, manager: "DatabaseSessionManager") -> None:
+        try:
+            await self.rebuild(manager)
         except Exception as e:
-            print(e)
+            # Registration keeps checking the database until a later start
+            # loads the filter.
+            logger.warning("Loading the registration filter failed: %s", e)
+            await self.bloom.redis.delete(self._lock_key)
+
+    async def aclose(self) -> None:
+        if self._rebuild is not None:
+            self._rebuild.cancel()
+            self._rebuild = None
+
+
+@lru_cache
+def get_registration_filter() -> RegistrationFilter:
+    return RegistrationFilter(
+        BloomFilter(
+            redis_client,
+            "users:registered:bloom",
+            bits=settings.REGISTRATION_FILTER_BITS,
+            hashes=settings.REGISTRATION_FILTER_HASHES,
+        )
+    )
 
-        return await self.repository.create_user(body, avatar)
+
+class UserService:
+    def __init__(
+        self,
+        db: AsyncSession,
+        avatar_resolver: GravatarResolver = None,
+        registered: RegistrationFilter = None,
+    ):
+        self.repository = UserRepository(db)
+        self.avatar_resolver = avatar_resolver or get_avatar_resolver()
+        self.registered = registered or get_registration_filter()
+
+    async def find_conflict(
+        self, email: str, username: str
+    ) -> Literal["email", "username"] | None:
+        """
+        Tell which of ``email`` and ``username`` is already taken, checking
+        the email first. Values the registration filter has never seen are
+        not looked up, and the others are looked up in one query.
+        """
+        email_taken, username_taken = await self.registered.might_be_taken(
+            email, username
+        )
+        if not (email_taken or username_taken):
+            return None
+        users = await self.repository.get_users_by_email_or_username(
+            email if email_taken else None, username if username_taken else None
+        )
+        if any(user.email == email for user in users):
+            return "email"
+        if users:
+            return "username"
+        return None
+
+    async def create_user(self, body: UserCreate):
+        avatar = await self.avatar_resolver.resolve(body.email)
+        user = await self.repository.create_user(body, avatar)
+        await self.registered.add(user.email, user.username)
+        return user
 
     async def get_user_by_id(self, user_id: int):
         return await self.repository.get_user_by_id(user_id)
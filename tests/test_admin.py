@@ -0,0 +1,220 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from redis.exceptions import ConnectionError
+from sqlalchemy import event
+
+from src.database.models import User, UserRole
+from src.services.auth import Hash, create_access_token
+from tests.conftest import TestingSessionLocal, engine
+
+
+@pytest.fixture(scope="module")
+def users(client):
+    async def create():
+        hashed = Hash().get_password_hash("12345678")
+        async with TestingSessionLocal() as session:
+            created = [
+                User(
+                    username=f"member{i}",
+                    email=f"member{i}@example.com",
+                    hashed_password=hashed,
+                    confirmed=i % 2 == 0,
+                    avatar="<https://twitter.com/gravatar>",
+                    role=UserRole.USER,
+                )
+                for i in range(5)
+            ]
+            session.add_all(created)
+            await session.commit()
+            return [user.id for user in created]
+
+    return asyncio.run(create())
+
+
+@pytest.fixture()
+def read_sessions(monkeypatch):
+    # Exports open their own session instead of using get_read_db.
+    monkeypatch.setattr(
+        "src.services.admin.sessionmanager",
+        SimpleNamespace(sharded=False, read_session=TestingSessionLocal),
+    )
+
+
+def admin_id(client, headers) -> int:
+    response = client.get(
+        "/api/admin/users", params={"search": "testUser@"}, headers=headers
+    )
+    return response.json()["items"][0]["id"]
+
+
+def test_list_users_pages_and_filters(client, get_token, users):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    params = {"role": "user", "limit": 2}
+
+    ids, after_id = [], 0
+    while after_id is not None:
+        response = client.get(
+            "/api/admin/users", params={**params, "after_id": after_id}, headers=headers
+        )
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids += [user["id"] for user in page["items"]]
+        after_id = page["next_after_id"]
+    assert ids == users
+
+    response = client.get(
+        "/api/admin/users",
+        params={"role": "user", "confirmed": False},
+        headers=headers,
+    )
+    assert [user["username"] for user in response.json()["items"]] == [
+        "member1",
+        "member3",
+    ]
+
+    response = client.get(
+        "/api/admin/users", params={"search": "MEMBER4@"}, headers=headers
+    )
+    assert [user["id"] for user in response.json()["items"]] == [users[4]]
+
+
+def test_export_users(client, get_token, users, read_sessions):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.get(
+        "/api/admin/users/export", params={"role": "user"}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == users
+    assert lines[0]["is_active"] is True
+
+
+def test_user_contacts(client, get_token, read_sessions):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    for i in range(3):
+        response = client.post(
+            "/api/contacts",
+            json={
+                "first_name": f"admin_{i}",
+                "last_name": "admin_last",
+                "email": f"admin_{i}@mail.com",
+                "phone": f"+42600000{i:02d}",
+                "birthday": "1980-01-01",
+            },
+            headers=headers,
+        )
+        assert response.status_code == 201, response.text
+    me = admin_id(client, headers)
+
+    page = client.get(
+        f"/api/admin/users/{me}/contacts", params={"limit": 2}, headers=headers
+    ).json()
+    assert len(page["items"]) == 2
+    rest = client.get(
+        f"/api/admin/users/{me}/contacts",
+        params={"after_id": page["next_after_id"]},
+        headers=headers,
+    ).json()
+    assert rest["next_after_id"] is None
+
+    response = client.get(f"/api/admin/users/{me}/contacts/export", headers=headers)
+    assert response.status_code == 200, response.text
+    exported = [json.loads(line)["id"] for line in response.text.splitlines()]
+    assert exported == [c["id"] for c in page["items"] + rest["items"]]
+
+    response = client.get("/api/admin/users/999999/contacts", headers=headers)
+    assert response.status_code == 404, response.text
+
+
+def test_list_users_with_contacts(client, get_token, users, read_sessions):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if "FROM contacts" in statement:
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        response = client.get(
+            "/api/admin/users", params={"contacts": 2}, headers=headers
+        )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200, response.text
+    items = {user["username"]: user for user in response.json()["items"]}
+    assert [c["first_name"] for c in items["testUser"]["contacts"]] == [
+        "admin_0",
+        "admin_1",
+    ]
+    assert items["member1"]["contacts"] == []
+    assert len(statements) == 1
+    plain = client.get("/api/admin/users", headers=headers).json()["items"]
+    assert all("contacts" not in user for user in plain)
+
+
+def test_deactivate_user(client, get_token, users):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    login = {"username": "member0", "password": "12345678"}
+    assert client.post("/api/auth/login", data=login).status_code == 200
+
+    member_token = asyncio.run(create_access_token(data={"sub": "member0"}))
+    member_headers = {"Authorization": f"Bearer {member_token}"}
+    assert client.get("/api/contacts", headers=member_headers).status_code == 200
+
+    response = client.post(f"/api/admin/users/{users[0]}/deactivate", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["is_active"] is False
+
+    response = client.post("/api/auth/login", data=login)
+    assert response.status_code == 401, response.text
+    assert response.json()["detail"] == "Обліковий запис деактивовано"
+    assert client.get("/api/contacts", headers=member_headers).status_code == 401
+
+    response = client.get("/api/admin/users", params={"active": False}, headers=headers)
+    assert [user["id"] for user in response.json()["items"]] == [users[0]]
+
+
+def test_deactivate_user_with_redis_down(client, get_token, users, monkeypatch):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    member_token = asyncio.run(create_access_token(data={"sub": "member1"}))
+    member_headers = {"Authorization": f"Bearer {member_token}"}
+    assert client.get("/api/contacts", headers=member_headers).status_code == 200
+    monkeypatch.setattr(
+        "src.services.admin.forget_cached_user",
+        AsyncMock(side_effect=ConnectionError("down")),
+    )
+
+    response = client.post(f"/api/admin/users/{users[1]}/deactivate", headers=headers)
+    assert response.status_code == 503, response.text
+    # Still cached, so the admin has to retry once Redis is back.
+    assert client.get("/api/contacts", headers=member_headers).status_code == 200
+
+    monkeypatch.undo()
+    response = client.post(f"/api/admin/users/{users[1]}/deactivate", headers=headers)
+    assert response.status_code == 200, response.text
+    assert client.get("/api/contacts", headers=member_headers).status_code == 401
+
+
+def test_deactivate_self_or_missing(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    me = admin_id(client, headers)
+
+    response = client.post(f"/api/admin/users/{me}/deactivate", headers=headers)
+    assert response.status_code == 400, response.text
+    response = client.post("/api/admin/users/999999/deactivate", headers=headers)
+    assert response.status_code == 404, response.text
+
+
+def test_admin_only(client, users):
+    token = asyncio.run(create_access_token(data={"sub": "member2"}))
+    response = client.get(
+        "/api/admin/users", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403, response.text
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from src.services.avatar import GravatarResolver
+
+KNOWN_EMAIL = "Known@Example.com"
+
+
+class GravatarStandIn(ThreadingHTTPServer):
+    """Local HTTP server answering like Gravatar does for ``d=404``."""
+
+    daemon_threads = True
+    # The default backlog of 5 refuses part of a concurrent burst.
+    request_queue_size = 64
+
+    def __init__(self, known: set[str], delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.known = known
+        self.delay = delay
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        with self.server.lock:
+            self.server.hits += 1
+        time.sleep(self.server.delay)
+        digest = self.path.split("?")[0].rsplit("/", 1)[-1]
+        self.send_response(200 if digest in self.server.known else 404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gravatar():
+    server = GravatarStandIn({GravatarResolver.email_hash(KNOWN_EMAIL)})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def redis():
+    return FakeAsyncRedis()
+
+
+def make_resolver(redis, gravatar, **kwargs):
+    return GravatarResolver(
+        redis, base_url=gravatar.url, check_exists=True, timeout=1.0, **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_resolve_without_check_does_no_io(redis, gravatar):
+    resolver = GravatarResolver(redis, base_url=gravatar.url)
+
+    url = await resolver.resolve(KNOWN_EMAIL)
+
+    assert url == f"{gravatar.url}/avatar/{GravatarResolver.email_hash(KNOWN_EMAIL)}"
+    assert gravatar.hits == 0
+    assert await redis.keys("*") == []
+
+
+@pytest.mark.asyncio
+async def test_resolve_existing_and_missing_avatars(redis, gravatar):
+    resolver = make_resolver(redis, gravatar)
+
+    known = await resolver.resolve(KNOWN_EMAIL)
+    missing = await resolver.resolve("nobody@example.com")
+    await resolver.aclose()
+
+    assert known.endswith(GravatarResolver.email_hash(KNOWN_EMAIL))
+    assert missing.endswith("?d=identicon")
+
+
+@pytest.mark.asyncio
+async def test_resolve_uses_cache(redis, gravatar):
+    resolver = make_resolver(redis, gravatar)
+
+    first = await resolver.resolve(KNOWN_EMAIL)
+    second = await resolver.resolve(KNOWN_EMAIL.lower())
+    await resolver.aclose()
+
+    assert first == second
+    assert gravatar.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_timeout_falls_back_without_caching(redis, gravatar):
+    gravatar.delay = 0.5
+    resolver = GravatarResolver(
+        redis, base_url=gravatar.url, check_exists=True, timeout=0.1
+    )
+
+    url = await resolver.resolve(KNOWN_EMAIL)
+    await resolver.aclose()
+
+    assert url == resolver.url_for(GravatarResolver.email_hash(KNOWN_EMAIL))
+    assert await redis.keys("avatar:*") == []
+
+
+@pytest.mark.asyncio
+async def test_registration_burst_resolves_concurrently(redis, gravatar):
+    gravatar.delay = 0.2
+    resolver = make_resolver(redis, gravatar)
+    emails = [f"user{i}@example.com" for i in range(10)]
+
+    start = time.perf_counter()
+    urls = await asyncio.gather(*(resolver.resolve(email) for email in emails))
+    elapsed = time.perf_counter() - start
+    await resolver.aclose()
+
+    assert len(set(urls)) == len(emails)
+    assert gravatar.hits == len(emails)
+    assert elapsed < len(emails) * gravatar.delay / 2
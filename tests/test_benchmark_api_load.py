@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks.api_load import ENDPOINTS, run
+from benchmarks.common import percentile
+
+
+def test_percentile_interpolates():
+    samples = [10.0, 20.0, 30.0, 40.0]
+
+    assert percentile(samples, 0) == 10.0
+    assert percentile(samples, 50) == 25.0
+    assert percentile(samples, 100) == 40.0
+    assert percentile([], 99) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_api_load_reports_every_endpoint(tmp_path):
+    report = await run(
+        f"sqlite+aiosqlite:///{tmp_path / 'bench.db'}",
+        users=2,
+        contacts=5,
+        requests=4,
+        concurrency=2,
+    )
+
+    assert report["meta"]["params"]["concurrency"] == 2
+    assert set(report["endpoints"]) == set(ENDPOINTS)
+    for name, summary in report["endpoints"].items():
+        assert summary["requests"] == 4, name
+        assert summary["errors"] == 0, name
+        assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"]
+    # The route and get_current_user share one session.
+    assert report["endpoints"]["update"]["sessions_per_request"] == 1
+
+
+@pytest.mark.asyncio
+async def test_api_load_keeps_redis_and_counters_in_process(tmp_path, monkeypatch):
+    from fakeredis import FakeAsyncRedis
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from benchmarks import api_load
+    from src.database.models import ContactCounter
+
+    fake = FakeAsyncRedis()
+    monkeypatch.setattr(api_load, "make_redis", lambda redis_url: fake)
+    db_url = f"sqlite+aiosqlite:///{tmp_path / 'bench.db'}"
+
+    await run(
+        db_url, users=2, contacts=5, requests=4, concurrency=2, endpoints=("list",)
+    )
+
+    # The contact totals were cached in the benchmark's Redis...
+    assert await fake.keys("user:{bench_user_*}:contacts:count")
+    engine = create_async_engine(db_url)
+    async with engine.connect() as conn:
+        counters = (await conn.execute(select(ContactCounter))).all()
+    await engine.dispose()
+    # ...from counters seeded like the repository keeps them.
+    assert [(c.contact_count, c.last_change_seq) for c in counters] == [(5, 5)] * 2
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from benchmarks.online_ddl import main, run
+
+# A scratch PostgreSQL database, as for tests/test_read_backends.py.
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def test_online_ddl_needs_postgresql(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["--db-url", f"sqlite:///{tmp_path / 'bench.db'}"])
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+async def test_online_migration_keeps_contacts_writable():
+    report = await run(
+        POSTGRES_URL,
+        users=20,
+        contacts_per_user=2000,
+        partitions=4,
+        writers=4,
+        batch_size=1000,
+        pause=0.02,
+        idle_seconds=1.0,
+    )
+
+    online = report["results"]["online"]
+    assert online["writes"]["errors"] == 0
+    assert online["writes"]["requests"] > 0
+    # No write waited for the whole migration, as they do for the plain
+    # UPDATE and CREATE INDEX.
+    assert online["writes"]["max_ms"] < online["migration_s"] * 1000 / 2
+    plain = report["results"]["plain"]
+    assert plain["writes"]["max_ms"] > online["writes"]["max_ms"]
@@ -0,0 +1,141 @@
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.smtp import SMTPStandIn
+from src.database.db import DatabaseSessionManager
+from src.database.models import Base, BirthdayDigestRun, Contact, User
+from src.repository.contacts import ContactRepository, birthday_window
+from src.services.birthday_digest import BirthdayDigestJob
+from src.services.smtp import SMTPPool
+
+RUN_DATE = date(2024, 12, 28)
+
+
+def test_birthday_window_wraps_new_year():
+    assert birthday_window(RUN_DATE, 7) == [1228, 1229, 1230, 1231, 101, 102, 103, 104]
+
+
+def test_birthday_window_covers_leap_day_in_common_years():
+    assert 229 in birthday_window(date(2025, 2, 27), 3)
+    assert birthday_window(date(2024, 2, 27), 3) == [227, 228, 229, 301]
+
+
+@pytest_asyncio.fixture
+async def manager(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'digest'}.db"
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for user_id in range(1, 8):
+            await conn.execute(
+                User.__table__.insert().values(
+                    id=user_id,
+                    username=f"user{user_id}",
+                    email=f"user{user_id}@example.com",
+                    confirmed=user_id != 6,
+                    is_active=user_id != 7,
+                )
+            )
+            # Users 1-7 each have one birthday in the window (one across the
+            # new year) and one outside it; user 4 has none in the window.
+            # User 6 is not confirmed and user 7 is deactivated.
+            birthdays = [date(1990, 1 + user_id % 2 * 11, 2 + user_id % 2 * 27)]
+            if user_id == 4:
+                birthdays = []
+            birthdays.append(date(1985, 6, 15))
+            for i, birthday in enumerate(birthdays):
+                await conn.execute(
+                    Contact.__table__.insert().values(
+                        first_name=f"Friend{i}",
+                        last_name=f"Of{user_id}",
+                        email=f"f{i}u{user_id}@example.com",
+                        phone=f"+1555{user_id:03d}{i:03d}",
+                        birthday=birthday,
+                        user_id=user_id,
+                        created_at=RUN_DATE,
+                        updated_at=RUN_DATE,
+                        change_seq=1,
+                    )
+                )
+    await engine.dispose()
+    manager = DatabaseSessionManager(url)
+    yield manager
+    await manager.close()
+
+
+@pytest_asyncio.fixture
+async def smtp():
+    async with SMTPStandIn() as server:
+        pool = SMTPPool("127.0.0.1", server.port, size=2)
+        yield server, pool
+        await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_digest_is_sent_once_per_user_with_birthdays(manager, smtp):
+    server, pool = smtp
+    queries = []
+    event.listen(
+        manager.engine.sync_engine,
+        "before_cursor_execute",
+        lambda *args: queries.append(args[2]),
+    )
+
+    run = await BirthdayDigestJob(manager, pool, batch_size=2).run(RUN_DATE)
+
+    recipients = sorted(rcpt for _, rcpts, _ in server.messages for rcpt in rcpts)
+    assert recipients == [f"<user{i}@example.com>" for i in (1, 2, 3, 5)]
+    assert (run.sent, run.failed, run.last_user_id) == (4, 0, 5)
+    assert run.finished_at is not None
+    assert server.connections <= 2
+    # One query for users and one for their contacts per batch of two users.
+    contact_queries = [q for q in queries if "FROM contacts" in q]
+    assert len(contact_queries) == 3
+    body = b"".join(data for _, _, data in server.messages)
+    assert b"Friend0 Of1" in body and b"Friend1" not in body
+
+    again = await BirthdayDigestJob(manager, pool).run(RUN_DATE)
+    assert again.sent == 4
+    assert server.received == 4
+
+
+@pytest.mark.asyncio
+async def test_interrupted_run_resumes_after_last_batch(manager, smtp):
+    server, pool = smtp
+    job = BirthdayDigestJob(manager, pool, batch_size=2)
+    send = job._send
+
+    async def crash_on_user_3(user, contacts, run_date):
+        if user.id == 3:
+            raise RuntimeError("worker killed")
+        return await send(user, contacts, run_date)
+
+    job._send = crash_on_user_3
+    with pytest.raises(RuntimeError):
+        await job.run(RUN_DATE)
+    async with manager.session() as db:
+        checkpoint = await db.get(BirthdayDigestRun, RUN_DATE)
+    assert (checkpoint.last_user_id, checkpoint.sent) == (2, 2)
+
+    run = await BirthdayDigestJob(manager, pool, batch_size=2).run(RUN_DATE)
+
+    recipients = [rcpt for _, rcpts, _ in server.messages for rcpt in rcpts]
+    assert sorted(recipients) == [f"<user{i}@example.com>" for i in (1, 2, 3, 5)]
+    assert run.sent == 4
+
+
+@pytest.mark.asyncio
+async def test_get_birthdays_for_users_in_one_query(manager):
+    async with manager.session() as db:
+        contacts = await ContactRepository(db).get_birthdays_for_users(
+            [1, 2, 3, 4], RUN_DATE, 7
+        )
+    assert [(c.user_id, c.birthday.month) for c in contacts] == [
+        (1, 12),
+        (2, 1),
+        (3, 12),
+    ]
@@ -0,0 +1,64 @@
+def contact(i: int) -> dict:
+    return {
+        "first_name": f"sync_{i}",
+        "last_name": "sync_last",
+        "email": f"sync_{i}@mail.com",
+        "phone": f"+42400000{i:02d}",
+        "birthday": "1980-05-05",
+    }
+
+
+def test_changes_since_token(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    ids = [
+        client.post("/api/contacts", json=contact(i), headers=headers).json()["id"]
+        for i in range(3)
+    ]
+
+    response = client.get("/api/contacts/changes", headers=headers)
+    assert response.status_code == 200, response.text
+    full = response.json()
+    assert [c["id"] for c in full["changed"]] == ids
+    assert full["deleted"] == []
+    assert full["has_more"] is False
+
+    client.put(f"/api/contacts/{ids[0]}", json=contact(10), headers=headers)
+    client.delete(f"/api/contacts/{ids[1]}", headers=headers)
+
+    delta = client.get(
+        "/api/contacts/changes", params={"since": full["next"]}, headers=headers
+    ).json()
+    assert [c["id"] for c in delta["changed"]] == [ids[0]]
+    assert delta["changed"][0]["email"] == "sync_10@mail.com"
+    assert delta["deleted"] == [ids[1]]
+    assert delta["next"] > full["next"]
+
+    idle = client.get(
+        "/api/contacts/changes", params={"since": delta["next"]}, headers=headers
+    ).json()
+    assert idle == {
+        "changed": [],
+        "deleted": [],
+        "next": delta["next"],
+        "has_more": False,
+    }
+
+
+def test_changes_paginate(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    since, seen, deleted = 0, [], []
+    while True:
+        page = client.get(
+            "/api/contacts/changes",
+            params={"since": since, "limit": 1},
+            headers=headers,
+        ).json()
+        seen += [c["id"] for c in page["changed"]]
+        deleted += page["deleted"]
+        since = page["next"]
+        if not page["has_more"]:
+            break
+
+    current = client.get("/api/contacts", headers=headers).json()
+    assert sorted(seen) == sorted(c["id"] for c in current)
+    assert not set(seen) & set(deleted)
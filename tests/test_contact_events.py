@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.database.models import Base, User
+from src.schemas import ContactModel
+from src.services.contacts import ContactsService
+from src.services.events import ContactEventBroker
+
+
+@pytest_asyncio.fixture
+async def broker():
+    broker = ContactEventBroker(FakeAsyncRedis(), queue_size=4, heartbeat=0.05)
+    yield broker
+    await broker.aclose()
+
+
+async def next_event(stream) -> str:
+    while (chunk := await anext(stream)).startswith(":"):
+        pass
+    return chunk
+
+
+def body(i: int) -> ContactModel:
+    return ContactModel(
+        first_name="Stream",
+        last_name=f"Contact{i}",
+        email=f"stream{i}@example.com",
+        phone=f"+3805000000{i}",
+        birthday="1990-01-01",
+    )
+
+
+@pytest.mark.asyncio
+async def test_events_reach_only_their_user(broker):
+    mine, theirs = broker.stream(1), broker.stream(2)
+    assert await anext(mine) == "retry: 5000\n\n"
+    assert await anext(theirs) == "retry: 5000\n\n"
+
+    await broker.publish(1, "created", 7, 42, {"id": 42})
+    event = await asyncio.wait_for(next_event(mine), 1)
+
+    assert event.startswith("id: 7\nevent: created\n")
+    assert json.loads(event.split("data: ")[1])["contact"] == {"id": 42}
+    assert await anext(theirs) == ": ping\n\n"
+    await mine.aclose()
+    await theirs.aclose()
+    assert broker._subscribers == {}
+
+
+@pytest.mark.asyncio
+async def test_idle_stream_sends_heartbeats(broker):
+    stream = broker.stream(1)
+    await anext(stream)
+
+    assert [await anext(stream) for _ in range(3)] == [": ping\n\n"] * 3
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_is_told_to_resync(broker):
+    stream = broker.stream(1)
+    await anext(stream)
+
+    for seq in range(10):
+        await broker.publish(1, "updated", seq, 1, {})
+    await asyncio.sleep(0.1)
+
+    assert await anext(stream) == "event: resync\ndata: {}\n\n"
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+
+
+@pytest.mark.asyncio
+async def test_service_writes_publish_events(broker, tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'e.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    stream = broker.stream(1)
+    await anext(stream)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        user = User(id=1, username="streamer", email="streamer@example.com")
+        session.add(user)
+        await session.commit()
+        service = ContactsService(session, events=broker)
+        contact = await service.create_contact(body(1), user)
+        await service.update_contact(contact.id, body(2), user)
+        await service.remove_contact(contact.id, user)
+    await engine.dispose()
+
+    events = [
+        json.loads((await asyncio.wait_for(next_event(stream), 1)).split("data: ")[1])
+        for _ in range(3)
+    ]
+    await stream.aclose()
+    assert [(e["event"], e["seq"], e["id"]) for e in events] == [
+        ("created", 1, contact.id),
+        ("updated", 2, contact.id),
+        ("deleted", 3, contact.id),
+    ]
+    assert events[1]["contact"]["email"] == "stream2@example.com"
+    assert events[2]["contact"] is None
@@ -0,0 +1,52 @@
+from src.conf.config import settings
+
+
+def contact(i: int) -> dict:
+    return {
+        "first_name": f"quota_{i}",
+        "last_name": "quota_last",
+        "email": f"quota_{i}@mail.com",
+        "phone": f"+42500000{i:02d}",
+        "birthday": "1979-09-09",
+    }
+
+
+def total(client, headers) -> int:
+    response = client.get("/api/contacts", headers=headers)
+    assert response.status_code == 200, response.text
+    return int(response.headers["X-Total-Count"])
+
+
+def test_total_count_header(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    ids = [
+        client.post("/api/contacts", json=contact(i), headers=headers).json()["id"]
+        for i in range(3)
+    ]
+    assert total(client, headers) == 3
+    # Served from the cache until the next write.
+    assert total(client, headers) == 3
+
+    client.delete(f"/api/contacts/{ids[0]}", headers=headers)
+    assert total(client, headers) == 2
+
+    filtered = client.get("/api/contacts", params={"name": "quota_1"}, headers=headers)
+    assert "X-Total-Count" not in filtered.headers
+
+
+def test_quota_by_role(client, get_token, monkeypatch):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    current = total(client, headers)
+    monkeypatch.setitem(settings.CONTACTS_QUOTAS, "admin", current + 1)
+
+    response = client.post("/api/contacts", json=contact(10), headers=headers)
+    assert response.status_code == 201, response.text
+
+    response = client.post("/api/contacts", json=contact(11), headers=headers)
+    assert response.status_code == 403, response.text
+    assert response.json()["detail"] == f"Contact limit of {current + 1} reached"
+    assert total(client, headers) == current + 1
+
+    monkeypatch.delitem(settings.CONTACTS_QUOTAS, "admin")
+    response = client.post("/api/contacts", json=contact(11), headers=headers)
+    assert response.status_code == 201, response.text
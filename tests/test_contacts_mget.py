@@ -0,0 +1,89 @@
+import asyncio
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.database.models import User, UserRole
+from src.services.auth import create_access_token
+from tests.conftest import TestingSessionLocal
+
+
+def create(client, headers, i: int) -> int:
+    response = client.post(
+        "/api/contacts",
+        json={
+            "first_name": f"mget_{i}",
+            "last_name": "mget_last",
+            "email": f"mget_{i}@mail.com",
+            "phone": f"+42800000{i:02d}",
+            "birthday": "1990-02-03",
+        },
+        headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_mget_keeps_order_and_reports_missing(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    ids = [create(client, headers, i) for i in range(3)]
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if "FROM contacts" in statement:
+            statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", count)
+    try:
+        response = client.post(
+            "/api/contacts/mget",
+            json={"ids": [ids[2], 999999, ids[0], ids[2]]},
+            headers=headers,
+        )
+    finally:
+        event.remove(Engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [contact["id"] for contact in body["items"]] == [ids[2], ids[0]]
+    assert body["items"][0]["first_name"] == "mget_2"
+    assert body["missing"] == [999999]
+    assert len(statements) == 1
+
+
+def test_mget_only_returns_own_contacts(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    own = create(client, headers, 10)
+
+    async def other_user():
+        async with TestingSessionLocal() as session:
+            session.add(
+                User(
+                    username="mgetOther",
+                    email="mgetOther@example.com",
+                    hashed_password="-",
+                    confirmed=True,
+                    avatar="<https://twitter.com/gravatar>",
+                    role=UserRole.USER,
+                )
+            )
+            await session.commit()
+        return await create_access_token(data={"sub": "mgetOther"})
+
+    other = {"Authorization": f"Bearer {asyncio.run(other_user())}"}
+    response = client.post("/api/contacts/mget", json={"ids": [own]}, headers=other)
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"items": [], "missing": [own]}
+
+
+def test_mget_batch_size(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+
+    for ids in ([], list(range(1, 502))):
+        response = client.post("/api/contacts/mget", json={"ids": ids}, headers=headers)
+        assert response.status_code == 422, response.text
+    response = client.post(
+        "/api/contacts/mget", json={"ids": list(range(1, 501))}, headers=headers
+    )
+    assert response.status_code == 200, response.text
@@ -4,14 +4,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import Contact, User
 from src.repository.contacts import ContactRepository
-from src.schemas import ContactModel
+from src.repository.raw import RawContactRepository
+from src.schemas import ContactModel, ContactResponse
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 
 @pytest.fixture
 def mock_session():
-    return AsyncMock(spec=AsyncSession)
+    session = AsyncMock(spec=AsyncSession)
+    # Synchronous on AsyncSession, so not to be awaited.
+    session.add = MagicMock()
+    session.get_bind = MagicMock()
+    return session
 
 
 @pytest.fixture
@@ -50,6 +55,26 @@ async def test_get_contacts(contact_repository, mock_session, user):
     assert contacts[0].email == "john@example.com"
 
 
+@pytest.mark.asyncio
+async def test_get_contacts_selects_only_fields(contact_repository, mock_session, user):
+    mock_result = MagicMock()
+    mock_result.mappings.return_value.all.return_value = [
+        {"first_name": "John", "phone": "1234567890"}
+    ]
+    mock_session.execute = AsyncMock(return_value=mock_result)
+
+    contacts = await contact_repository.get_contacts(
+        "", "", 0, 10, user, fields=("first_name", "phone")
+    )
+
+    assert contacts == [{"first_name": "John", "phone": "1234567890"}]
+    stmt = mock_session.execute.await_args.args[0]
+    assert [column.name for column in stmt.selected_columns] == ["first_name", "phone"]
+    # Built once per set of fields.
+    await contact_repository.get_contacts("", "", 0, 10, user, ["first_name", "phone"])
+    assert mock_session.execute.await_args.args[0] is stmt
+
+
 @pytest.mark.asyncio
 async def test_get_contact_by_id(contact_repository, mock_session, user):
     # Setup mock
@@ -78,6 +103,10 @@ async def test_create_contact(contact_repository, mock_session, user):
         phone="1234567890",
         birthday="1990-05-15",
     )
+    # The position claimed in the owner's change feed.
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = 7
+    mock_session.execute = AsyncMock(return_value=mock_result)
 
     # Call method
     result = await contact_repository.create_contact(body=contact_data, user=user)
@@ -86,7 +115,8 @@ async def test_create_contact(contact_repository, mock_session, user):
     assert isinstance(result, Contact)
     assert result.first_name == "Jane"
     assert result.email == "jane@example.com"
-    mock_session.add.assert_called_once()
+    assert result.change_seq == 7
+    mock_session.add.assert_called_once_with(result)
     mock_session.commit.assert_awaited_once()
     mock_session.refresh.assert_awaited_once_with(result)
 
@@ -159,3 +189,85 @@ async def test_get_birthdays(contact_repository, mock_session, user):
     assert len(contacts) == 1
     assert contacts[0].first_name == "Birthday Person"
     assert contacts[0].birthday == upcoming_birthday
+
+
+@pytest.fixture
+def mock_pool():
+    return MagicMock(fetch=AsyncMock(), fetchrow=AsyncMock())
+
+
+@pytest.fixture
+def raw_contact_repository(mock_pool):
+    return RawContactRepository(mock_pool)
+
+
+def contact_record(**fields) -> dict:
+    record = {
+        "id": 1,
+        "first_name": "John",
+        "last_name": "Doe",
+        "email": "john@example.com",
+        "phone": "1234567890",
+        "birthday": date(1990, 5, 15),
+        "created_at": datetime(2024, 1, 1),
+        "updated_at": None,
+    }
+    return {**record, **fields}
+
+
+@pytest.mark.asyncio
+async def test_raw_get_contacts(raw_contact_repository, mock_pool, user):
+    mock_pool.fetch.return_value = [contact_record()]
+
+    contacts = await raw_contact_repository.get_contacts(
+        name="John", email="john@example.com", skip=0, limit=10, user=user
+    )
+
+    assert len(contacts) == 1
+    assert contacts[0].first_name == "John"
+    assert contacts[0].email == "john@example.com"
+    args = mock_pool.fetch.await_args.args
+    assert args[1:] == (user.id, "John", "john@example.com", 0, 10)
+
+
+@pytest.mark.asyncio
+async def test_raw_get_contact_by_id(raw_contact_repository, mock_pool, user):
+    mock_pool.fetchrow.return_value = contact_record()
+
+    contact = await raw_contact_repository.get_contact_by_id(contact_id=1, user=user)
+
+    assert contact is not None
+    assert contact.id == 1
+    assert contact.first_name == "John"
+    assert ContactResponse.model_validate(contact.model_dump()) == contact
+    assert mock_pool.fetchrow.await_args.args[1:] == (1, user.id)
+
+    mock_pool.fetchrow.return_value = None
+    assert await raw_contact_repository.get_contact_by_id(2, user) is None
+
+
+@pytest.mark.asyncio
+async def test_raw_get_contacts_selects_only_fields(
+    raw_contact_repository, mock_pool, user
+):
+    mock_pool.fetch.return_value = [{"id": 1, "birthday": date(1990, 5, 15)}]
+
+    contacts = await raw_contact_repository.get_contacts(
+        "", "", 0, 10, user, fields=("id", "birthday")
+    )
+
+    assert contacts == [{"id": 1, "birthday": date(1990, 5, 15)}]
+    query = mock_pool.fetch.await_args.args[0]
+    assert query.startswith("SELECT id, birthday::date AS birthday FROM contacts ")
+
+
+@pytest.mark.asyncio
+async def test_raw_get_contacts_by_ids(raw_contact_repository, mock_pool, user):
+    mock_pool.fetch.return_value = [contact_record(id=3), contact_record(id=1)]
+
+    contacts = await raw_contact_repository.get_contacts_by_ids((1, 2, 3), user)
+
+    assert [contact.id for contact in contacts] == [3, 1]
+    query, *args = mock_pool.fetch.await_args.args
+    assert "id = ANY($2::int[])" in query
+    assert args == [user.id, [1, 2, 3]]
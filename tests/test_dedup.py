@@ -0,0 +1,123 @@
+from datetime import date
+
+import pytest
+
+from src.services.dedup import ContactRow, DuplicateFinder
+from src.services.normalization import normalize_email, normalize_phone, soundex
+
+
+@pytest.mark.parametrize(
+    "phone",
+    ["+380 (67) 123-45-67", "067 123 45 67", "00380671234567", "380671234567"],
+)
+def test_normalize_phone(phone):
+    assert normalize_phone(phone, "380") == "+380671234567"
+
+
+def test_normalize_phone_rejects_short_numbers():
+    assert normalize_phone("12-34", "380") is None
+
+
+def test_normalize_email():
+    assert normalize_email(" John.Doe+work@GoogleMail.com ") == "johndoe@gmail.com"
+    assert normalize_email("John.Doe@Example.com") == "john.doe@example.com"
+    assert normalize_email("jane+news@Outlook.com") == "jane@outlook.com"
+    # Other providers may hand out distinct mailboxes with a "+".
+    assert normalize_email("jane+news@example.com") == "jane+news@example.com"
+
+
+def test_soundex():
+    assert soundex("Robert") == soundex("Rupert") == "R163"
+    assert soundex("Tymczak") == "T522"
+    assert soundex("Pfister") == "P236"
+
+
+def test_finder_groups_duplicates():
+    rows = [
+        ContactRow(1, "John", "Smith", "john@example.com", "+380671234567", None),
+        ContactRow(2, "Jon", "Smith", "JOHN@example.com", "0671234567", None),
+        ContactRow(3, "John", "Smyth", "js@work.com", "+1555000111", date(1980, 1, 1)),
+        ContactRow(4, "Jane", "Smith", "jane@example.com", "+380501112233", None),
+        ContactRow(5, "Mary", "Major", "mary@example.com", "+380501112234", None),
+        ContactRow(6, "Mary", "Major", "mm@other.com", "+380501112299", None),
+    ]
+
+    groups = DuplicateFinder("380").find(rows)
+
+    assert [group.ids for group in groups] == [[5, 6], [1, 2]]
+    assert groups[0].score == 1.0
+    assert 0.7 < groups[1].score < 1.0
+
+
+def test_finder_threshold_and_birthdays():
+    rows = [
+        ContactRow(1, "Anna", "Koval", "a1@example.com", "+380501", date(1990, 5, 1)),
+        ContactRow(2, "Anna", "Koval", "a2@example.com", "+380502", date(1991, 6, 2)),
+    ]
+
+    # Same name, different birthdays: 0.75 at most.
+    assert DuplicateFinder("380").find(rows) == []
+    assert [g.ids for g in DuplicateFinder("380", threshold=0.7).find(rows)] == [[1, 2]]
+
+
+def contact(first: str, email: str, phone: str) -> dict:
+    return {
+        "first_name": first,
+        "last_name": "Dedup",
+        "email": email,
+        "phone": phone,
+        "birthday": "1985-04-04",
+    }
+
+
+def test_duplicates_and_merge(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    ids = [
+        client.post("/api/contacts", json=body, headers=headers).json()["id"]
+        for body in (
+            contact("Olena", "olena@mail.com", "+380671110000"),
+            contact("Olena", "Olena@Mail.com", "067 111 00 01"),
+            contact("Olenka", "olena.d@mail.com", "0671110000"),
+            contact("Petro", "petro@mail.com", "+380671110002"),
+        )
+    ]
+
+    response = client.get("/api/contacts/duplicates", headers=headers)
+    assert response.status_code == 200, response.text
+    groups = response.json()
+    assert len(groups) == 1
+    assert [c["id"] for c in groups[0]["contacts"]] == ids[:3]
+
+    response = client.post(
+        "/api/contacts/merge",
+        json={
+            "primary_id": ids[0],
+            "duplicate_ids": ids[1:3],
+            "fields": {"phone": "067 111 00 01"},
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["phone"] == "067 111 00 01"
+    assert client.get(f"/api/contacts/{ids[1]}", headers=headers).status_code == 404
+    assert client.get("/api/contacts/duplicates", headers=headers).json() == []
+
+    changes = client.get("/api/contacts/changes", headers=headers).json()
+    assert set(changes["deleted"]) == set(ids[1:3])
+
+
+def test_merge_errors(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.post(
+        "/api/contacts/merge",
+        json={"primary_id": 1, "duplicate_ids": [1]},
+        headers=headers,
+    )
+    assert response.status_code == 400, response.text
+
+    response = client.post(
+        "/api/contacts/merge",
+        json={"primary_id": 1, "duplicate_ids": [999]},
+        headers=headers,
+    )
+    assert response.status_code == 404, response.text
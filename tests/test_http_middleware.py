@@ -0,0 +1,189 @@
+import asyncio
+import json
+import zlib
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from src.middleware import (
+    CompressionMiddleware,
+    ConditionalGetMiddleware,
+    etag_matches,
+    weak_etag,
+)
+
+RECORDS = [{"id": i, "email": f"contact{i}@example.com"} for i in range(100)]
+
+
+async def records(request):
+    return JSONResponse(RECORDS)
+
+
+async def counted(request):
+    return JSONResponse(
+        RECORDS[:2], headers={"X-Total-Count": request.query_params["total"]}
+    )
+
+
+async def small(request):
+    return PlainTextResponse("ok")
+
+
+async def export(request):
+    async def lines():
+        for record in RECORDS[:3]:
+            yield json.dumps(record) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def events(request):
+    return StreamingResponse(
+        iter(["data: 1\n\n" * 200]), media_type="text/event-stream"
+    )
+
+
+app = Starlette(
+    routes=[
+        Route("/records", records, methods=["GET", "POST"]),
+        Route("/counted", counted),
+        Route("/small", small),
+        Route("/export", export),
+        Route("/events", events),
+    ]
+)
+app.add_middleware(ConditionalGetMiddleware)
+app.add_middleware(CompressionMiddleware, minimum_size=500, encodings=["gzip"])
+
+
+@pytest.fixture(scope="module")
+def http():
+    return TestClient(app)
+
+
+def test_large_bodies_are_compressed(http):
+    response = http.get("/records", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(json.dumps(RECORDS)) / 3
+    assert response.json() == RECORDS
+
+
+@pytest.mark.parametrize(
+    "path, accept",
+    [
+        ("/small", "gzip"),
+        ("/records", "identity"),
+        ("/records", "gzip;q=0, br"),
+        ("/events", "gzip"),
+    ],
+)
+def test_bodies_left_alone(http, path, accept):
+    response = http.get(path, headers={"Accept-Encoding": accept})
+
+    assert "content-encoding" not in response.headers
+
+
+def test_choose_prefers_server_order():
+    middleware = CompressionMiddleware(app, encodings=["br", "zstd", "gzip"])
+
+    assert middleware.choose("gzip, br") == "br"
+    assert middleware.choose("gzip;q=1.0, zstd;q=0.5") == "zstd"
+    assert middleware.choose("*;q=0.1") == "br"
+    assert middleware.choose("deflate") is None
+
+
+@pytest.mark.asyncio
+async def test_streamed_chunks_are_flushed():
+    messages = []
+
+    requests = [{"type": "http.request", "body": b""}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # The client stays connected until the response is complete.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/export",
+        "headers": [(b"accept-encoding", b"gzip")],
+        "query_string": b"",
+    }
+    inner = Starlette(routes=[Route("/export", export)])
+    await CompressionMiddleware(inner, encodings=["gzip"])(scope, receive, send)
+
+    start, *bodies = messages
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    assert not any(name == b"content-length" for name, _ in start["headers"])
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Each record can be decoded as soon as its chunk arrives.
+    for record, message in zip(RECORDS[:3], bodies):
+        assert json.loads(decoder.decompress(message["body"])) == record
+    assert bodies[-1]["more_body"] is False
+
+
+def test_etag_and_not_modified(http):
+    response = http.get("/records")
+    etag = response.headers["etag"]
+    assert etag == weak_etag(response.content)
+
+    cached = http.get("/records", headers={"If-None-Match": f'"other", {etag}'})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert "content-length" not in cached.headers
+
+    # The tag is that of the identity body, whatever the encoding.
+    compressed = http.get(
+        "/records", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"}
+    )
+    assert compressed.status_code == 304
+
+    assert http.get("/records", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert "etag" not in http.post("/records").headers
+    assert "etag" not in http.get("/export").headers
+
+
+def test_etag_covers_tagged_headers_and_varies_on_authorization(http):
+    response = http.get("/counted", params={"total": 2})
+    etag = response.headers["etag"]
+    assert "vary" not in response.headers
+
+    # Same body, but another total.
+    changed = http.get("/counted", params={"total": 3}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+    authorized = {"Authorization": "Bearer token", "If-None-Match": etag}
+    cached = http.get("/counted", params={"total": 2}, headers=authorized)
+    assert cached.status_code == 304
+    assert cached.headers["vary"] == "Authorization"
+
+
+def test_etag_matches():
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches('"a"', 'W/"b", W/"a"')
+    assert etag_matches('W/"a"', "*")
+    assert not etag_matches('W/"a"', '"b"')
+
+
+def test_contacts_list_not_modified(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.get("/api/contacts", headers=headers)
+    etag = response.headers["etag"]
+    assert "X-Total-Count" in response.headers
+    assert "Authorization" in response.headers["vary"]
+
+    cached = client.get("/api/contacts", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
@@ -1,3 +1,6 @@
+from unittest.mock import AsyncMock
+
+
 def test_create_contacts(client, get_token):
     response = client.post(
         "/api/contacts",
@@ -98,3 +101,56 @@ def test_repeat_delete_contact(client, get_token):
     assert response.status_code == 404, response.text
     data = response.json()
     assert data["detail"] == "Contact not found"
+
+
+def test_create_contact_after_user_cache_miss(client, get_token, monkeypatch):
+    # The user is then loaded by the auth dependency's own (read) session.
+    monkeypatch.setattr(
+        "src.services.auth.redis_client.get", AsyncMock(return_value=None)
+    )
+    response = client.post(
+        "/api/contacts",
+        json={
+            "first_name": "cache_miss",
+            "last_name": "cache_miss",
+            "email": "cache_miss@mail.com",
+            "phone": "+4243242324",
+            "birthday": "1970-01-01",
+        },
+        headers={"Authorization": f"Bearer {get_token}"},
+    )
+    assert response.status_code == 201, response.text
+
+
+def test_lookup_contacts(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    response = client.post(
+        "/api/contacts",
+        json={
+            "first_name": "Caller",
+            "last_name": "Lookup",
+            "email": "Caller.Lookup@Mail.com",
+            "phone": "067 555 12 34",
+            "birthday": "1975-02-03",
+        },
+        headers=headers,
+    )
+    contact_id = response.json()["id"]
+
+    for params in (
+        {"phone": "+380 (67) 555-12-34"},
+        {"email": "caller.lookup@mail.com"},
+        {"phone": "0675551234", "email": "CALLER.LOOKUP@MAIL.COM"},
+    ):
+        response = client.get("/api/contacts/lookup", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        assert [c["id"] for c in response.json()] == [contact_id], params
+
+    response = client.get(
+        "/api/contacts/lookup",
+        params={"phone": "0675551234", "email": "other@mail.com"},
+        headers=headers,
+    )
+    assert response.json() == []
+    response = client.get("/api/contacts/lookup", headers=headers)
+    assert response.status_code == 400, response.text
@@ -0,0 +1,16 @@
+from main import app
+
+
+def test_startup_timings_reported(client):
+    timings = app.state.startup_timings
+
+    assert {"database", "redis", "password_hash", "email_templates"} <= set(timings)
+    assert timings["total"] >= max(
+        value for key, value in timings.items() if key != "total"
+    )
+
+
+def test_first_request_latency_recorded(client):
+    client.get("/api/healthchecker")
+
+    assert app.state.first_request_ms >= 0
@@ -0,0 +1,224 @@
+import argparse
+
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+from alembic.operations import Operations
+from alembic.runtime.environment import EnvironmentContext
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from src.database import migrate
+from src.database.migrate import MigrationRefused, check_runner
+from src.database.online_ddl import (
+    backfill,
+    create_index_online,
+    create_index_statements,
+    drop_index_statements,
+)
+
+items = sa.table(
+    "items",
+    sa.column("id", sa.Integer),
+    sa.column("name", sa.String),
+    sa.column("name_upper", sa.String),
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'ddl.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, name_upper TEXT)"
+            )
+        )
+        conn.execute(
+            items.insert(), [{"id": i, "name": f"item{i}"} for i in range(1, 26)]
+        )
+    yield engine
+    engine.dispose()
+
+
+def test_index_statements_plain_table():
+    assert create_index_statements("ix_items_name", "items", ["name"]) == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_name ON items (name)"
+    ]
+    assert drop_index_statements("ix_items_name") == [
+        "DROP INDEX CONCURRENTLY IF EXISTS ix_items_name"
+    ]
+
+
+def test_index_statements_partitioned_table():
+    statements = create_index_statements(
+        "ix_contacts_email",
+        "contacts",
+        ["user_id", "email"],
+        ["contacts_p0", "contacts_p1"],
+    )
+
+    assert statements == [
+        "CREATE INDEX IF NOT EXISTS ix_contacts_email ON ONLY contacts (user_id, email)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS contacts_p0_ix_contacts_email "
+        "ON contacts_p0 (user_id, email)",
+        "ALTER INDEX ix_contacts_email ATTACH PARTITION contacts_p0_ix_contacts_email",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS contacts_p1_ix_contacts_email "
+        "ON contacts_p1 (user_id, email)",
+        "ALTER INDEX ix_contacts_email ATTACH PARTITION contacts_p1_ix_contacts_email",
+    ]
+    assert drop_index_statements("ix_contacts_email", partitioned=True) == [
+        "DROP INDEX IF EXISTS ix_contacts_email"
+    ]
+
+
+def test_backfill_commits_each_batch(engine):
+    selects = []
+    sa.event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: (
+            selects.append(statement) if "LIMIT" in statement else None
+        ),
+    )
+    with engine.connect() as conn:
+        # In a transaction, as migrations on PostgreSQL are.
+        context = MigrationContext.configure(conn, opts={"transactional_ddl": True})
+        with Operations.context(context), context.begin_transaction():
+            updated = backfill(
+                items,
+                lambda row: {"name_upper": row.name.upper()},
+                where=items.c.name_upper.is_(None),
+                batch_size=10,
+                pause=0,
+            )
+
+            # Already visible to other connections: committed batch by batch.
+            with engine.connect() as other:
+                filled = other.scalar(
+                    sa.select(sa.func.count()).where(items.c.name_upper.is_not(None))
+                )
+
+            rerun = backfill(
+                items,
+                lambda row: {"name_upper": row.name.upper()},
+                where=items.c.name_upper.is_(None),
+                pause=0,
+            )
+
+    assert updated == filled == 25
+    assert rerun == 0
+    # Three batches, then an empty read; then the re-run's empty read.
+    assert len(selects) == 5
+    with engine.connect() as conn:
+        assert conn.scalar(sa.select(items.c.name_upper).where(items.c.id == 25)) == (
+            "ITEM25"
+        )
+
+
+def test_create_index_online_falls_back_off_postgresql(engine):
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn)
+        with Operations.context(context), context.begin_transaction():
+            create_index_online("ix_items_name", "items", ["name"])
+
+    indexes = sa.inspect(engine).get_indexes("items")
+    assert [index["name"] for index in indexes] == ["ix_items_name"]
+
+
+def test_index_statements_with_expressions():
+    statements = create_index_statements(
+        "ix_items_name_length", "items", ["id", sa.text("(length(name))")]
+    )
+
+    assert statements == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_name_length "
+        "ON items (id, (length(name)))"
+    ]
+
+
+def test_normalized_columns_migration_backfills_in_batches(tmp_path, monkeypatch):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'contacts.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "CREATE TABLE contacts (id INTEGER PRIMARY KEY, user_id INTEGER, "
+                "email TEXT, phone TEXT)"
+            )
+        )
+        conn.execute(
+            sa.text("INSERT INTO contacts VALUES (:id, 1, :email, '050 123 45 67')"),
+            [{"id": i, "email": f"Name.{i}+tag@GMail.com"} for i in range(1, 7)]
+            # Only providers known to ignore +tags get them dropped.
+            + [{"id": 7, "email": "Team+news@Example.com"}],
+        )
+    config = Config()
+    config.set_main_option("script_location", "migrations")
+    script = ScriptDirectory.from_config(config)
+    migration = script.get_revision("f2b86d1c4a73").module
+    monkeypatch.setattr(migration, "BATCH_SIZE", 3)
+    selects = []
+    sa.event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: (
+            selects.append(statement) if "LIMIT" in statement else None
+        ),
+    )
+
+    with engine.connect() as conn, EnvironmentContext(config, script) as env:
+        env.configure(connection=conn, transactional_ddl=True)
+        context = env.get_context()
+        with Operations.context(context), context.begin_transaction():
+            migration.upgrade()
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            sa.text("SELECT email_normalized, phone_normalized FROM contacts")
+        ).all()
+    # Batches of 3, 3 and 1 row, then an empty one.
+    assert len(selects) == 4
+    assert set(rows) == {
+        *((f"name{i}@gmail.com", "+380501234567") for i in range(1, 7)),
+        ("team+news@example.com", "+380501234567"),
+    }
+    indexes = sa.inspect(engine).get_indexes("contacts")
+    assert sorted(index["name"] for index in indexes) == [
+        "ix_contacts_user_id_email_normalized",
+        "ix_contacts_user_id_phone_normalized",
+    ]
+    engine.dispose()
+
+
+def test_check_runner():
+    upgrade = argparse.Namespace(cmd=(command.upgrade, ["revision"], []), x=[])
+    current = argparse.Namespace(cmd=(command.current, [], []), x=[])
+
+    with pytest.raises(MigrationRefused):
+        check_runner(Config(cmd_opts=upgrade), {})
+    # Called from code, e.g. on app startup.
+    with pytest.raises(MigrationRefused):
+        check_runner(Config(), {})
+
+    check_runner(Config(cmd_opts=upgrade), {"direct": "true"})
+    check_runner(Config(cmd_opts=current), {})
+    runner = Config()
+    runner.attributes[migrate.RUNNER_ATTRIBUTE] = True
+    check_runner(runner, {})
+
+
+def test_runner_upgrades(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        migrate.command,
+        "upgrade",
+        lambda config, revision: calls.append((config, revision)),
+    )
+
+    migrate.main(["-x", "contacts_partitions=0"])
+
+    config, revision = calls[0]
+    assert revision == "head"
+    assert config.attributes[migrate.RUNNER_ATTRIBUTE] is True
+    assert config.cmd_opts.x == ["contacts_partitions=0"]
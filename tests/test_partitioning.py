@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.database.models import Base, User
+from src.database.partitioning import partition_contacts_statements
+from src.repository.contacts import ContactRepository
+from src.schemas import ContactModel
+
+
+def test_partition_statements_cover_every_remainder():
+    statements = partition_contacts_statements(4)
+
+    partitions = [s for s in statements if "PARTITION OF contacts" in s]
+    assert [s.split()[2] for s in partitions] == [f"contacts_p{i}" for i in range(4)]
+    assert all("MODULUS 4" in s for s in partitions)
+    assert "PARTITION BY HASH (user_id)" in statements[3]
+
+
+def test_partition_statements_reject_zero():
+    with pytest.raises(ValueError):
+        partition_contacts_statements(0)
+
+
+def test_unpartitioned_contacts_keep_global_unique_columns():
+    # Only the partitioned PostgreSQL table scopes them to the owner.
+    contacts = Base.metadata.tables["contacts"]
+
+    assert contacts.c.email.unique and contacts.c.phone.unique
+
+
+@pytest.mark.asyncio
+async def test_contact_queries_filter_on_partition_key(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'p.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    body = ContactModel(
+        first_name="Jane",
+        last_name="Doe",
+        email="jane@example.com",
+        phone="1234567890",
+        birthday="1990-05-15",
+    )
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        user = User(username="owner", email="owner@example.com")
+        session.add(user)
+        await session.commit()
+        repository = ContactRepository(session)
+        contact = await repository.create_contact(body, user)
+        statements.clear()
+
+        await repository.get_contacts("", "", 0, 10, user)
+        await repository.update_contact(contact.id, body, user)
+        await repository.remove_contact(contact.id, user)
+    await engine.dispose()
+
+    queries = [s for s in statements if s.split()[0] in ("SELECT", "UPDATE", "DELETE")]
+    assert {s.split()[0] for s in queries} == {"SELECT", "UPDATE", "DELETE"}
+    assert all("contacts.user_id = ?" in s for s in queries)
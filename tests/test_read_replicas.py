@@ -0,0 +1,201 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.db import DatabaseSessionManager
+from src.database.models import Base, User
+from src.database.raw import RawPool
+from src.repository.users import UserRepository
+
+DATABASES = ("primary", "replica-1", "replica-2")
+
+
+async def whoami(session) -> str:
+    # Every database holds a single user named after the database itself.
+    result = await session.execute(select(User.username))
+    return result.scalar_one()
+
+
+@pytest_asyncio.fixture
+async def urls(tmp_path):
+    urls = {}
+    for name in DATABASES:
+        url = f"sqlite+aiosqlite:///{tmp_path / name}.db"
+        engine = create_async_engine(url)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(
+                User.__table__.insert().values(username=name, email=f"{name}@db")
+            )
+        await engine.dispose()
+        urls[name] = url
+    return urls
+
+
+def make_manager(urls, strategy="round_robin"):
+    return DatabaseSessionManager(
+        urls["primary"],
+        replica_urls=[urls["replica-1"], urls["replica-2"]],
+        replica_strategy=strategy,
+    )
+
+
+@pytest.mark.asyncio
+async def test_without_replicas_reads_use_primary(urls):
+    manager = DatabaseSessionManager(urls["primary"])
+
+    async with manager.read_session() as session:
+        assert await whoami(session) == "primary"
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_round_robin_alternates_replicas(urls):
+    manager = make_manager(urls)
+
+    served = []
+    for _ in range(4):
+        async with manager.read_session() as session:
+            served.append(await whoami(session))
+    await manager.close()
+
+    assert served == ["replica-1", "replica-2", "replica-1", "replica-2"]
+
+
+@pytest.mark.asyncio
+async def test_least_connections_prefers_idle_replica(urls):
+    manager = make_manager(urls, strategy="least_connections")
+
+    async with manager.read_session() as busy:
+        assert await whoami(busy) == "replica-1"
+        async with manager.read_session() as session:
+            assert await whoami(session) == "replica-2"
+    async with manager.read_session() as session:
+        assert await whoami(session) == "replica-1"
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_reads_after_write_stick_to_primary(urls):
+    manager = make_manager(urls)
+
+    async def request():
+        async with manager.read_session() as read:
+            before = await whoami(read)
+            async with manager.session() as write:
+                user = await UserRepository(write).get_user_by_username("primary")
+                user.confirmed = True
+                await write.commit()
+            after = await whoami(read)
+        async with manager.read_session() as read:
+            later = await whoami(read)
+        return before, after, later
+
+    assert await asyncio.create_task(request()) == ("replica-1", "primary", "primary")
+
+    # Stickiness is scoped to the context that wrote.
+    async with manager.read_session() as read:
+        assert await whoami(read) != "primary"
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_unknown_strategy_rejected(urls):
+    with pytest.raises(ValueError):
+        DatabaseSessionManager(urls["primary"], replica_strategy="random")
+
+
+@pytest.mark.asyncio
+async def test_request_session_is_built_on_first_use(urls):
+    manager = make_manager(urls, strategy="least_connections")
+    checkouts = []
+    event.listen(
+        manager.replica_engines[0].sync_engine,
+        "checkout",
+        lambda *args: checkouts.append(1),
+    )
+
+    async with manager.request_session(read_only=True) as unused:
+        assert not unused.started
+        # An unused session does not count against its replica.
+        async with manager.request_session(read_only=True) as session:
+            assert await whoami(session) == "replica-1"
+            assert session.started
+    assert manager._replica_sessions == [0, 0]
+    assert len(checkouts) == 1
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_options_only_for_queue_pools(urls):
+    manager = DatabaseSessionManager(
+        "sqlite+aiosqlite://",
+        replica_urls=[urls["replica-1"]],
+        pool_size=3,
+        max_overflow=1,
+    )
+
+    # In-memory SQLite gets a StaticPool, which takes no size.
+    async with manager.session() as session:
+        assert (await session.execute(select(1))).scalar_one() == 1
+    assert manager.replica_engines[0].pool.size() == 3
+    await manager.close()
+
+
+def fake_raw_pool(strategy="round_robin") -> RawPool:
+    pool = RawPool(
+        "postgresql+asyncpg://app@primary/contacts",
+        replica_urls=[
+            "postgresql+asyncpg://app@replica-1/contacts",
+            "postgresql+asyncpg://app@replica-2/contacts",
+        ],
+        replica_strategy=strategy,
+    )
+    pool._pools = [
+        SimpleNamespace(fetchrow=AsyncMock(return_value=name)) for name in DATABASES
+    ]
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_raw_reads_use_replicas_until_a_write(urls):
+    pool = fake_raw_pool()
+    manager = DatabaseSessionManager(urls["primary"])
+
+    async def request():
+        before = [await pool.fetchrow("SELECT 1") for _ in range(2)]
+        async with manager.session() as write:
+            user = await UserRepository(write).get_user_by_username("primary")
+            user.confirmed = True
+            await write.commit()
+        return before, await pool.fetchrow("SELECT 1")
+
+    assert await asyncio.create_task(request()) == (
+        ["replica-1", "replica-2"],
+        "primary",
+    )
+    assert await pool.fetchrow("SELECT 1") == "replica-1"
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_raw_least_connections_prefers_idle_replica():
+    pool = fake_raw_pool("least_connections")
+    release = asyncio.Event()
+
+    async def slow(query, *args):
+        await release.wait()
+        return "replica-1"
+
+    pool._pools[1].fetchrow.side_effect = slow
+    busy = asyncio.create_task(pool.fetchrow("SELECT pg_sleep(1)"))
+    await asyncio.sleep(0)
+
+    assert await pool.fetchrow("SELECT 1") == "replica-2"
+    release.set()
+    assert await busy == "replica-1"
@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from redis.asyncio.sentinel import SentinelConnectionPool
+from redis.crc import key_slot
+from slowapi.util import get_remote_address
+
+from src.api import users
+from src.services.cache import user_key
+from src.services.redis_clients import (
+    InstrumentedClusterPipeline,
+    InstrumentedRedis,
+    InstrumentedRedisCluster,
+    create_node_redis,
+    create_redis,
+    rate_limit_storage_uri,
+)
+
+
+def redis_settings(**overrides) -> SimpleNamespace:
+    values = dict(
+        REDIS_MODE="standalone",
+        REDIS_HOST="localhost",
+        REDIS_PORT=6379,
+        REDIS_PASSWORD=None,
+        REDIS_SENTINELS=["sentinel1:26379", "sentinel2:26380"],
+        REDIS_SENTINEL_SERVICE="contacts",
+        REDIS_CLUSTER_NODES=["node1:7000", "node2:7001"],
+        REDIS_MAX_CONNECTIONS=7,
+        REDIS_SOCKET_TIMEOUT=0.25,
+        REDIS_CONNECT_TIMEOUT=0.5,
+        REDIS_HEALTH_CHECK_INTERVAL=15,
+        REDIS_RETRIES=2,
+        REDIS_RETRY_BACKOFF=0.01,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_user_keys_share_a_slot():
+    keys = [user_key("alice"), user_key("alice", "lock")]
+    keys.append(user_key("alice", "contacts", "count"))
+
+    assert keys == ["user:{alice}", "user:{alice}:lock", "user:{alice}:contacts:count"]
+    assert {key_slot(key.encode()) for key in keys} == {key_slot(b"alice")}
+
+
+def test_sentinel_client_follows_the_master():
+    # Clients connect lazily, so no sentinel needs to be running.
+    redis = create_redis(redis_settings(REDIS_MODE="sentinel", REDIS_PASSWORD="pw"))
+
+    assert isinstance(redis, InstrumentedRedis)
+    pool = redis.connection_pool
+    assert isinstance(pool, SentinelConnectionPool)
+    assert pool.service_name == "contacts"
+    assert pool.max_connections == 7
+    assert pool.connection_kwargs["password"] == "pw"
+    sentinels = [
+        s.connection_pool.connection_kwargs for s in pool.sentinel_manager.sentinels
+    ]
+    assert [(s["host"], s["port"]) for s in sentinels] == [
+        ("sentinel1", 26379),
+        ("sentinel2", 26380),
+    ]
+    assert all(s["socket_timeout"] == 0.25 for s in sentinels)
+
+
+def test_cluster_client_and_pubsub_node():
+    settings = redis_settings(REDIS_MODE="cluster")
+    redis = create_redis(settings)
+
+    assert isinstance(redis, InstrumentedRedisCluster)
+    assert sorted(redis.nodes_manager.startup_nodes) == ["node1:7000", "node2:7001"]
+    assert redis.connection_kwargs["max_connections"] == 7
+    assert redis.connection_kwargs["socket_timeout"] == 0.25
+    assert isinstance(redis.pipeline(), InstrumentedClusterPipeline)
+
+    node = create_node_redis(settings)
+    kwargs = node.connection_pool.connection_kwargs
+    assert (kwargs["host"], kwargs["port"]) == ("node1", 7000)
+
+
+@pytest.mark.parametrize(
+    "overrides, uri",
+    [
+        ({}, "redis://localhost:6379"),
+        ({"REDIS_PASSWORD": "pw"}, "redis://:pw@localhost:6379"),
+        (
+            {"REDIS_MODE": "sentinel"},
+            "redis+sentinel://sentinel1:26379,sentinel2:26380/contacts",
+        ),
+        ({"REDIS_MODE": "cluster"}, "redis+cluster://node1:7000,node2:7001"),
+        (
+            {"REDIS_MODE": "cluster", "REDIS_CLUSTER_NODES": []},
+            "redis+cluster://localhost:6379",
+        ),
+    ],
+)
+def test_rate_limit_storage_uri(overrides, uri):
+    assert rate_limit_storage_uri(redis_settings(**overrides)) == uri
+
+
+def test_limiter_counts_in_configured_redis(monkeypatch):
+    monkeypatch.setattr(users, "settings", SimpleNamespace(RATE_LIMIT_STORAGE="redis"))
+    monkeypatch.setattr(
+        "src.services.redis_clients.rate_limit_storage_uri",
+        lambda s: "redis+sentinel://a:26379,b:26379/mymaster",
+    )
+    monkeypatch.setattr(users, "Limiter", Mock())
+    users.get_limiter.cache_clear()
+    try:
+        users.get_limiter()
+    finally:
+        users.get_limiter.cache_clear()
+
+    users.Limiter.assert_called_once_with(
+        key_func=get_remote_address,
+        storage_uri="redis+sentinel://a:26379,b:26379/mymaster",
+        in_memory_fallback_enabled=True,
+    )
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from src.conf.config import settings
+from src.database.models import User
+from src.services import auth, metrics
+from src.services.cache import CircuitBreaker
+from src.services.redis_clients import create_redis
+
+
+def test_circuit_breaker_opens_and_retries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.services.cache.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failures=2, reset_after=30)
+
+    breaker.failure()
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.is_open and not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()  # One trial call...
+    assert not breaker.allow()  # ...at a time.
+    breaker.failure()
+    now[0] += 10
+    assert not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()
+    breaker.success()
+    assert not breaker.is_open and breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_authentication_falls_back_to_database(monkeypatch):
+    redis = Mock(get=AsyncMock(side_effect=ConnectionError("down")))
+    execute = redis.pipeline.return_value.execute
+    execute.side_effect = ConnectionError("down")
+    monkeypatch.setattr(auth, "redis_client", redis)
+    monkeypatch.setattr(auth, "redis_breaker", CircuitBreaker(failures=2))
+    lookup = AsyncMock(return_value=User(id=3, username="degraded", is_active=True))
+    monkeypatch.setattr(
+        auth, "UserService", Mock(return_value=Mock(get_user_by_username=lookup))
+    )
+    token = await auth.create_access_token(data={"sub": "degraded"})
+    skipped = metrics.redis_breaker_skips.value("user")
+
+    for _ in range(3):
+        user = await auth.get_current_user(token, db=None)
+        assert user.id == 3
+
+    assert lookup.await_count == 3
+    # The cache read and the lock failed once each, then Redis was skipped.
+    assert redis.get.await_count + execute.call_count == 2
+    assert metrics.redis_breaker_skips.value("user") == skipped + 4
+    # Only the lock was tried; nothing was written after it failed.
+    assert execute.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_client_settings_and_latency():
+    settings = SimpleNamespace(
+        REDIS_MODE="standalone",
+        REDIS_HOST="localhost",
+        REDIS_PORT=6379,
+        REDIS_PASSWORD=None,
+        REDIS_MAX_CONNECTIONS=7,
+        REDIS_SOCKET_TIMEOUT=0.25,
+        REDIS_CONNECT_TIMEOUT=0.5,
+        REDIS_HEALTH_CHECK_INTERVAL=15,
+        REDIS_RETRIES=2,
+        REDIS_RETRY_BACKOFF=0.01,
+    )
+    redis = create_redis(settings)
+    pool = redis.connection_pool
+    assert pool.max_connections == 7
+    assert pool.connection_kwargs["socket_timeout"] == 0.25
+    assert pool.connection_kwargs["socket_connect_timeout"] == 0.5
+    assert pool.connection_kwargs["health_check_interval"] == 15
+
+    await redis.ping()
+    pipeline = redis.pipeline(transaction=False)
+    pipeline.set("metrics:test", 1).delete("metrics:test")
+    await pipeline.execute()
+    await redis.aclose()
+
+    exposed = metrics.render()
+    assert 'redis_command_duration_seconds_count{command="PING"}' in exposed
+    assert 'redis_command_duration_seconds_count{command="PIPELINE"}' in exposed
+
+
+def test_metrics_endpoint(client, monkeypatch):
+    assert client.get("/api/metrics").status_code == 404
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scraper-token")
+    assert client.get("/api/metrics").status_code == 401
+    response = client.get(
+        "/api/metrics", headers={"Authorization": "Bearer wrong-token"}
+    )
+    assert response.status_code == 401
+
+    response = client.get(
+        "/api/metrics", headers={"Authorization": "Bearer scraper-token"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE redis_command_duration_seconds histogram" in response.text
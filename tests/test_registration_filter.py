@@ -0,0 +1,92 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+
+from src.services.bloom import BloomFilter
+from src.services.users import RegistrationFilter, UserService
+
+
+@pytest_asyncio.fixture
+async def bloom():
+    redis = FakeAsyncRedis()
+    yield BloomFilter(redis, "test:bloom", bits=1 << 16, hashes=5)
+    await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_bloom_filter_is_pessimistic_until_ready(bloom):
+    assert await bloom.might_contain("a", "b") == [True, True]
+
+    await bloom.add("a")
+    await bloom.mark_ready()
+
+    assert await bloom.might_contain("a", "b") == [True, False]
+    assert await bloom.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_bloom_filter_false_positive_rate(bloom):
+    await bloom.add(*(f"taken{i}" for i in range(2000)))
+    await bloom.mark_ready()
+
+    assert all(await bloom.might_contain(*(f"taken{i}" for i in range(2000))))
+    found = await bloom.might_contain(*(f"free{i}" for i in range(2000)))
+    # 5 hashes over 32 bits per value: about 0.3% expected.
+    assert sum(found) < 20
+
+
+@pytest.mark.asyncio
+async def test_bloom_filter_evicted_bitmap_is_not_ready(bloom):
+    await bloom.add("a")
+    await bloom.mark_ready()
+    await bloom.clear()
+
+    assert await bloom.might_contain("b") == [True]
+
+
+@pytest.mark.asyncio
+async def test_find_conflict_skips_database_for_new_values(bloom):
+    await bloom.mark_ready()
+    service = UserService(
+        AsyncMock(), avatar_resolver=Mock(), registered=RegistrationFilter(bloom)
+    )
+    service.repository = Mock(get_users_by_email_or_username=AsyncMock())
+
+    assert await service.find_conflict("new@example.com", "new") is None
+    service.repository.get_users_by_email_or_username.assert_not_awaited()
+
+    await service.registered.add("taken@example.com", "taken")
+    service.repository.get_users_by_email_or_username.return_value = [
+        Mock(email="taken@example.com", username="taken")
+    ]
+    assert await service.find_conflict("taken@example.com", "new") == "email"
+    service.repository.get_users_by_email_or_username.assert_awaited_once_with(
+        "taken@example.com", None
+    )
+
+
+def test_register_conflict_missed_by_filter(client, monkeypatch):
+    # A filter that says every value is free leaves the check to the
+    # unique constraints.
+    registered = Mock(
+        might_be_taken=AsyncMock(return_value=(False, False)), add=AsyncMock()
+    )
+    monkeypatch.setattr(
+        "src.services.users.get_registration_filter", lambda: registered
+    )
+    monkeypatch.setattr("src.api.auth.send_email", Mock())
+    body = {
+        "username": "filterUser",
+        "email": "filterUser@example.com",
+        "password": "12345678",
+        "role": "user",
+    }
+
+    assert client.post("api/auth/register", json=body).status_code == 201
+    response = client.post("api/auth/register", json=body)
+
+    assert response.status_code == 409, response.text
+    assert response.json()["detail"] == "Користувач з таким email або іменем вже існує"
+    registered.add.assert_awaited_once_with(body["email"], body["username"])
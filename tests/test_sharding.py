@@ -0,0 +1,264 @@
+import pickle
+from collections import Counter
+
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.db import DatabaseSessionManager
+from src.database.models import Base, Contact, ContactCounter, User
+from src.database.sharding import (
+    HashRing,
+    ShardMover,
+    init_shard,
+    misplaced_users,
+    pin_users,
+)
+from src.repository.contacts import ContactRepository
+from src.schemas import ContactModel
+from src.services import auth
+from src.services.users import UserService
+
+SHARDS = {"a": 1_000_000, "b": 2_000_000, "c": 3_000_000}
+
+
+def contact_body(user_id: int, i: int) -> ContactModel:
+    return ContactModel(
+        first_name=f"First{i}",
+        last_name=f"Last{i}",
+        email=f"u{user_id}c{i}@example.com",
+        phone=f"+38050{user_id:03d}{i:04d}",
+        birthday="1990-01-01",
+    )
+
+
+@pytest_asyncio.fixture
+async def manager(tmp_path):
+    primary = f"sqlite+aiosqlite:///{tmp_path / 'primary'}.db"
+    engine = create_async_engine(primary)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for user_id in range(1, 13):
+            await conn.execute(
+                User.__table__.insert().values(
+                    id=user_id, username=f"user{user_id}", email=f"{user_id}@ex.com"
+                )
+            )
+    await engine.dispose()
+
+    manager = DatabaseSessionManager(
+        primary,
+        shard_urls={
+            name: f"sqlite+aiosqlite:///{tmp_path / name}.db" for name in SHARDS
+        },
+    )
+    for name, offset in SHARDS.items():
+        await init_shard(manager.shard_engine(name), id_offset=offset)
+    yield manager
+    await manager.close()
+
+
+async def get_user(manager, user_id) -> User:
+    async with manager.session() as db:
+        return await db.get(User, user_id)
+
+
+async def add_contacts(manager, user, count) -> list[int]:
+    async with manager.shard_session(manager.shard_for(user)) as db:
+        repository = ContactRepository(db)
+        return [
+            (await repository.create_contact(contact_body(user.id, i), user)).id
+            for i in range(count)
+        ]
+
+
+async def shard_contacts(manager, name) -> dict[int, int]:
+    async with manager.shard_session(name) as db:
+        result = await db.execute(select(Contact.id, Contact.user_id))
+        return dict(result.all())
+
+
+def test_ring_spreads_keys_evenly():
+    ring = HashRing(["a", "b", "c"])
+
+    counts = Counter(ring.node_for(key) for key in range(30_000))
+
+    assert set(counts) == {"a", "b", "c"}
+    assert all(7_000 < count < 13_000 for count in counts.values())
+
+
+def test_adding_node_only_moves_keys_to_it():
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+
+    moved = [
+        key for key in range(30_000) if before.node_for(key) != after.node_for(key)
+    ]
+
+    assert all(after.node_for(key) == "d" for key in moved)
+    assert 4_000 < len(moved) < 11_000
+
+
+@pytest.mark.asyncio
+async def test_contacts_stored_on_owner_shard(manager):
+    for user_id in range(1, 13):
+        user = await get_user(manager, user_id)
+        await add_contacts(manager, user, 2)
+
+    for name, offset in SHARDS.items():
+        contacts = await shard_contacts(manager, name)
+        assert all(manager.ring.node_for(owner) == name for owner in contacts.values())
+        assert all(offset < contact_id < offset + 1000 for contact_id in contacts)
+    async with manager.session() as db:
+        # The primary database keeps no contacts.
+        assert await db.scalar(select(func.count(Contact.id))) == 0
+
+
+@pytest.mark.asyncio
+async def test_move_user_between_shards(manager):
+    user = await get_user(manager, 1)
+    source = manager.shard_for(user)
+    target = next(name for name in SHARDS if name != source)
+    ids = await add_contacts(manager, user, 5)
+    other = next(u for u in range(2, 13) if manager.ring.node_for(u) == source)
+    other_ids = await add_contacts(manager, await get_user(manager, other), 2)
+    redis = FakeAsyncRedis()
+    await redis.set("user:{user1}", b"cached")
+
+    copied = await ShardMover(manager, redis, batch_size=2, settle_seconds=0).move(
+        1, target
+    )
+
+    assert copied == 5
+    assert (await get_user(manager, 1)).contacts_shard == target
+    assert sorted(await shard_contacts(manager, target)) == ids
+    assert sorted(await shard_contacts(manager, source)) == other_ids
+    assert await redis.get("user:{user1}") is None
+    async with manager.shard_session(target) as db:
+        # The change feed position travels with the contacts.
+        assert await db.get(ContactCounter, 1) is not None
+    async with manager.shard_session(source) as db:
+        assert await db.get(ContactCounter, 1) is None
+
+    user = await get_user(manager, 1)
+    async with manager.shard_session(manager.shard_for(user)) as db:
+        contact = await ContactRepository(db).get_contact_by_id(ids[0], user)
+    assert contact.email == "u1c0@example.com"
+
+
+@pytest.mark.asyncio
+async def test_move_during_user_load_is_not_cached(manager, monkeypatch):
+    user = await get_user(manager, 1)
+    target = next(name for name in SHARDS if name != manager.shard_for(user))
+    redis = FakeAsyncRedis()
+    mover = ShardMover(manager, redis, settle_seconds=0)
+    monkeypatch.setattr(auth, "redis_client", redis)
+    get_user_by_username = UserService.get_user_by_username
+
+    async def move_after_read(self, username):
+        # The user is read with its old placement, then moved.
+        stale = await get_user_by_username(self, username)
+        await mover.move(1, target)
+        return stale
+
+    monkeypatch.setattr(UserService, "get_user_by_username", move_after_read)
+    async with manager.session() as db:
+        await auth._load_user("user:{user1}", "user1", db)
+
+    assert await redis.get("user:{user1}") is None
+    monkeypatch.setattr(UserService, "get_user_by_username", get_user_by_username)
+    async with manager.session() as db:
+        loaded = pickle.loads(await auth._load_user("user:{user1}", "user1", db))
+    assert loaded.contacts_shard == target
+
+
+@pytest.mark.asyncio
+async def test_move_catches_up_with_writes_during_copy(manager):
+    user = await get_user(manager, 1)
+    source = manager.shard_for(user)
+    target = next(name for name in SHARDS if name != source)
+    ids = await add_contacts(manager, user, 3)
+    mover = ShardMover(manager, FakeAsyncRedis(), settle_seconds=0)
+    set_placement = mover._set_placement
+
+    async def write_while_flipping(user, shard):
+        # A request that still routes to the source shard.
+        async with manager.shard_session(source) as db:
+            repository = ContactRepository(db)
+            await repository.remove_contact(ids[0], user)
+            await repository.update_contact(ids[1], contact_body(1, 99), user)
+        await set_placement(user, shard)
+
+    mover._set_placement = write_while_flipping
+    await mover.move(1, target)
+
+    user = await get_user(manager, 1)
+    async with manager.shard_session(target) as db:
+        contacts = await ContactRepository(db).get_contacts("", "", 0, 10, user)
+    assert sorted(c.id for c in contacts) == ids[1:]
+    assert {c.email for c in contacts} >= {"u1c99@example.com"}
+
+
+@pytest.mark.asyncio
+async def test_move_keeps_writes_made_on_target_after_flip(manager):
+    user = await get_user(manager, 1)
+    source = manager.shard_for(user)
+    target = next(name for name in SHARDS if name != source)
+    ids = await add_contacts(manager, user, 3)
+    mover = ShardMover(manager, FakeAsyncRedis(), settle_seconds=0)
+    set_placement = mover._set_placement
+    created = []
+
+    async def write_after_flipping(user, shard):
+        await set_placement(user, shard)
+        # New requests already route to the target shard...
+        async with manager.shard_session(target) as db:
+            repository = ContactRepository(db)
+            created.append(
+                (await repository.create_contact(contact_body(1, 50), user)).id
+            )
+            await repository.update_contact(ids[0], contact_body(1, 60), user)
+        # ...while requests that started earlier finish on the source.
+        async with manager.shard_session(source) as db:
+            repository = ContactRepository(db)
+            await repository.update_contact(ids[0], contact_body(1, 70), user)
+            await repository.update_contact(ids[1], contact_body(1, 80), user)
+            await repository.remove_contact(ids[2], user)
+
+    mover._set_placement = write_after_flipping
+    await mover.move(1, target)
+
+    user = await get_user(manager, 1)
+    async with manager.shard_session(target) as db:
+        repository = ContactRepository(db)
+        contacts = await repository.get_contacts("", "", 0, 10, user)
+        count = await repository.count_contacts(user)
+        changes = await repository.get_changes(user, 0, 100)
+    emails = {c.id: c.email for c in contacts}
+    assert emails == {
+        ids[0]: "u1c60@example.com",
+        ids[1]: "u1c80@example.com",
+        created[0]: "u1c50@example.com",
+    }
+    assert count == 3
+    assert ids[2] in changes["deleted"]
+
+
+@pytest.mark.asyncio
+async def test_pin_then_rebalance_after_adding_shard(manager, tmp_path):
+    assert await pin_users(manager) == 12
+    assert await misplaced_users(manager) == []
+
+    grown = DatabaseSessionManager(
+        str(manager.engine.url),
+        shard_urls={
+            name: f"sqlite+aiosqlite:///{tmp_path / name}.db" for name in [*SHARDS, "d"]
+        },
+    )
+    misplaced = await misplaced_users(grown)
+    await grown.close()
+
+    assert misplaced
+    assert all(shard == "d" for _, shard in misplaced)
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from src.services.loaders import DataLoader
+
+
+@pytest.fixture
+def contact_id(client, get_token):
+    response = client.post(
+        "/api/contacts",
+        json={
+            "first_name": "sparse",
+            "last_name": "sparse_last",
+            "email": "sparse@mail.com",
+            "phone": "+42700000001",
+            "birthday": "1985-03-04",
+        },
+        headers={"Authorization": f"Bearer {get_token}"},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_read_with_fields(client, get_token, contact_id):
+    headers = {"Authorization": f"Bearer {get_token}"}
+
+    response = client.get(
+        "/api/contacts",
+        params={"fields": "phone, first_name,birthday"},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json() == [
+        {"first_name": "sparse", "phone": "+42700000001", "birthday": "1985-03-04"}
+    ]
+    assert response.headers["X-Total-Count"] == "1"
+
+    response = client.get(
+        f"/api/contacts/{contact_id}", params={"fields": "id,email"}, headers=headers
+    )
+    assert response.json() == {"id": contact_id, "email": "sparse@mail.com"}
+
+    response = client.get(f"/api/contacts/{contact_id}", headers=headers)
+    assert set(response.json()) == {
+        "id",
+        "first_name",
+        "last_name",
+        "email",
+        "phone",
+        "birthday",
+        "created_at",
+        "updated_at",
+    }
+
+
+def test_unknown_fields(client, get_token):
+    response = client.get(
+        "/api/contacts",
+        params={"fields": "first_name,user_id,hashed_password"},
+        headers={"Authorization": f"Bearer {get_token}"},
+    )
+
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Unknown fields: hashed_password, user_id"
+
+
+@pytest.mark.asyncio
+async def test_data_loader_batches_and_caches():
+    batches = []
+
+    async def batch(keys):
+        batches.append(keys)
+        return [key * 10 for key in keys]
+
+    loader = DataLoader(batch, max_batch_size=3)
+
+    async def resolve(key):
+        return await loader.load(key)
+
+    values = await asyncio.gather(*(resolve(key) for key in [1, 2, 1, 3, 4]))
+
+    assert values == [10, 20, 10, 30, 40]
+    assert batches == [[1, 2, 3], [4]]
+    assert await loader.load(2) == 20
+    assert len(batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_data_loader_failure_is_not_cached():
+    calls = []
+
+    async def batch(keys):
+        calls.append(keys)
+        if len(calls) == 1:
+            raise RuntimeError("down")
+        return keys
+
+    loader = DataLoader(batch)
+
+    with pytest.raises(RuntimeError):
+        await loader.load_many(["a", "b"])
+    assert await loader.load_many(["a", "b"]) == ["a", "b"]
+    assert calls == [["a", "b"], ["a", "b"]]
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Client libraries that only specific requests need; importing the
+# application must not pull them in.
+LAZY_MODULES = (
+    "cloudinary",
+    "fastapi_mail",
+    "httpx",
+    "jinja2",
+    "passlib",
+    "redis",
+    "asyncpg",
+)
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """
+    Import ``module`` in a fresh interpreter under ``-X importtime``.
+
+    The interpreter gets no application settings in its environment, so the
+    import fails if anything reads configuration at import time.
+
+    Returns:
+        Cumulative import time in microseconds, keyed by module name.
+    """
+    env = {key: os.environ[key] for key in ("PATH", "SYSTEMROOT") if key in os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def test_main_import_defers_optional_clients(record_property):
+    profile = import_profile("main")
+
+    record_property("main_import_ms", profile["main"] / 1000)
+    assert not [module for module in LAZY_MODULES if module in profile]
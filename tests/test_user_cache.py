@@ -0,0 +1,117 @@
+import asyncio
+import pickle
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+
+from src.database.models import User
+from src.services import auth
+from src.services.cache import SingleFlight, jittered
+
+
+@pytest_asyncio.fixture
+async def redis(monkeypatch):
+    redis = FakeAsyncRedis()
+    monkeypatch.setattr(auth, "redis_client", redis)
+    yield redis
+    await redis.aclose()
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    async def get_user_by_username(username):
+        await asyncio.sleep(0.05)
+        return User(
+            id=7, username=username, email="stampede@example.com", is_active=True
+        )
+
+    lookup = AsyncMock(side_effect=get_user_by_username)
+    monkeypatch.setattr(
+        auth, "UserService", Mock(return_value=Mock(get_user_by_username=lookup))
+    )
+    return lookup
+
+
+@pytest.mark.asyncio
+async def test_expired_user_is_loaded_once(redis, lookups):
+    token = await auth.create_access_token(data={"sub": "stampede"})
+
+    sessions = [object() for _ in range(1000)]
+
+    users = await asyncio.gather(
+        *(auth.get_current_user(token, db=db) for db in sessions)
+    )
+
+    lookups.assert_awaited_once_with("stampede")
+    # In the session of the request that started the load.
+    auth.UserService.assert_called_once_with(sessions[0])
+    assert {user.id for user in users} == {7}
+    ttl = await redis.ttl("user:{stampede}")
+    assert 0.9 * auth.USER_CACHE_SECONDS - 1 <= ttl <= 1.1 * auth.USER_CACHE_SECONDS
+    assert not await redis.exists("user:{stampede}:lock")
+
+
+@pytest.mark.asyncio
+async def test_waits_for_the_worker_holding_the_lock(redis, lookups):
+    token = await auth.create_access_token(data={"sub": "locked"})
+    await redis.set("user:{locked}:lock", 1)
+
+    async def other_worker():
+        await asyncio.sleep(0.05)
+        await redis.set("user:{locked}", pickle.dumps(User(id=8, username="locked")))
+
+    user, _ = await asyncio.gather(
+        auth.get_current_user(token, db=None), other_worker()
+    )
+
+    assert user.id == 8
+    lookups.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_load_overtaken_by_deactivation_is_not_cached(redis, lookups):
+    token = await auth.create_access_token(data={"sub": "stale"})
+    read = lookups.side_effect
+
+    async def deactivated_after_read(username):
+        user = await read(username)
+        # Deactivated and dropped from the cache before the load writes it.
+        await auth.forget_cached_user(username)
+        return user
+
+    lookups.side_effect = deactivated_after_read
+
+    await auth.get_current_user(token, db=None)
+
+    assert not await redis.exists("user:{stale}")
+    assert not await redis.exists("user:{stale}:lock")
+    assert await redis.ttl("user:{stale}:gen") > 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors_and_forgets_them():
+    flight = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("down")
+
+    results = await asyncio.gather(
+        *(flight.do("key", fail) for _ in range(10)), return_exceptions=True
+    )
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    with pytest.raises(ValueError):
+        await flight.do("key", fail)
+    assert len(calls) == 2
+
+
+def test_jittered_spreads_expiry():
+    ttls = {jittered(600) for _ in range(200)}
+    assert min(ttls) >= 540 and max(ttls) <= 660
+    assert len(ttls) > 10
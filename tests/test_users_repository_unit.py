@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, MagicMock
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User, UserRole
+from src.repository.raw import RawUserRepository
 from src.repository.users import UserRepository
 from src.schemas import UserCreate
 
@@ -146,3 +147,31 @@ async def test_update_password(user_repository, mock_session, user):
     assert result.hashed_password == "new_hashed_password"
     mock_session.commit.assert_awaited_once()
     mock_session.refresh.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_raw_get_user_by_username():
+    pool = MagicMock(fetchrow=AsyncMock())
+    pool.fetchrow.return_value = {
+        "id": 1,
+        "username": "testuser",
+        "email": "test@example.com",
+        "hashed_password": "hashedpassword",
+        "refresh_token": None,
+        "created_at": None,
+        "avatar": "avatar_url",
+        "confirmed": True,
+        "role": "ADMIN",
+        "is_active": True,
+        "contacts_shard": None,
+    }
+
+    result = await RawUserRepository(pool).get_user_by_username("testuser")
+
+    assert isinstance(result, User)
+    assert result.username == "testuser"
+    assert result.role is UserRole.ADMIN
+    assert pool.fetchrow.await_args.args[1:] == ("testuser",)
+
+    pool.fetchrow.return_value = None
+    assert await RawUserRepository(pool).get_user_by_username("nobody") is None